@@ -1,85 +1,345 @@
+"""
+Hour-of-day histogram of tweet times from saved timelines (outerhtml.txt), excluding retweets,
+plus day-of-week and per-timezone breakdowns for planning when to pre-warm the game.
+
+A <time datetime=...> counts as a retweet when any of its 5 nearest ancestors contains
+"retweeted" or data-testid="socialContext" anywhere in its markup. The default streaming parser
+decides that in one pass with an ancestor stack; --parser soup is the original BeautifulSoup
+version, which re-serializes every ancestor and gets slow on long scroll dumps.
+
+Any number of dumps or directories of dumps can be given. They are parsed in parallel, and
+overlapping scroll captures are deduplicated by tweet (status id + timestamp). Parsed times
+are cached per file content hash in .tweet_cache/, so only new or changed dumps are parsed again.
+
+    python analyze_tweets.py                      # outerhtml.txt -> tweet_histogram.png
+    python analyze_tweets.py dumps/ more.html --timezones America/New_York Europe/London --no-show
+    python analyze_tweets.py dump.html --parser soup --no-cache
+"""
+import os
 import re
+import json
+import hashlib
+import argparse
+import tempfile
 from datetime import datetime
 from collections import Counter
-import matplotlib.pyplot as plt
-from bs4 import BeautifulSoup
-
-# Read the HTML file
-with open('outerhtml.txt', 'r', encoding='utf-8') as f:
-    html_content = f.read()
-
-# Parse HTML
-soup = BeautifulSoup(html_content, 'html.parser')
-
-# Find all time elements with datetime attributes
-time_elements = soup.find_all('time', attrs={'datetime': True})
-
-print(f"Found {len(time_elements)} total time elements")
-
-# Extract timestamps and filter out retweets
-tweet_times = []
-for time_elem in time_elements:
-    datetime_str = time_elem.get('datetime')
-
-    # Check if this is part of a retweet by looking at parent elements
-    # Retweets typically have "retweeted" text or specific data attributes
-    parent_text = time_elem.parent.get_text() if time_elem.parent else ""
-
-    # Look for retweet indicators in the surrounding context
-    is_retweet = False
-    current = time_elem
-    for _ in range(5):  # Check up to 5 parent levels
-        if current.parent:
-            current = current.parent
-            parent_str = str(current)
-            # Check for retweet indicators
-            if 'retweeted' in parent_str.lower() or 'data-testid="socialContext"' in parent_str:
-                is_retweet = True
+from html.parser import HTMLParser
+from zoneinfo import ZoneInfo
+from concurrent.futures import ProcessPoolExecutor
+
+RETWEET_ANCESTOR_LEVELS = 5
+SOCIAL_CONTEXT = 'data-testid="socialContext"'
+# Elements that never have children (html.parser via BeautifulSoup closes them right away)
+VOID_ELEMENTS = {'area', 'base', 'br', 'col', 'embed', 'hr', 'img', 'input', 'keygen', 'link', 'menuitem',
+                 'meta', 'param', 'source', 'track', 'wbr', 'basefont', 'bgsound', 'command', 'frame',
+                 'image', 'isindex', 'nextid', 'spacer'}
+READ_CHUNK = 1 << 20
+STATUS_HREF = re.compile(r'/status/(\d+)')
+DUMP_EXTENSIONS = ('.html', '.htm', '.txt')
+CACHE_DIR = '.tweet_cache'
+CACHE_VERSION = 1  # bump when parsing changes, so cached results are redone
+WEEKDAYS = ['Mon', 'Tue', 'Wed', 'Thu', 'Fri', 'Sat', 'Sun']
+DEFAULT_TIMEZONES = ['UTC', 'America/New_York', 'America/Los_Angeles', 'Europe/London']
+
+def has_retweet_marker(markup):
+    return 'retweeted' in markup.lower() or SOCIAL_CONTEXT in markup
+
+def status_id_of(href):
+    match = STATUS_HREF.search(href or '')
+    return match.group(1) if match else None
+
+def parse_time(datetime_str):
+    try:
+        return datetime.fromisoformat(datetime_str.replace('Z', '+00:00'))
+    except ValueError:
+        return None
+
+class Frame:
+    """An open element: whether its markup so far has a retweet marker, and the times it decides"""
+    __slots__ = ('tag', 'marked', 'pending', 'status_id')
+
+    def __init__(self, tag, status_id=None):
+        self.tag = tag
+        self.marked = False
+        self.pending = []  # (tweet, ancestor frames) for times whose outermost checked ancestor is this
+        self.status_id = status_id  # for <a href=".../status/<id>">, the permalink around a tweet's time
+
+class TweetTimeParser(HTMLParser):
+    """Single-pass retweet filter. Same verdicts as the soup version, without serializing subtrees.
+
+    A marker anywhere inside an element is inside all of its open ancestors too, so it marks the
+    whole stack (stopping at the first frame already marked). A time's verdict is known once the
+    outermost of its ancestors closes, so each time only holds references to up to 5 frames.
+    """
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.stack = [Frame('[document]')]  # BeautifulSoup's root counts as an ancestor too
+        self.total = 0
+        self.tweets = []  # (datetime string, status id or None) of non-retweets, in closing order
+        self.tail = ''  # end of the previous text chunk, for markers split across handle_data calls
+
+    def mark(self):
+        for frame in reversed(self.stack):
+            if frame.marked:
                 break
-        else:
-            break
+            frame.marked = True
+
+    def handle_starttag(self, tag, attrs):
+        self.tail = ''
+        markup = tag + ' ' + ' '.join(f'{name}="{value or ""}"' for name, value in attrs)
+        values = dict(attrs)
+        if tag == 'time' and 'datetime' in values:
+            self.total += 1
+            window = self.stack[-RETWEET_ANCESTOR_LEVELS:]
+            status_id = next((frame.status_id for frame in reversed(window) if frame.status_id), None)
+            window[0].pending.append(((values['datetime'] or '', status_id), window))
+
+        if tag in VOID_ELEMENTS:
+            if has_retweet_marker(markup):
+                self.mark()
+            # A void <time datetime> has no children, its verdict only waits on its ancestors
+            return
+        self.stack.append(Frame(tag, status_id_of(values.get('href')) if tag == 'a' else None))
+        if has_retweet_marker(markup):
+            self.mark()
+
+    def handle_startendtag(self, tag, attrs):
+        self.handle_starttag(tag, attrs)
+        if tag not in VOID_ELEMENTS:
+            self.handle_endtag(tag)
+
+    def handle_endtag(self, tag):
+        self.tail = ''
+        # Close up to the most recent matching element; a stray end tag closes nothing
+        if not any(frame.tag == tag for frame in self.stack[1:]):
+            return
+        while True:
+            frame = self.stack.pop()
+            self.decide(frame)
+            if frame.tag == tag:
+                break
+
+    def decide(self, frame):
+        for tweet, window in frame.pending:
+            if not any(ancestor.marked for ancestor in window):
+                self.tweets.append(tweet)
+        frame.pending = []
+
+    def handle_data(self, data):
+        if has_retweet_marker(self.tail + data):
+            self.mark()
+        self.tail = (self.tail + data)[-len(SOCIAL_CONTEXT):]
+
+    def handle_comment(self, data):
+        self.tail = ''
+        if has_retweet_marker(data):
+            self.mark()
+
+    handle_decl = handle_pi = unknown_decl = handle_comment
 
-    if not is_retweet:
+    def close(self):
+        super().close()
+        while self.stack:
+            self.decide(self.stack.pop())
+
+def tweet_times_stream(path):
+    """Non-retweets in an HTML dump, reading it in chunks.
+
+    Returns (total time elements, [(datetime string, status id or None)]).
+    """
+    parser = TweetTimeParser()
+    with open(path, 'r', encoding='utf-8') as f:
+        while True:
+            chunk = f.read(READ_CHUNK)
+            if not chunk:
+                break
+            parser.feed(chunk)
+    parser.close()
+    return parser.total, parser.tweets
+
+def tweet_times_soup(path):
+    """The original BeautifulSoup version: re-serializes each ancestor, quadratic on big dumps"""
+    from bs4 import BeautifulSoup
+
+    with open(path, 'r', encoding='utf-8') as f:
+        soup = BeautifulSoup(f.read(), 'html.parser')
+
+    time_elements = soup.find_all('time', attrs={'datetime': True})
+    tweet_times = []
+    for time_elem in time_elements:
+        # Check if this is part of a retweet by looking at parent elements
+        is_retweet = False
+        current = time_elem
+        for _ in range(RETWEET_ANCESTOR_LEVELS):
+            if current.parent:
+                current = current.parent
+                if has_retweet_marker(str(current)):
+                    is_retweet = True
+                    break
+            else:
+                break
+
+        if not is_retweet:
+            link = time_elem.find_parent('a', href=STATUS_HREF)
+            tweet_times.append((time_elem.get('datetime'), status_id_of(link.get('href')) if link else None))
+    return len(time_elements), tweet_times
+
+PARSERS = {'stream': tweet_times_stream, 'soup': tweet_times_soup}
+
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(READ_CHUNK), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+def load_dump(path, parser_name, cache_dir):
+    """Parse one dump, or reuse the cached result for identical content. Runs in a worker process.
+
+    Returns (path, total time elements, tweets, whether it came from the cache).
+    """
+    cache_path = None
+    if cache_dir:
+        cache_path = os.path.join(cache_dir, f"{file_sha256(path)}-{parser_name}-v{CACHE_VERSION}.json")
         try:
-            dt = datetime.fromisoformat(datetime_str.replace('Z', '+00:00'))
-            tweet_times.append(dt)
-        except:
+            with open(cache_path, 'r') as f:
+                cached = json.load(f)
+            return path, cached['total'], [tuple(tweet) for tweet in cached['tweets']], True
+        except (OSError, ValueError, KeyError):
             pass
 
-print(f"Found {len(tweet_times)} tweet times (excluding retweets)")
+    total, tweets = PARSERS[parser_name](path)
+    if cache_path:
+        # Write-then-rename, so a crash or a parallel run never leaves a half-written entry
+        fd, tmp_path = tempfile.mkstemp(dir=cache_dir, suffix='.tmp')
+        with os.fdopen(fd, 'w') as f:
+            json.dump({'path': path, 'total': total, 'tweets': tweets}, f)
+        os.replace(tmp_path, cache_path)
+    return path, total, tweets, False
+
+def find_dumps(paths):
+    """Files as given, plus every dump file under the given directories"""
+    found = []
+    for path in paths:
+        if os.path.isdir(path):
+            for root, dirs, files in os.walk(path):
+                dirs[:] = sorted(d for d in dirs if not d.startswith('.'))
+                found += [os.path.join(root, name) for name in sorted(files) if name.lower().endswith(DUMP_EXTENSIONS)]
+        else:
+            found.append(path)
+    return list(dict.fromkeys(found))
+
+def load_dumps(paths, parser_name='stream', cache_dir=CACHE_DIR, workers=None):
+    """Tweets from all dumps, deduplicated across overlapping captures.
+
+    Returns (total time elements, tweet datetimes, duplicates dropped).
+    """
+    if cache_dir:
+        os.makedirs(cache_dir, exist_ok=True)
+    results = []
+    if len(paths) == 1:
+        results.append(load_dump(paths[0], parser_name, cache_dir))
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(load_dump, paths, [parser_name] * len(paths), [cache_dir] * len(paths)))
+
+    total = 0
+    seen = set()
+    tweet_times = []
+    for path, file_total, tweets, cached in results:
+        total += file_total
+        print(f"  {path}: {len(tweets)} tweets{' (cached)' if cached else ''}")
+        for datetime_str, status_id in tweets:
+            # Without a permalink, the timestamp alone identifies the tweet
+            key = (status_id, datetime_str)
+            if key in seen:
+                continue
+            seen.add(key)
+            dt = parse_time(datetime_str or '')
+            if dt is not None:
+                tweet_times.append(dt)
+    duplicates = sum(len(tweets) for _, _, tweets, _ in results) - len(seen)
+    return total, tweet_times, duplicates
+
+def print_breakdowns(tweet_times, timezones):
+    """Tweets by day of week, and the busiest local hours and days in each timezone"""
+    weekday_counts = Counter(dt.weekday() for dt in tweet_times)
+    print("\nBy day of week (UTC):")
+    for day, name in enumerate(WEEKDAYS):
+        print(f"  {name} - {weekday_counts.get(day, 0)} tweets")
+
+    for name in timezones:
+        zone = ZoneInfo(name)
+        local = [dt.astimezone(zone) for dt in tweet_times]
+        hours = Counter(dt.hour for dt in local)
+        days = Counter(dt.weekday() for dt in local)
+        top_hours = ', '.join(f"{hour:02d}:00 ({count})" for hour, count in hours.most_common(3))
+        top_days = ', '.join(f"{WEEKDAYS[day]} ({count})" for day, count in days.most_common(3))
+        print(f"\n{name}:")
+        print(f"  busiest hours: {top_hours}")
+        print(f"  busiest days:  {top_days}")
+
+def plot_histogram(hour_counts, output):
+    import matplotlib.pyplot as plt
+
+    plt.figure(figsize=(14, 6))
+    hours_range = range(24)
+    counts = [hour_counts.get(h, 0) for h in hours_range]
+
+    plt.bar(hours_range, counts, color='#1DA1F2', alpha=0.7, edgecolor='black')
+    plt.xlabel('Hour of Day (UTC)', fontsize=12)
+    plt.ylabel('Number of Tweets', fontsize=12)
+    plt.title('Tweet Distribution by Hour of Day (Excluding Retweets)', fontsize=14, fontweight='bold')
+    plt.xticks(hours_range)
+    plt.grid(axis='y', alpha=0.3)
 
-# Extract hour of day
-hours = [dt.hour for dt in tweet_times]
+    # Add value labels on bars
+    for i, count in enumerate(counts):
+        if count > 0:
+            plt.text(i, count, str(count), ha='center', va='bottom', fontsize=9)
 
-# Count tweets by hour
-hour_counts = Counter(hours)
+    plt.tight_layout()
+    plt.savefig(output, dpi=300, bbox_inches='tight')
+    print(f"\nHistogram saved as '{output}'")
 
-# Create histogram
-plt.figure(figsize=(14, 6))
-hours_range = range(24)
-counts = [hour_counts.get(h, 0) for h in hours_range]
+def main():
+    parser = argparse.ArgumentParser(description="Tweet times by hour of day, excluding retweets")
+    parser.add_argument('paths', nargs='*', default=['outerhtml.txt'], help="saved timeline HTML files or directories")
+    parser.add_argument('--parser', choices=sorted(PARSERS), default='stream',
+                        help="stream: one pass, constant memory per tweet; soup: the original BeautifulSoup scan")
+    parser.add_argument('--workers', type=int, help="parser processes (default: one per CPU)")
+    parser.add_argument('--cache-dir', default=CACHE_DIR, help="parsed-times cache, keyed by file hash")
+    parser.add_argument('--no-cache', action='store_true', help="parse every dump again and don't save results")
+    parser.add_argument('--timezones', nargs='+', default=DEFAULT_TIMEZONES, help="IANA zones for the local breakdowns")
+    parser.add_argument('--output', default='tweet_histogram.png')
+    parser.add_argument('--no-show', action='store_true', help="only save the histogram")
+    args = parser.parse_args()
 
-plt.bar(hours_range, counts, color='#1DA1F2', alpha=0.7, edgecolor='black')
-plt.xlabel('Hour of Day (UTC)', fontsize=12)
-plt.ylabel('Number of Tweets', fontsize=12)
-plt.title('Tweet Distribution by Hour of Day (Excluding Retweets)', fontsize=14, fontweight='bold')
-plt.xticks(hours_range)
-plt.grid(axis='y', alpha=0.3)
+    paths = find_dumps(args.paths)
+    if not paths:
+        parser.error("no dump files found")
+    print(f"Reading {len(paths)} dump(s)")
+    total, tweet_times, duplicates = load_dumps(paths, args.parser, None if args.no_cache else args.cache_dir,
+                                                args.workers)
+    print(f"Found {total} total time elements")
+    print(f"Found {len(tweet_times)} tweet times (excluding retweets, {duplicates} duplicates across dumps dropped)")
 
-# Add value labels on bars
-for i, count in enumerate(counts):
-    if count > 0:
-        plt.text(i, count, str(count), ha='center', va='bottom', fontsize=9)
+    # Count tweets by hour
+    hour_counts = Counter(dt.hour for dt in tweet_times)
+    plot_histogram(hour_counts, args.output)
 
-plt.tight_layout()
-plt.savefig('tweet_histogram.png', dpi=300, bbox_inches='tight')
-print("\nHistogram saved as 'tweet_histogram.png'")
+    # Print statistics
+    print("\n=== Tweet Time Statistics ===")
+    print(f"Total tweets analyzed: {len(tweet_times)}")
+    print(f"\nMost active hours (UTC):")
+    for hour, count in sorted(hour_counts.items(), key=lambda x: x[1], reverse=True)[:5]:
+        print(f"  {hour:02d}:00 - {count} tweets")
+    print_breakdowns(tweet_times, args.timezones)
 
-# Print statistics
-print("\n=== Tweet Time Statistics ===")
-print(f"Total tweets analyzed: {len(tweet_times)}")
-print(f"\nMost active hours (UTC):")
-for hour, count in sorted(hour_counts.items(), key=lambda x: x[1], reverse=True)[:5]:
-    print(f"  {hour:02d}:00 - {count} tweets")
+    if not args.no_show:
+        import matplotlib.pyplot as plt
+        plt.show()
 
-plt.show()
+if __name__ == '__main__':
+    main()
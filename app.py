@@ -4,13 +4,23 @@ import time
 import threading
 import uuid
 import json
-from flask import Flask, request, jsonify, send_from_directory, session, render_template
+import re
+import unicodedata
+import hmac
+from flask import Flask, Response, request, jsonify, send_from_directory, session, render_template
+import click
 from flask_limiter import Limiter
+from itsdangerous import URLSafeTimedSerializer, BadSignature
 from flask_limiter.util import get_remote_address
-from openai import OpenAI
+from limits.storage import Storage, SlidingWindowCounterSupport
+from limits.storage.base import TimestampedSlidingWindow
 from dotenv import load_dotenv
-from concurrent.futures import ThreadPoolExecutor
+from model_registry import ModelRegistry, load_roster
+from export_games import iter_export_chunks, iter_gzip_ndjson, ndjson, parse_bound, parse_cursor, EXPORT_CHUNK_PAUSE
 import random
+import math
+from collections import deque
+import heapq
 
 load_dotenv()
 
@@ -21,74 +31,204 @@ app.config['PERMANENT_SESSION_LIFETIME'] = 2592000  # 30 days
 
 # Rate limiting exemption function
 def rate_limit_exempt():
-    """Exempt from rate limiting if: debug mode, localhost, or secret header matches"""
+    """Exempt from rate limiting if: debug mode, a direct localhost connection, or secret header matches"""
     # Exempt in debug mode
     if app.debug:
         return True
 
-    # Exempt localhost
-    ip = request.headers.get('X-Forwarded-For', request.remote_addr)
-    if ',' in ip:
-        ip = ip.split(',')[0].strip()
-    if ip in ['127.0.0.1', 'localhost', '::1']:
+    # Exempt localhost - by socket address, since X-Forwarded-For is whatever the client sent,
+    # and only for direct connections (a proxy on the same host would make everyone localhost)
+    if request.remote_addr in ('127.0.0.1', '::1') and 'X-Forwarded-For' not in request.headers:
         return True
 
     # Exempt if secret header matches
     bypass_secret = os.getenv('RATE_LIMIT_BYPASS_SECRET')
     if bypass_secret:
-        header_secret = request.headers.get('X-Bypass-Secret')
-        if header_secret == bypass_secret:
+        header_secret = request.headers.get('X-Bypass-Secret', '')
+        if hmac.compare_digest(header_secret.encode(), bypass_secret.encode()):
             return True
 
     return False
 
-# Rate limiting
+# Rate limit counters live in a small SQLite file next to the game DB, so every gunicorn worker on
+# the host shares them (memory:// gave each worker its own, i.e. 4x the intended limits)
+RATE_LIMIT_DB_PATH = os.getenv(
+    'RATE_LIMIT_DB_PATH', os.path.join(os.path.dirname(os.getenv('DATABASE_PATH', 'comedy.db')), 'ratelimits.db')
+)
+RATE_LIMIT_EVICT_INTERVAL = 60  # seconds between sweeps of expired counters
+RATE_LIMIT_EVICT_BATCH = 1000
+
+class SQLiteLimiterStorage(Storage, SlidingWindowCounterSupport, TimestampedSlidingWindow):
+    """`limits` storage backend on a shared SQLite file: fixed and sliding-window-counter strategies.
+
+    Registered as sqlite:///relative/path or sqlite:////absolute/path.
+    """
+
+    STORAGE_SCHEME = ["sqlite"]
+
+    def __init__(self, uri=None, wrap_exceptions=False, **options):
+        super().__init__(uri, wrap_exceptions=wrap_exceptions, **options)
+        path = uri.split('://', 1)[1] if uri else RATE_LIMIT_DB_PATH
+        self.path = path[1:] if path.startswith('/') else path
+        self.local = threading.local()
+        self.next_eviction = 0.0
+
+    @property
+    def base_exceptions(self):
+        return sqlite3.Error
+
+    def connection(self):
+        """One autocommit connection per thread, opened lazily and again after fork"""
+        conn = getattr(self.local, 'conn', None)
+        if conn is None or self.local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=5.0, isolation_level=None, check_same_thread=False)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')  # losing the last counters in a crash is fine
+            # Set up on first connect rather than at import, to keep it off the startup path
+            conn.execute('''CREATE TABLE IF NOT EXISTS rate_limits
+                            (key TEXT PRIMARY KEY,
+                             count INTEGER NOT NULL,
+                             expires_at REAL NOT NULL) WITHOUT ROWID''')
+            conn.execute('CREATE INDEX IF NOT EXISTS idx_rate_limits_expiry ON rate_limits(expires_at)')
+            self.local.conn = conn
+            self.local.pid = os.getpid()
+        return conn
+
+    def evict_expired(self, conn, now):
+        """Delete a batch of expired counters, at most once per interval per worker"""
+        if now < self.next_eviction:
+            return
+        self.next_eviction = now + RATE_LIMIT_EVICT_INTERVAL
+        conn.execute(
+            '''DELETE FROM rate_limits WHERE key IN
+               (SELECT key FROM rate_limits WHERE expires_at <= ? LIMIT ?)''',
+            (now, RATE_LIMIT_EVICT_BATCH)
+        )
+
+    def _incr(self, conn, key, expiry, amount, now):
+        # An expired counter restarts at this hit, like a missing one
+        return conn.execute(
+            '''INSERT INTO rate_limits (key, count, expires_at) VALUES (?, ?, ?)
+               ON CONFLICT (key) DO UPDATE SET
+                   count = CASE WHEN expires_at <= ? THEN excluded.count ELSE count + excluded.count END,
+                   expires_at = CASE WHEN expires_at <= ? THEN excluded.expires_at ELSE expires_at END
+               RETURNING count''',
+            (key, amount, now + expiry, now, now)
+        ).fetchone()[0]
+
+    def _get(self, conn, key, now):
+        row = conn.execute('SELECT count FROM rate_limits WHERE key = ? AND expires_at > ?', (key, now)).fetchone()
+        return row[0] if row else 0
+
+    def incr(self, key, expiry, amount=1):
+        conn = self.connection()
+        now = time.time()
+        self.evict_expired(conn, now)
+        return self._incr(conn, key, expiry, amount, now)
+
+    def get(self, key):
+        return self._get(self.connection(), key, time.time())
+
+    def get_expiry(self, key):
+        now = time.time()
+        row = self.connection().execute(
+            'SELECT expires_at FROM rate_limits WHERE key = ? AND expires_at > ?', (key, now)
+        ).fetchone()
+        return row[0] if row else now
+
+    def clear(self, key):
+        self.connection().execute('DELETE FROM rate_limits WHERE key = ?', (key,))
+
+    def check(self):
+        try:
+            self.connection().execute('SELECT 1').fetchone()
+            return True
+        except sqlite3.Error:
+            return False
+
+    def reset(self):
+        return self.connection().execute('DELETE FROM rate_limits').rowcount
+
+    def acquire_sliding_window_entry(self, key, limit, expiry, amount=1):
+        """Weighted previous + current window count, checked and incremented in one write transaction"""
+        if amount > limit:
+            return False
+        conn = self.connection()
+        now = time.time()
+        self.evict_expired(conn, now)
+        previous_key, current_key = self.sliding_window_keys(key, expiry, now)
+
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            previous_count, previous_ttl, current_count, _ = self._sliding_window(
+                conn, previous_key, current_key, expiry, now
+            )
+            if math.floor(previous_count * previous_ttl / expiry + current_count) + amount > limit:
+                conn.execute('ROLLBACK')
+                return False
+            # The current window's counter is the next one's previous, so it lives for two windows
+            self._incr(conn, current_key, 2 * expiry, amount, now)
+            conn.execute('COMMIT')
+            return True
+        except BaseException:
+            conn.execute('ROLLBACK')
+            raise
+
+    def _sliding_window(self, conn, previous_key, current_key, expiry, now):
+        previous_count = self._get(conn, previous_key, now)
+        current_count = self._get(conn, current_key, now)
+        previous_ttl = (1 - (((now - expiry) / expiry) % 1)) * expiry if previous_count else 0.0
+        current_ttl = (1 - ((now / expiry) % 1)) * expiry + expiry
+        return previous_count, previous_ttl, current_count, current_ttl
+
+    def get_sliding_window(self, key, expiry):
+        now = time.time()
+        previous_key, current_key = self.sliding_window_keys(key, expiry, now)
+        return self._sliding_window(self.connection(), previous_key, current_key, expiry, now)
+
+    def clear_sliding_window(self, key, expiry):
+        previous_key, current_key = self.sliding_window_keys(key, expiry, time.time())
+        self.clear(previous_key)
+        self.clear(current_key)
+
+# Rate limiting - sliding window counters, so a burst across a minute boundary can't get 2x through
 limiter = Limiter(
     get_remote_address,
     app=app,
     default_limits=[],
-    storage_uri="memory://",
-    enabled=lambda: not rate_limit_exempt()
+    storage_uri=os.getenv('RATE_LIMIT_STORAGE_URI', f"sqlite:///{RATE_LIMIT_DB_PATH}"),
+    strategy="sliding-window-counter"
 )
-
-# OpenRouter setup
-client = OpenAI(
-    base_url="https://openrouter.ai/api/v1",
-    api_key=os.getenv("OPENROUTER_API_KEY")
-)
-
-# Models to compete - Avg response times from benchmark (models >4s are commented out)
-MODELS = [
-    {"name": "Gemini 2.5 Flash", "model": "google/gemini-2.5-flash", "reasoning_max_tokens": 0},  # 0.69s avg
-    {"name": "Llama 4 Scout", "model": "meta-llama/llama-4-scout"},  # 0.75s avg
-    # {"name": "Llama 4 Maverick", "model": "meta-llama/llama-4-maverick"},  # 0.78s avg
-    {"name": "GPT-4.1", "model": "openai/gpt-4.1"},  # 1.07s avg
-    {"name": "Qwen3 235B", "model": "qwen/qwen3-235b-a22b-2507"},  # 1.13s avg
-    {"name": "GPT-4o", "model": "openai/gpt-4o", "reasoning_effort": "low"},  # 1.24s avg
-    {"name": "DeepSeek Chat v3.1", "model": "deepseek/deepseek-chat-v3.1"},  # 1.48s avg
-    # {"name": "Qwen 2.5 72B", "model": "qwen/qwen-2.5-72b-instruct"},  # 1.50s avg
-    {"name": "GPT-5 Chat", "model": "openai/gpt-5-chat", "reasoning_effort": "low"},  # 1.53s avg
-    # {"name": "Rocinante 12B", "model": "thedrummer/rocinante-12b"},  # 1.72s avg
-    {"name": "Claude Sonnet 4.5", "model": "anthropic/claude-sonnet-4.5"},  # 1.83s avg
-    {"name": "Claude Haiku 4.5", "model": "anthropic/claude-haiku-4.5"},
-    {"name": "Kimi K2", "model": "moonshotai/kimi-k2-0905"},  # 2.19s avg
-    # {"name": "Qwen 2.5 VL 32B", "model": "qwen/qwen2.5-vl-32b-instruct"},  # 2.21s avg (too similar to 72B/235B, parking it)
-    # {"name": "Claude Opus 4.1", "model": "anthropic/claude-opus-4.1"},  # 2.35s avg (too expensive)
-    {"name": "DeepSeek v3", "model": "deepseek/deepseek-chat-v3-0324"},  # 2.49s avg (superseded by v3.1, keeping the newer one)
-    # {"name": "DeepSeek Chat v3.0324", "model": "deepseek/deepseek-chat-v3-0324"},  # 3.03s avg (nearly identical to v3.1, set aside)
-
-    # SLOW MODELS (>4s avg) - Commented out for production
-    # {"name": "GLM-4.5-Air", "model": "z-ai/glm-4.5-air"},  # 5.13s avg (also uses 333 tokens avg!)
-    # {"name": "GPT-5 Mini", "model": "openai/gpt-5-mini", "reasoning_effort": "low"},  # 6.10s avg
-    # {"name": "Grok Code Fast 1", "model": "x-ai/grok-code-fast-1"},  # 8.31s avg (915 tokens!)
-    # {"name": "Grok 4 Fast", "model": "x-ai/grok-4-fast"},  # 8.86s avg (382 tokens)
-    # {"name": "DeepSeek R1T2 Chimera", "model": "tngtech/deepseek-r1t2-chimera"},  # 12.69s avg
-    # {"name": "DeepSeek R1 Qwen3 8B", "model": "deepseek/deepseek-r1-0528-qwen3-8b"},  # 15.43s avg
-    # {"name": "GPT-5 Nano", "model": "openai/gpt-5-nano", "reasoning_effort": "low"},  # 16.13s avg
-    # {"name": "DeepSeek R1", "model": "deepseek/deepseek-r1-0528"},  # 42.04s avg (way too slow!)
-]
-
-ALL_MODEL_NAMES = [m["name"] for m in MODELS]
+# `enabled` only takes a bool, so exemptions go through a request filter
+limiter.request_filter(rate_limit_exempt)
+
+# OpenRouter setup (OPENROUTER_BASE_URL can point at mock_openrouter.py for load tests).
+# Created on first use in each worker: importing openai is most of app.py's import time, and an
+# HTTP connection pool shouldn't be shared across gunicorn's fork anyway.
+_client = {'pid': None, 'client': None}
+_client_lock = threading.Lock()
+
+def get_client():
+    if _client['pid'] != os.getpid():
+        with _client_lock:
+            if _client['pid'] != os.getpid():
+                from openai import OpenAI
+                _client['client'] = OpenAI(
+                    base_url=os.getenv("OPENROUTER_BASE_URL", "https://openrouter.ai/api/v1"),
+                    api_key=os.getenv("OPENROUTER_API_KEY")
+                )
+                _client['pid'] = os.getpid()
+    return _client['client']
+
+# Models to compete live in models.json ("enabled": false parks a model, e.g. too slow or too
+# expensive). Edits are picked up by every worker within a few seconds, no restart needed.
+MODELS_PATH = os.getenv('MODELS_PATH', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'models.json'))
+model_registry = ModelRegistry(MODELS_PATH)
+
+# Fold simple plurals ("cats" -> "cat") when building suggestion cache keys.
+# Changing this after launch only affects new rows - existing keys are kept as-is, and a word
+# whose old row no longer matches its new key falls back to that row (see create_pending_suggestion).
+FOLD_PLURALS = os.getenv('FOLD_PLURALS', 'True').lower() == 'true'
 
 # Random word suggestions - curated list of 200+ funny/interesting nouns
 RANDOM_WORDS = [
@@ -186,19 +326,94 @@ You: "ground up and in the freezer"
 Just give the punchline. Nothing else.
 """
 
+# Suggestion canonicalization
+_APOSTROPHE_RE = re.compile(r"['\u2019]")
+_PUNCTUATION_RE = re.compile(r"[^\w\s]|_")
+_WHITESPACE_RE = re.compile(r"\s+")
+
+def normalize_display_word(word):
+    """Clean up a suggestion for display: NFKC + collapsed whitespace, case preserved"""
+    word = unicodedata.normalize('NFKC', word)
+    return _WHITESPACE_RE.sub(' ', word).strip()
+
+def fold_plural(token):
+    """Very simple English plural folding - only needs to be consistent, not correct"""
+    if len(token) <= 3 or not token.isalpha():
+        return token
+    if token.endswith('ies') and len(token) > 4:
+        return token[:-3] + 'y'
+    if token.endswith(('sses', 'shes', 'ches', 'xes', 'zes')):
+        return token[:-2]
+    if token.endswith(('ss', 'us', 'is')):
+        return token
+    if token.endswith('s'):
+        return token[:-1]
+    return token
+
+def canonicalize_word(word, fold_plurals=None):
+    """Map a suggestion to its cache key - "Cats!", "cat  " and "ｃａｔ" all become "cat" """
+    if fold_plurals is None:
+        fold_plurals = FOLD_PLURALS
+    word = unicodedata.normalize('NFKC', word).casefold()
+    word = _APOSTROPHE_RE.sub('', word)
+    word = _PUNCTUATION_RE.sub(' ', word)
+    tokens = word.split()
+    # Only the head noun (last word) gets folded: "coffee makers" -> "coffee maker"
+    if fold_plurals and tokens:
+        tokens[-1] = fold_plural(tokens[-1])
+    return ' '.join(tokens)
+
 # Database configuration - use Railway volume path if set, otherwise local file
 DB_PATH = os.getenv('DATABASE_PATH', 'comedy.db')
 
+# Set by init_db() - False if this SQLite build has no FTS5
+FTS_ENABLED = False
+
+# Stored in PRAGMA user_version once init_db() has run - bump it whenever init_db() changes
+SCHEMA_VERSION = 3
+
+def rebuild_vote_rollups(db):
+    """Recompute vote_rollups from every voted game (caller commits). Returns the number of rows.
+
+    vote() only keeps them current from then on - run this after writing games some other way
+    (imports, db_benchmark.py generate), or with `flask rebuild-rollups`.
+    """
+    db.execute('DELETE FROM vote_rollups')
+    return db.execute('''INSERT INTO vote_rollups (hour, mode, model_name, display_position, appearances, wins)
+                         SELECT strftime('%Y-%m-%d %H:00:00', g.created_at), COALESCE(g.mode, 'women'), r.model_name,
+                                COALESCE(gc.display_position, -1), COUNT(*),
+                                SUM(CASE WHEN gc.response_id = g.winning_response_id THEN 1 ELSE 0 END)
+                         FROM games g
+                         JOIN game_contestants gc ON gc.game_id = g.id
+                         JOIN responses r ON r.id = gc.response_id
+                         WHERE g.voter_session IS NOT NULL
+                         GROUP BY 1, 2, 3, 4''').rowcount
+
 # Database setup
 def init_db():
+    global FTS_ENABLED
     conn = sqlite3.connect(DB_PATH)
     c = conn.cursor()
 
+    # Already migrated - skip the CREATE/ALTER probes and backfills
+    if c.execute('PRAGMA user_version').fetchone()[0] == SCHEMA_VERSION:
+        FTS_ENABLED = bool(c.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'suggestions_fts'"
+        ).fetchone())
+        conn.close()
+        return
+
+    # Lets maintenance hand freed pages back to the volume. Only takes effect on a new database -
+    # existing ones are converted once with `flask maintenance --full-vacuum`
+    c.execute('PRAGMA auto_vacuum=INCREMENTAL')
+
     # Suggestions table
     c.execute('''CREATE TABLE IF NOT EXISTS suggestions
                  (id INTEGER PRIMARY KEY AUTOINCREMENT,
                   word TEXT NOT NULL,
                   mode TEXT DEFAULT 'women',
+                  canonical_word TEXT,
+                  play_count INTEGER DEFAULT 0,
                   created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
                   UNIQUE(word, mode))''')
 
@@ -289,11 +504,150 @@ def init_db():
         c.execute('ALTER TABLE games ADD COLUMN mode TEXT DEFAULT "women"')
         conn.commit()
 
+    # Migration: Add canonical_word column to suggestions if it doesn't exist
+    try:
+        c.execute('SELECT canonical_word FROM suggestions LIMIT 1')
+    except sqlite3.OperationalError:
+        c.execute('ALTER TABLE suggestions ADD COLUMN canonical_word TEXT')
+        conn.commit()
+
+    c.execute('CREATE INDEX IF NOT EXISTS idx_suggestions_canonical ON suggestions(canonical_word, mode)')
+    c.execute('CREATE INDEX IF NOT EXISTS idx_responses_suggestion ON responses(suggestion_id, status)')
+    c.execute('CREATE INDEX IF NOT EXISTS idx_game_contestants_game ON game_contestants(game_id)')
+    # Most played suggestions per mode, for the overload fallback
+    c.execute('CREATE INDEX IF NOT EXISTS idx_suggestions_popular ON suggestions(mode, play_count)')
+    # Only unvoted games are ever pruned, so only they need ordering by age
+    c.execute('''CREATE INDEX IF NOT EXISTS idx_games_unvoted_created
+                 ON games(created_at) WHERE voter_session IS NULL''')
+    # Voted games in export order, for its keyset pagination
+    c.execute('''CREATE INDEX IF NOT EXISTS idx_games_voted_created
+                 ON games(created_at, id) WHERE voter_session IS NOT NULL''')
+
+    # Appearances from pruned unvoted games, per day and model
+    c.execute('''CREATE TABLE IF NOT EXISTS game_appearance_rollups
+                 (day TEXT NOT NULL,
+                  mode TEXT NOT NULL,
+                  model_name TEXT NOT NULL,
+                  model_id TEXT NOT NULL,
+                  appearances INTEGER DEFAULT 0,
+                  PRIMARY KEY (day, mode, model_name, model_id))''')
+
+    # Last run per maintenance job, so only one worker runs it
+    c.execute('''CREATE TABLE IF NOT EXISTS maintenance_runs
+                 (job TEXT PRIMARY KEY,
+                  started_at REAL,
+                  finished_at REAL,
+                  result TEXT)''')
+
+    # Voted games per hour, model, mode and display position - kept current by vote()
+    rollups_exist = c.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'vote_rollups'"
+    ).fetchone()
+    c.execute('''CREATE TABLE IF NOT EXISTS vote_rollups
+                 (hour TEXT NOT NULL,
+                  mode TEXT NOT NULL,
+                  model_name TEXT NOT NULL,
+                  display_position INTEGER NOT NULL,
+                  appearances INTEGER DEFAULT 0,
+                  wins INTEGER DEFAULT 0,
+                  PRIMARY KEY (hour, mode, model_name, display_position)) WITHOUT ROWID''')
+    if not rollups_exist:
+        rebuild_vote_rollups(c)
+
+    # Per-model ratings: Elo updated on each vote, Luce-choice fit (same scale) refit in batch
+    c.execute('''CREATE TABLE IF NOT EXISTS model_ratings
+                 (model_name TEXT PRIMARY KEY,
+                  elo REAL DEFAULT 1500,
+                  elo_games INTEGER DEFAULT 0,
+                  rating REAL,
+                  rating_ci_low REAL,
+                  rating_ci_high REAL,
+                  rated_games INTEGER DEFAULT 0,
+                  refit_at REAL)''')
+
+    # New words requested while overloaded, generated later by DeferredWords
+    c.execute('''CREATE TABLE IF NOT EXISTS deferred_suggestions
+                 (id INTEGER PRIMARY KEY AUTOINCREMENT,
+                  word TEXT NOT NULL,
+                  canonical_word TEXT NOT NULL,
+                  mode TEXT DEFAULT 'women',
+                  claimed_until REAL,
+                  created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                  UNIQUE(canonical_word, mode))''')
+
+    # Migration: Add claimed_until column to deferred_suggestions if it doesn't exist
+    try:
+        c.execute('SELECT claimed_until FROM deferred_suggestions LIMIT 1')
+    except sqlite3.OperationalError:
+        c.execute('ALTER TABLE deferred_suggestions ADD COLUMN claimed_until REAL')
+        conn.commit()
+
+    # Migration: Add play_count column to suggestions if it doesn't exist
+    try:
+        c.execute('SELECT play_count FROM suggestions LIMIT 1')
+    except sqlite3.OperationalError:
+        c.execute('ALTER TABLE suggestions ADD COLUMN play_count INTEGER DEFAULT 0')
+        c.execute('''UPDATE suggestions
+                     SET play_count = (SELECT COUNT(*) FROM games g WHERE g.suggestion_id = suggestions.id)''')
+        conn.commit()
+
+    # Full-text index over suggestion words for autocomplete (external content, kept in sync by triggers)
+    fts_exists = c.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'suggestions_fts'"
+    ).fetchone()
+    try:
+        c.execute('''CREATE VIRTUAL TABLE IF NOT EXISTS suggestions_fts
+                     USING fts5(word, content='suggestions', content_rowid='id',
+                                tokenize='unicode61 remove_diacritics 2', prefix='2 3')''')
+        c.execute('''CREATE TRIGGER IF NOT EXISTS suggestions_fts_insert AFTER INSERT ON suggestions BEGIN
+                         INSERT INTO suggestions_fts(rowid, word) VALUES (new.id, new.word);
+                     END''')
+        c.execute('''CREATE TRIGGER IF NOT EXISTS suggestions_fts_delete AFTER DELETE ON suggestions BEGIN
+                         INSERT INTO suggestions_fts(suggestions_fts, rowid, word) VALUES ('delete', old.id, old.word);
+                     END''')
+        c.execute('''CREATE TRIGGER IF NOT EXISTS suggestions_fts_update AFTER UPDATE OF word ON suggestions BEGIN
+                         INSERT INTO suggestions_fts(suggestions_fts, rowid, word) VALUES ('delete', old.id, old.word);
+                         INSERT INTO suggestions_fts(rowid, word) VALUES (new.id, new.word);
+                     END''')
+        if not fts_exists:
+            c.execute("INSERT INTO suggestions_fts(suggestions_fts) VALUES ('rebuild')")
+        FTS_ENABLED = True
+    except sqlite3.OperationalError:
+        # SQLite built without FTS5 - search falls back to a prefix range scan on canonical_word
+        FTS_ENABLED = False
+
+    # Backfill cache keys for suggestions created before canonicalization
+    rows = c.execute('SELECT id, word FROM suggestions WHERE canonical_word IS NULL').fetchall()
+    if rows:
+        c.executemany(
+            'UPDATE suggestions SET canonical_word = ? WHERE id = ?',
+            [(canonicalize_word(word) or word.lower(), suggestion_id) for suggestion_id, word in rows]
+        )
+
+    c.execute(f'PRAGMA user_version = {SCHEMA_VERSION}')
     conn.commit()
     conn.close()
 
 init_db()
 
+# SQLite "database is locked" errors seen by this worker (exposed in /api/health for load tests)
+db_lock_errors = {'count': 0}
+db_lock_errors_lock = threading.Lock()
+
+def note_db_error(e):
+    """Count lock timeouts - returns True if this was one"""
+    if 'locked' not in str(e):
+        return False
+    with db_lock_errors_lock:
+        db_lock_errors['count'] += 1
+    return True
+
+@app.errorhandler(sqlite3.OperationalError)
+def handle_db_error(e):
+    if note_db_error(e):
+        return jsonify({'error': 'Database busy, please try again', 'db_locked': True}), 503
+    raise e
+
 # Helper function to detect mode from subdomain
 def get_mode():
     """Detect mode (women/men) from subdomain"""
@@ -307,8 +661,1113 @@ def get_db():
     conn.row_factory = sqlite3.Row
     # Enable WAL mode for better concurrency
     conn.execute('PRAGMA journal_mode=WAL')
+    # Shrink the WAL back to this size after checkpoints instead of keeping its high-water mark
+    conn.execute('PRAGMA journal_size_limit=67108864')
     return conn
 
+# Budget caps in USD (0 disables a cap). As any cap nears, new words get fewer models,
+# and once one is hit new words are refused and only cached words can be played.
+TOTAL_BUDGET_USD = float(os.getenv('TOTAL_BUDGET_USD', 100.0))
+DAILY_BUDGET_USD = float(os.getenv('DAILY_BUDGET_USD', 10.0))
+HOURLY_BUDGET_USD = float(os.getenv('HOURLY_BUDGET_USD', 2.0))
+BUDGET_SOFT_LIMIT = float(os.getenv('BUDGET_SOFT_LIMIT', 0.8))  # fraction of a cap where we start cutting models
+BUDGET_REDUCED_MODEL_COUNT = int(os.getenv('BUDGET_REDUCED_MODEL_COUNT', 4))
+BUDGET_RESYNC_SECONDS = 300  # re-read spend from the DB to pick up other workers' costs
+
+class SpendAccountant:
+    """In-memory spend counter for admission control.
+
+    Seeded from the responses table once, then incremented from call_llm's cost_usd.
+    Spend is kept in per-minute buckets with running hour/day totals, so checking the
+    caps is O(1) and never touches the DB on the request path.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.seed_lock = threading.Lock()
+        self.seeded_at = None
+        self.total = 0.0
+        self.hour_total = 0.0
+        self.day_total = 0.0
+        self.hour_buckets = deque()  # (minute, cost_usd)
+        self.day_buckets = deque()
+        self.recorded_during_seed = None  # (minute, cost_usd) recorded while seed() queries
+
+    def seed(self):
+        """(Re)load spend from the DB - other gunicorn workers' costs only show up here"""
+        with self.lock:
+            self.recorded_during_seed = []
+        try:
+            db = get_db()
+            try:
+                total = db.execute('SELECT SUM(cost_usd) AS total FROM responses').fetchone()['total'] or 0.0
+                rows = db.execute('''
+                    SELECT CAST(strftime('%s', created_at) AS INTEGER) / 60 AS minute, SUM(cost_usd) AS cost
+                    FROM responses
+                    WHERE created_at >= datetime('now', '-1 day') AND cost_usd > 0
+                    GROUP BY minute
+                    ORDER BY minute
+                ''').fetchall()
+            finally:
+                db.close()
+        except BaseException:
+            with self.lock:
+                self.recorded_during_seed = None
+            raise
+
+        with self.lock:
+            self.total = total
+            self.day_buckets = deque((row['minute'], row['cost']) for row in rows)
+            self.day_total = sum(cost for _, cost in self.day_buckets)
+            hour_start = int(time.time() // 60) - 60
+            self.hour_buckets = deque((m, cost) for m, cost in self.day_buckets if m > hour_start)
+            self.hour_total = sum(cost for _, cost in self.hour_buckets)
+            # Costs recorded while the query ran may be missing from it, so apply them again. One whose
+            # row was saved before the query counts twice until the next resync - erring toward the caps.
+            for minute, cost_usd in self.recorded_during_seed:
+                self._add(minute, cost_usd)
+            self.recorded_during_seed = None
+            self.seeded_at = time.time()
+
+    def _ensure_seeded(self):
+        if self.seeded_at is None:
+            with self.seed_lock:
+                if self.seeded_at is None:
+                    self.seed()
+
+    def _expire(self, minute):
+        """Drop buckets that have slid out of the hour/day windows (caller holds the lock)"""
+        while self.hour_buckets and self.hour_buckets[0][0] <= minute - 60:
+            self.hour_total -= self.hour_buckets.popleft()[1]
+        while self.day_buckets and self.day_buckets[0][0] <= minute - 1440:
+            self.day_total -= self.day_buckets.popleft()[1]
+
+    def _add(self, minute, cost_usd):
+        """Count one cost in the totals and its minute's buckets (caller holds the lock)"""
+        self._expire(minute)
+        self.total += cost_usd
+        self.hour_total += cost_usd
+        self.day_total += cost_usd
+        for buckets in (self.hour_buckets, self.day_buckets):
+            if buckets and buckets[-1][0] == minute:
+                buckets[-1] = (minute, buckets[-1][1] + cost_usd)
+            else:
+                buckets.append((minute, cost_usd))
+
+    def record(self, cost_usd):
+        """Add the cost of one LLM call (called from the background LLM threads)"""
+        self._ensure_seeded()
+        with self.lock:
+            # Claim the resync so only this thread runs the query, not every call finishing meanwhile
+            resync = time.time() - self.seeded_at > BUDGET_RESYNC_SECONDS
+            if resync:
+                self.seeded_at = time.time()
+        if resync:
+            try:
+                self.seed()
+            except sqlite3.Error as e:
+                print(f"Warning: could not resync spend: {e}")
+        if not cost_usd:
+            return
+
+        minute = int(time.time() // 60)
+        with self.lock:
+            self._add(minute, cost_usd)
+            if self.recorded_during_seed is not None:
+                self.recorded_during_seed.append((minute, cost_usd))
+
+    def usage(self):
+        """Fraction of each cap used so far"""
+        self._ensure_seeded()
+        with self.lock:
+            self._expire(int(time.time() // 60))
+            spent = {'total': self.total, 'daily': self.day_total, 'hourly': self.hour_total}
+        caps = {'total': TOTAL_BUDGET_USD, 'daily': DAILY_BUDGET_USD, 'hourly': HOURLY_BUDGET_USD}
+        return {name: spent[name] / cap for name, cap in caps.items() if cap > 0}
+
+    def tier(self):
+        """'normal', 'reduced' (fewer models per new word) or 'cached_only'"""
+        used = max(self.usage().values(), default=0.0)
+        if used >= 1.0:
+            return 'cached_only'
+        if used >= BUDGET_SOFT_LIMIT:
+            return 'reduced'
+        return 'normal'
+
+    def snapshot(self):
+        """Current spend per window, for /api/costs"""
+        used = self.usage()
+        tier = self.tier()
+        with self.lock:
+            return {
+                'tier': tier,
+                'spent_total_usd': self.total,
+                'spent_last_day_usd': self.day_total,
+                'spent_last_hour_usd': self.hour_total,
+                'total_cap_usd': TOTAL_BUDGET_USD,
+                'daily_cap_usd': DAILY_BUDGET_USD,
+                'hourly_cap_usd': HOURLY_BUDGET_USD,
+                'fraction_used': used
+            }
+
+spend = SpendAccountant()
+
+# Overload detection - past any of these, new words get a cached game instead of a spinner
+OVERLOAD_MAX_IN_FLIGHT = int(os.getenv('OVERLOAD_MAX_IN_FLIGHT', 66))  # LLM calls queued or running in this worker
+OVERLOAD_ERROR_RATE = float(os.getenv('OVERLOAD_ERROR_RATE', 0.5))
+OVERLOAD_LATENCY_SLO = float(os.getenv('OVERLOAD_LATENCY_SLO', 10.0))  # p90 seconds
+OVERLOAD_WINDOW_SECONDS = 120
+OVERLOAD_MIN_SAMPLES = 10
+DEFERRED_DRAIN_INTERVAL = int(os.getenv('DEFERRED_DRAIN_INTERVAL', 30))
+DEFERRED_CLAIM_LEASE = 300  # seconds before a claimed word whose drain died is retried
+
+class LLMHealth:
+    """Rolling view of upstream LLM health: in-flight calls, error rate and p90 latency"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.in_flight = 0
+        self.recent = deque(maxlen=500)  # (finished_at, success, response_time)
+
+    def call_started(self):
+        with self.lock:
+            self.in_flight += 1
+
+    def call_finished(self):
+        with self.lock:
+            self.in_flight -= 1
+
+    def record(self, success, response_time):
+        with self.lock:
+            self.recent.append((time.time(), success, response_time))
+
+    def stats(self):
+        # Old samples age out, so we recover on our own once an incident is over
+        cutoff = time.time() - OVERLOAD_WINDOW_SECONDS
+        with self.lock:
+            while self.recent and self.recent[0][0] < cutoff:
+                self.recent.popleft()
+            samples = list(self.recent)
+            in_flight = self.in_flight
+
+        errors = sum(1 for _, success, _ in samples if not success)
+        latencies = sorted(rt for _, success, rt in samples if success)
+        return {
+            'in_flight': in_flight,
+            'samples': len(samples),
+            'error_rate': errors / len(samples) if samples else 0.0,
+            'p90_response_time': latencies[int(0.9 * (len(latencies) - 1))] if latencies else None
+        }
+
+    def overload_reason(self):
+        """Why new words should be deferred right now, or None if upstream is healthy"""
+        stats = self.stats()
+        if stats['in_flight'] >= OVERLOAD_MAX_IN_FLIGHT:
+            return 'queue_depth'
+        if stats['samples'] >= OVERLOAD_MIN_SAMPLES:
+            if stats['error_rate'] >= OVERLOAD_ERROR_RATE:
+                return 'error_rate'
+            if stats['p90_response_time'] is not None and stats['p90_response_time'] > OVERLOAD_LATENCY_SLO:
+                return 'latency'
+        return None
+
+llm_health = LLMHealth()
+
+# LLM calls run on a fixed pool of threads per worker, fed from priority lanes. Interactive work
+# (a player waiting on a new word) always goes first and has threads background work (deferred
+# words) can't take, so it starts right away even when the background lane is busy. Within a lane
+# clients are served by weighted fair queuing, so one heavy client can't starve the others.
+LLM_WORKERS = int(os.getenv('LLM_WORKERS', 64))  # LLM calls running at once in this worker
+LLM_INTERACTIVE_RESERVE = int(os.getenv('LLM_INTERACTIVE_RESERVE', 16))  # threads background work never takes
+LLM_LANES = ('interactive', 'background')  # highest priority first
+# Reverse proxies in front of the app that append to X-Forwarded-For - 1 for the platform load balancer the
+# Procfile deploys behind. Set 0 when gunicorn faces clients directly, so the socket address identifies them
+# for fair queuing (requests without the header fall back to it either way).
+TRUSTED_PROXY_HOPS = int(os.getenv('TRUSTED_PROXY_HOPS', 1))
+
+class LLMScheduler:
+    """Priority lanes with per-client start-time fair queuing in front of a fixed thread pool.
+
+    Each job is tagged with where its client's previous job ends in the lane's virtual time (or
+    the current virtual time, for an idle client) and the lowest tag runs next. A client that
+    queues 50 calls gets tags 1..50, while one that arrives later starts at the current tag.
+    """
+
+    def __init__(self, workers=LLM_WORKERS, interactive_reserve=LLM_INTERACTIVE_RESERVE):
+        self.workers = workers
+        self.limits = {'interactive': workers, 'background': max(1, workers - interactive_reserve)}
+        self.cond = threading.Condition()
+        self.pid = None
+        self.seq = 0
+        self.lanes = {}
+
+    def ensure_started(self):
+        """Start the pool lazily, once per process (threads don't survive gunicorn's fork)"""
+        if self.pid == os.getpid():
+            return
+        with self.cond:
+            if self.pid == os.getpid():
+                return
+            self.pid = os.getpid()
+            self.lanes = {lane: {
+                'heap': [],  # (start tag, seq, client, queued_at, fn, args)
+                'virtual_time': 0.0,
+                'finish_tags': {},  # client -> tag where its queued work ends
+                'queued_by_client': {},
+                'running': 0,
+                'completed': 0,
+                'waits': deque(maxlen=500)  # seconds from submit to start
+            } for lane in LLM_LANES}
+            for _ in range(self.workers):
+                threading.Thread(target=self.run, daemon=True).start()
+
+    def submit(self, fn, *args, lane='interactive', client=None, weight=1.0):
+        """Queue fn(*args) in a lane on behalf of a client (IP); a higher weight gets a bigger share"""
+        self.ensure_started()
+        with self.cond:
+            state = self.lanes[lane]
+            start = max(state['virtual_time'], state['finish_tags'].get(client, 0.0))
+            state['finish_tags'][client] = start + 1.0 / weight
+            state['queued_by_client'][client] = state['queued_by_client'].get(client, 0) + 1
+            self.seq += 1
+            heapq.heappush(state['heap'], (start, self.seq, client, time.time(), fn, args))
+            self.cond.notify()
+        # Queued calls count as in flight - overload detection sees the backlog, not just the pool
+        llm_health.call_started()
+
+    def next_job(self):
+        """Pop the next job from the highest-priority lane that may start one (lock held)"""
+        for lane in LLM_LANES:
+            state = self.lanes[lane]
+            if not state['heap'] or state['running'] >= self.limits[lane]:
+                continue
+            start, _, client, queued_at, fn, args = heapq.heappop(state['heap'])
+            state['virtual_time'] = max(state['virtual_time'], start)
+            state['queued_by_client'][client] -= 1
+            if not state['queued_by_client'][client]:
+                # Idle clients are forgotten; their next job starts at the current virtual time
+                del state['queued_by_client'][client]
+                del state['finish_tags'][client]
+            state['running'] += 1
+            state['waits'].append(time.time() - queued_at)
+            return lane, fn, args
+        return None
+
+    def run(self):
+        while True:
+            with self.cond:
+                job = self.next_job()
+                while job is None:
+                    self.cond.wait()
+                    job = self.next_job()
+            lane, fn, args = job
+            try:
+                fn(*args)
+            except Exception as e:
+                print(f"Warning: {lane} LLM job failed: {e}")
+            finally:
+                llm_health.call_finished()
+                with self.cond:
+                    self.lanes[lane]['running'] -= 1
+                    self.lanes[lane]['completed'] += 1
+                    self.cond.notify()  # background work may have been waiting for this slot
+
+    def stats(self):
+        with self.cond:
+            lanes = {lane: (len(state['heap']), state['running'], state['completed'],
+                            len(state['queued_by_client']), sorted(state['waits']))
+                     for lane, state in self.lanes.items()}
+        return {lane: {
+            'queued': queued,
+            'running': running,
+            'completed': completed,
+            'waiting_clients': clients,
+            'wait_p50': round(percentile(waits, 0.5), 3) if waits else None,
+            'wait_p90': round(percentile(waits, 0.9), 3) if waits else None,
+            'wait_max': round(waits[-1], 3) if waits else None
+        } for lane, (queued, running, completed, clients, waits) in lanes.items()}
+
+llm_scheduler = LLMScheduler()
+
+class DeferredWords:
+    """Words requested while degraded - generated in the background once upstream recovers"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.thread = None
+        self.pid = None
+
+    def ensure_started(self):
+        """Start the drain thread lazily, once per process (threads don't survive gunicorn's fork)"""
+        if self.pid == os.getpid() and self.thread and self.thread.is_alive():
+            return
+        with self.lock:
+            if self.pid == os.getpid() and self.thread and self.thread.is_alive():
+                return
+            self.pid = os.getpid()
+            self.thread = threading.Thread(target=self.run, daemon=True)
+            self.thread.start()
+
+    def enqueue(self, db, word, canonical_word, mode):
+        db.execute(
+            'INSERT OR IGNORE INTO deferred_suggestions (word, canonical_word, mode) VALUES (?, ?, ?)',
+            (word, canonical_word, mode)
+        )
+        db.commit()
+
+    def drain_one(self):
+        """Start generating the oldest deferred word if upstream and budget allow. Returns True if one was taken"""
+        if llm_health.overload_reason():
+            return False
+        models = pick_models_for_budget()
+        if models is None:
+            return False
+
+        db = get_db()
+        try:
+            # Claim the oldest word with a lease - other workers drain the same queue. It is only
+            # deleted once its suggestion exists, so a failure in between leaves it for a retry.
+            now = time.time()
+            row = db.execute(
+                '''UPDATE deferred_suggestions SET claimed_until = ?
+                   WHERE id = (SELECT id FROM deferred_suggestions
+                               WHERE claimed_until IS NULL OR claimed_until < ?
+                               ORDER BY id LIMIT 1)
+                   RETURNING *''',
+                (now + DEFERRED_CLAIM_LEASE, now)
+            ).fetchone()
+            db.commit()
+            if not row:
+                return False
+
+            # Someone may have played it for real in the meantime
+            existing = db.execute(
+                'SELECT 1 FROM suggestions WHERE canonical_word = ? AND mode = ?',
+                (row['canonical_word'], row['mode'])
+            ).fetchone()
+            created = None
+            if not existing:
+                created = create_pending_suggestion(
+                    db, row['word'], row['canonical_word'], row['mode'], models, play_count=0
+                )
+            db.execute('DELETE FROM deferred_suggestions WHERE id = ?', (row['id'],))
+            db.commit()
+            if created is None:
+                return True
+            _, response_map = created
+        finally:
+            db.close()
+
+        launch_generation(models, row['word'], response_map, row['mode'], lane='background', client='deferred')
+        return True
+
+    def run(self):
+        while True:
+            time.sleep(DEFERRED_DRAIN_INTERVAL)
+            try:
+                self.drain_one()
+            except Exception as e:
+                print(f"Warning: deferred word drain failed: {e}")
+
+deferred_words = DeferredWords()
+
+# Retention for unvoted games. Every page view creates a game, but only voted ones feed the
+# leaderboard, so old unvoted games are folded into per-day appearance counts and deleted.
+UNVOTED_GAME_RETENTION_DAYS = float(os.getenv('UNVOTED_GAME_RETENTION_DAYS', 7))
+MAINTENANCE_INTERVAL = float(os.getenv('MAINTENANCE_INTERVAL', 3600))  # 0 turns the background job off
+MAINTENANCE_BATCH_SIZE = 500  # games per delete transaction
+MAINTENANCE_BATCH_PAUSE = 0.05  # seconds between batches, so request writes get the lock
+MAINTENANCE_VACUUM_PAGES = 2000  # pages freed per incremental vacuum step
+
+def claim_job(db, job, interval):
+    """Take a periodic job's run if no worker has started one within the interval"""
+    now = time.time()
+    db.execute('INSERT OR IGNORE INTO maintenance_runs (job) VALUES (?)', (job,))
+    claimed = db.execute(
+        """UPDATE maintenance_runs SET started_at = ?
+           WHERE job = ? AND (started_at IS NULL OR started_at < ?)""",
+        (now, job, now - interval)
+    ).rowcount
+    db.commit()
+    return bool(claimed)
+
+class Maintenance:
+    """Periodic prune/rollup of unvoted games, incremental vacuum and WAL truncation"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.thread = None
+        self.pid = None
+
+    def ensure_started(self):
+        """Start the maintenance thread lazily, once per process"""
+        if not MAINTENANCE_INTERVAL:
+            return
+        if self.pid == os.getpid() and self.thread and self.thread.is_alive():
+            return
+        with self.lock:
+            if self.pid == os.getpid() and self.thread and self.thread.is_alive():
+                return
+            self.pid = os.getpid()
+            self.thread = threading.Thread(target=self.run, daemon=True)
+            self.thread.start()
+
+    def prune_batch(self, db):
+        """Roll up and delete one batch of old unvoted games. Returns the number deleted"""
+        db.execute('BEGIN IMMEDIATE')  # no vote can land between picking the games and deleting them
+        try:
+            game_ids = [row['id'] for row in db.execute(
+                """SELECT id FROM games
+                   WHERE voter_session IS NULL AND created_at < datetime('now', ?)
+                   ORDER BY created_at
+                   LIMIT ?""",
+                (f"-{UNVOTED_GAME_RETENTION_DAYS} days", MAINTENANCE_BATCH_SIZE)
+            )]
+            if not game_ids:
+                db.rollback()
+                return 0
+
+            placeholders = ','.join('?' * len(game_ids))
+            db.execute(f"""
+                INSERT INTO game_appearance_rollups (day, mode, model_name, model_id, appearances)
+                SELECT DATE(g.created_at), COALESCE(g.mode, 'women'), r.model_name, r.model_id, COUNT(*)
+                FROM games g
+                JOIN game_contestants gc ON gc.game_id = g.id
+                JOIN responses r ON r.id = gc.response_id
+                WHERE g.id IN ({placeholders})
+                GROUP BY 1, 2, 3, 4
+                ON CONFLICT (day, mode, model_name, model_id)
+                DO UPDATE SET appearances = appearances + excluded.appearances
+            """, game_ids)
+            db.execute(f'DELETE FROM game_contestants WHERE game_id IN ({placeholders})', game_ids)
+            db.execute(f'DELETE FROM games WHERE id IN ({placeholders})', game_ids)
+            db.commit()
+            return len(game_ids)
+        except Exception:
+            db.rollback()
+            raise
+
+    def compact(self, db):
+        """Return free pages to the filesystem and truncate the WAL"""
+        freed = 0
+        if db.execute('PRAGMA auto_vacuum').fetchone()[0] == 2:  # INCREMENTAL
+            while True:
+                free_pages = db.execute('PRAGMA freelist_count').fetchone()[0]
+                if not free_pages:
+                    break
+                # executescript steps the pragma to completion; execute() would free a single page
+                db.executescript(f'PRAGMA incremental_vacuum({MAINTENANCE_VACUUM_PAGES});')
+                freed += min(free_pages, MAINTENANCE_VACUUM_PAGES)
+                time.sleep(MAINTENANCE_BATCH_PAUSE)
+
+        busy, _, _ = db.execute('PRAGMA wal_checkpoint(TRUNCATE)').fetchone()
+        return {'pages_freed': freed, 'wal_truncated': not busy}
+
+    def run_once(self, force=False):
+        """One full pass. Returns the result, or None if another worker has the run"""
+        db = get_db()
+        try:
+            if not force and not claim_job(db, 'games', MAINTENANCE_INTERVAL):
+                return None
+
+            started = time.time()
+            pruned = 0
+            while True:
+                deleted = self.prune_batch(db)
+                pruned += deleted
+                if deleted < MAINTENANCE_BATCH_SIZE:
+                    break
+                time.sleep(MAINTENANCE_BATCH_PAUSE)
+
+            result = {'games_pruned': pruned, **self.compact(db), 'seconds': round(time.time() - started, 2)}
+            db.execute(
+                "UPDATE maintenance_runs SET finished_at = ?, result = ? WHERE job = 'games'",
+                (time.time(), json.dumps(result))
+            )
+            db.commit()
+            return result
+        finally:
+            db.close()
+
+    def last_run(self, db):
+        row = db.execute("SELECT finished_at, result FROM maintenance_runs WHERE job = 'games'").fetchone()
+        if not row or not row['result']:
+            return None
+        return {'finished_at': row['finished_at'], **json.loads(row['result'])}
+
+    def run(self):
+        while True:
+            try:
+                result = self.run_once()
+                if result and result['games_pruned']:
+                    print(f"Maintenance: {result}")
+            except Exception as e:
+                print(f"Warning: maintenance failed: {e}")
+            time.sleep(MAINTENANCE_INTERVAL)
+
+maintenance = Maintenance()
+
+# Stats and cost aggregates read from a periodic copy of the database (taken with SQLite's
+# online backup API), so long scans never hold up checkpoints on the live file.
+ANALYTICS_DB_PATH = os.getenv('ANALYTICS_DB_PATH', '{0}.analytics{1}'.format(*os.path.splitext(DB_PATH)))
+ANALYTICS_SNAPSHOT_INTERVAL = float(os.getenv('ANALYTICS_SNAPSHOT_INTERVAL', 300))  # 0 reads the live DB
+
+class AnalyticsSnapshot:
+    """Read-only analytics copy of the live DB, refreshed by whichever worker claims the run"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.thread = None
+        self.pid = None
+
+    def ensure_started(self):
+        """Start the refresh thread lazily, once per process"""
+        if not ANALYTICS_SNAPSHOT_INTERVAL:
+            return
+        if self.pid == os.getpid() and self.thread and self.thread.is_alive():
+            return
+        with self.lock:
+            if self.pid == os.getpid() and self.thread and self.thread.is_alive():
+                return
+            self.pid = os.getpid()
+            self.thread = threading.Thread(target=self.run, daemon=True)
+            self.thread.start()
+
+    def taken_at(self):
+        """When the current snapshot was taken (file mtime, shared by all workers), or None"""
+        try:
+            return os.path.getmtime(ANALYTICS_DB_PATH)
+        except OSError:
+            return None
+
+    def refresh(self):
+        """Copy the live DB into a temp file and swap it in atomically"""
+        tmp_path = f"{ANALYTICS_DB_PATH}.{os.getpid()}.tmp"
+        source = sqlite3.connect(DB_PATH, timeout=10.0)
+        target = sqlite3.connect(tmp_path)
+        try:
+            source.backup(target)  # one step - a WAL reader, so writers carry on
+            target.execute('PRAGMA journal_mode=DELETE')  # opened read-only, so no WAL/shm files
+            # Indexes only the aggregates need, kept off the live write path
+            target.execute('CREATE INDEX IF NOT EXISTS idx_games_winner ON games(winning_response_id)')
+            target.execute('CREATE INDEX IF NOT EXISTS idx_game_contestants_response ON game_contestants(response_id)')
+            target.commit()
+        finally:
+            target.close()
+            source.close()
+        os.replace(tmp_path, ANALYTICS_DB_PATH)
+
+    def run(self):
+        while True:
+            try:
+                taken_at = self.taken_at()
+                if taken_at is None or time.time() - taken_at >= ANALYTICS_SNAPSHOT_INTERVAL:
+                    db = get_db()
+                    try:
+                        claimed = claim_job(db, 'analytics_snapshot', ANALYTICS_SNAPSHOT_INTERVAL / 2)
+                    finally:
+                        db.close()
+                    if claimed:
+                        self.refresh()
+            except Exception as e:
+                print(f"Warning: analytics snapshot failed: {e}")
+            time.sleep(min(ANALYTICS_SNAPSHOT_INTERVAL / 4, 30))
+
+    def status(self):
+        taken_at = self.taken_at() if ANALYTICS_SNAPSHOT_INTERVAL else None
+        return {
+            'data_as_of': taken_at,
+            'staleness_seconds': round(time.time() - taken_at, 1) if taken_at else 0.0,
+            'source': 'snapshot' if taken_at else 'live'
+        }
+
+analytics_snapshot = AnalyticsSnapshot()
+
+def get_analytics_db():
+    """Connection for aggregate reads - the snapshot if there is one, else the live DB"""
+    analytics_snapshot.ensure_started()
+    if ANALYTICS_SNAPSHOT_INTERVAL and analytics_snapshot.taken_at() is not None:
+        try:
+            conn = sqlite3.connect(f"file:{ANALYTICS_DB_PATH}?mode=ro", uri=True)
+            conn.row_factory = sqlite3.Row
+            return conn
+        except sqlite3.OperationalError:
+            pass
+    return get_db()
+
+# Ratings. A vote picks one winner out of a 4-way lineup, i.e. a Plackett-Luce top-1 choice:
+# P(i wins | lineup S) = w_i / sum(w_j for j in S). Elo gives an instant estimate after each vote;
+# the batch refit finds the maximum-likelihood strengths over all voted games, with Wald CIs.
+RATING_BASE = 1500.0
+RATING_SCALE = 400.0  # Elo convention: 400 points = 10x the odds
+ELO_K = 24.0
+RATINGS_REFIT_INTERVAL = float(os.getenv('RATINGS_REFIT_INTERVAL', 600))
+RATINGS_PRIOR_GAMES = 1.0  # virtual win and loss against a 1500 player per model, keeps 0-win models finite
+RATINGS_MAX_ITERATIONS = 1000
+RATINGS_TOLERANCE = 1e-7
+
+def update_vote_rollups(db, game_id, winning_response_id, previous_winner_id=None, first_vote=True):
+    """Fold a vote into vote_rollups: the lineup's appearances on the first vote, then the win moves with re-votes"""
+    lineup = db.execute(
+        '''SELECT gc.response_id, COALESCE(gc.display_position, -1) AS display_position, r.model_name,
+                  COALESCE(g.mode, 'women') AS mode, strftime('%Y-%m-%d %H:00:00', g.created_at) AS hour
+           FROM game_contestants gc
+           JOIN responses r ON r.id = gc.response_id
+           JOIN games g ON g.id = gc.game_id
+           WHERE gc.game_id = ?''',
+        (game_id,)
+    ).fetchall()
+
+    changes = []
+    for row in lineup:
+        appearances = 1 if first_vote else 0
+        wins = int(row['response_id'] == winning_response_id)
+        if not first_vote and row['response_id'] == previous_winner_id:
+            wins -= 1
+        if appearances or wins:
+            changes.append((row['hour'], row['mode'], row['model_name'], row['display_position'], appearances, wins))
+
+    db.executemany(
+        '''INSERT INTO vote_rollups (hour, mode, model_name, display_position, appearances, wins)
+           VALUES (?, ?, ?, ?, ?, ?)
+           ON CONFLICT (hour, mode, model_name, display_position)
+           DO UPDATE SET appearances = appearances + excluded.appearances, wins = wins + excluded.wins''',
+        changes
+    )
+
+def elo_update(db, game_id, winning_response_id):
+    """Apply one vote to the Elo table: the winner beats each other contestant, K split across them"""
+    lineup = db.execute(
+        '''SELECT r.id, r.model_name FROM game_contestants gc
+           JOIN responses r ON r.id = gc.response_id
+           WHERE gc.game_id = ?''',
+        (game_id,)
+    ).fetchall()
+    winners = {row['model_name'] for row in lineup if row['id'] == winning_response_id}
+    losers = {row['model_name'] for row in lineup} - winners
+    if not winners or not losers:
+        return
+
+    names = list(winners | losers)
+    db.executemany('INSERT OR IGNORE INTO model_ratings (model_name) VALUES (?)', [(name,) for name in names])
+    current = {row['model_name']: row['elo'] for row in db.execute(
+        f"SELECT model_name, elo FROM model_ratings WHERE model_name IN ({','.join('?' * len(names))})", names
+    )}
+
+    deltas = dict.fromkeys(names, 0.0)
+    k = ELO_K / len(losers)
+    for winner in winners:
+        for loser in losers:
+            expected = 1 / (1 + 10 ** ((current[loser] - current[winner]) / RATING_SCALE))
+            deltas[winner] += k * (1 - expected)
+            deltas[loser] -= k * (1 - expected)
+
+    db.executemany(
+        'UPDATE model_ratings SET elo = elo + ?, elo_games = elo_games + 1 WHERE model_name = ?',
+        [(delta, name) for name, delta in deltas.items()]
+    )
+
+def fit_luce(lineups, winners, n_models):
+    """Maximum-likelihood Luce-choice strengths by MM iteration (Hunter 2004), fully vectorized.
+
+    lineups: (games, k) int array of model indices, padded with n_models for short lineups.
+    winners: (games,) model index of each game's winner.
+    Returns (log strengths, standard errors), centered so the average model is 0.
+    """
+    import numpy as np  # only the refit thread needs it - kept off the startup path
+    pad = n_models
+    size = n_models + 1
+    wins = np.bincount(winners, minlength=n_models).astype(float) + RATINGS_PRIOR_GAMES
+    w = np.ones(size)
+    w[pad] = 0.0
+
+    for _ in range(RATINGS_MAX_ITERATIONS):
+        inverse_totals = 1.0 / w[lineups].sum(axis=1)
+        exposure = np.bincount(lineups.ravel(), weights=np.repeat(inverse_totals, lineups.shape[1]),
+                               minlength=size)[:n_models]
+        exposure += 2 * RATINGS_PRIOR_GAMES / (w[:n_models] + 1.0)  # the virtual games
+        updated = wins / exposure
+        # The common scale drifts slowly (only the prior pins it); the differences are what matter
+        change = np.log(updated) - np.log(w[:n_models])
+        converged = np.max(np.abs(change - change.mean())) < RATINGS_TOLERANCE
+        w[:n_models] = updated
+        if converged:
+            break
+
+    # Fisher information of the log strengths: sum over games of diag(p) - p p^T
+    p = w[lineups] / w[lineups].sum(axis=1, keepdims=True)
+    information = np.diag(np.bincount(lineups.ravel(), weights=p.ravel(), minlength=size))
+    for a in range(lineups.shape[1]):
+        for b in range(lineups.shape[1]):
+            information -= np.bincount(lineups[:, a] * size + lineups[:, b], weights=p[:, a] * p[:, b],
+                                       minlength=size * size).reshape(size, size)
+    information = information[:n_models, :n_models]
+    p_virtual = w[:n_models] / (w[:n_models] + 1.0)
+    information[np.diag_indices(n_models)] += 2 * RATINGS_PRIOR_GAMES * p_virtual * (1 - p_virtual)
+
+    # Only differences are identified, so report strengths relative to the average model
+    centering = np.eye(n_models) - 1.0 / n_models
+    covariance = centering @ np.linalg.inv(information) @ centering
+    log_strengths = np.log(w[:n_models])
+    return log_strengths - log_strengths.mean(), np.sqrt(np.diag(covariance))
+
+def load_voted_games(db):
+    """Voted lineups as arrays for fit_luce. Returns (model names, lineups, winners)"""
+    import numpy as np
+    rows = db.execute('''
+        SELECT g.rowid, r.model_name, gc.response_id = g.winning_response_id
+        FROM games g
+        JOIN game_contestants gc ON gc.game_id = g.id
+        JOIN responses r ON r.id = gc.response_id
+        WHERE g.winning_response_id IS NOT NULL
+        ORDER BY g.rowid
+    ''').fetchall()
+    if not rows:
+        return [], None, None
+
+    game_keys, names, won = zip(*rows)
+    model_names = sorted(set(names))
+    index = {name: i for i, name in enumerate(model_names)}
+    models = np.fromiter((index[name] for name in names), dtype=np.int64, count=len(names))
+    won = np.array(won, dtype=bool)
+
+    # Rows arrive grouped by game; number the games and each row's slot in its lineup
+    game_keys = np.array(game_keys)
+    new_game = np.empty(len(game_keys), dtype=bool)
+    new_game[0] = True
+    new_game[1:] = game_keys[1:] != game_keys[:-1]
+    game_of_row = np.cumsum(new_game) - 1
+    starts = np.flatnonzero(new_game)
+    slot = np.arange(len(game_keys)) - starts[game_of_row]
+
+    lineups = np.full((len(starts), slot.max() + 1), len(model_names), dtype=np.int64)
+    lineups[game_of_row, slot] = models
+    winners = np.full(len(starts), -1, dtype=np.int64)
+    winners[game_of_row[won]] = models[won]
+
+    # Skip games whose winning response isn't in the lineup (legacy rows)
+    valid = winners >= 0
+    return model_names, lineups[valid], winners[valid]
+
+def replay_elo(lineups, winners, n_models):
+    """Elo over a game history in order, same update as elo_update()"""
+    elo = [RATING_BASE] * n_models
+    for lineup, winner in zip(lineups.tolist(), winners.tolist()):
+        losers = [m for m in lineup if m != winner and m != n_models]
+        if not losers:
+            continue
+        k = ELO_K / len(losers)
+        winner_elo = elo[winner]
+        for loser in losers:
+            delta = k * (1 - 1 / (1 + 10 ** ((elo[loser] - winner_elo) / RATING_SCALE)))
+            elo[winner] += delta
+            elo[loser] -= delta
+    return elo
+
+class Ratings:
+    """Periodic batch refit of the Luce-choice ratings, run by whichever worker claims it"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.thread = None
+        self.pid = None
+
+    def ensure_started(self):
+        """Start the refit thread lazily, once per process"""
+        if not RATINGS_REFIT_INTERVAL:
+            return
+        if self.pid == os.getpid() and self.thread and self.thread.is_alive():
+            return
+        with self.lock:
+            if self.pid == os.getpid() and self.thread and self.thread.is_alive():
+                return
+            self.pid = os.getpid()
+            self.thread = threading.Thread(target=self.run, daemon=True)
+            self.thread.start()
+
+    def refit(self):
+        """Fit on the analytics snapshot and store the ratings in the live DB. Returns the games used"""
+        import numpy as np
+        source = get_analytics_db()
+        try:
+            model_names, lineups, winners = load_voted_games(source)
+        finally:
+            source.close()
+        if not model_names:
+            return 0
+
+        log_strengths, standard_errors = fit_luce(lineups, winners, len(model_names))
+        to_points = RATING_SCALE / np.log(10)
+        appearances = np.bincount(lineups.ravel(), minlength=len(model_names) + 1)[:len(model_names)]
+        now = time.time()
+
+        db = get_db()
+        try:
+            db.execute('BEGIN IMMEDIATE')
+            elo_rows = []
+            if not db.execute('SELECT 1 FROM model_ratings WHERE refit_at IS NOT NULL LIMIT 1').fetchone():
+                # Votes from before ratings existed. Replayed from the live DB under the write lock -
+                # the snapshot can be minutes old, and overwriting with it would drop the online
+                # updates of every vote since. Replaces those updates, which the history includes.
+                live_names, live_lineups, live_winners = load_voted_games(db)
+                if live_names:
+                    elo = replay_elo(live_lineups, live_winners, len(live_names))
+                    live_appearances = np.bincount(live_lineups.ravel(), minlength=len(live_names) + 1)
+                    elo_rows = [(float(value), int(count), name)
+                                for name, value, count in zip(live_names, elo, live_appearances)]
+
+            db.executemany('INSERT OR IGNORE INTO model_ratings (model_name) VALUES (?)',
+                           [(name,) for name in model_names] + [(name,) for _, _, name in elo_rows])
+            db.executemany(
+                '''UPDATE model_ratings
+                   SET rating = ?, rating_ci_low = ?, rating_ci_high = ?, rated_games = ?, refit_at = ?
+                   WHERE model_name = ?''',
+                [(float(RATING_BASE + to_points * theta),
+                  float(RATING_BASE + to_points * (theta - 1.96 * se)),
+                  float(RATING_BASE + to_points * (theta + 1.96 * se)),
+                  int(count), now, name)
+                 for name, theta, se, count in zip(model_names, log_strengths, standard_errors, appearances)]
+            )
+            db.executemany('UPDATE model_ratings SET elo = ?, elo_games = ? WHERE model_name = ?', elo_rows)
+            db.commit()
+        except BaseException:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+        return len(winners)
+
+    def run(self):
+        while True:
+            try:
+                db = get_db()
+                try:
+                    claimed = claim_job(db, 'ratings', RATINGS_REFIT_INTERVAL)
+                finally:
+                    db.close()
+                if claimed:
+                    self.refit()
+            except Exception as e:
+                print(f"Warning: ratings refit failed: {e}")
+            time.sleep(RATINGS_REFIT_INTERVAL)
+
+ratings = Ratings()
+
+# Contestant selection. Votes teach the most about models whose rating is least certain, and
+# about lineups of similar strength (a lopsided 4-way tells us what we already know).
+MATCHMAKING_REFRESH_SECONDS = 60
+MATCHMAKING_EXPLORATION = 0.1  # share of picks made uniformly, so every pairing keeps getting played
+MATCHMAKING_PRIOR_SE = 200.0  # rating points, for models the refit hasn't seen
+MATCHMAKING_BALANCE_WIDTH = 150.0  # rating gap (points) at which a pairing counts as lopsided
+MATCHMAKING_VOTE_RATE = 0.35  # rough share of games that get voted on
+
+class Matchmaker:
+    """Active sampling of game lineups from an in-memory view of model_ratings"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.models = {}  # model_name -> {'rating', 'se', 'games', 'picks'}
+        self.refreshed_at = None
+
+    def refresh(self):
+        db = get_db()
+        rows = db.execute(
+            'SELECT model_name, elo, rating, rating_ci_low, rating_ci_high, rated_games FROM model_ratings'
+        ).fetchall()
+        db.close()
+
+        models = {}
+        for row in rows:
+            if row['rating'] is not None:
+                se = (row['rating_ci_high'] - row['rating_ci_low']) / (2 * 1.96)
+                models[row['model_name']] = {'rating': row['rating'], 'se': se, 'games': row['rated_games'], 'picks': 0}
+            else:
+                models[row['model_name']] = {'rating': row['elo'], 'se': MATCHMAKING_PRIOR_SE, 'games': 0, 'picks': 0}
+
+        with self.lock:
+            self.models = models
+            self.refreshed_at = time.time()
+
+    def view(self, name):
+        """Rating and current uncertainty; lineups picked since the refresh shrink it like votes would"""
+        model = self.models.get(name)
+        if model is None:
+            return RATING_BASE, MATCHMAKING_PRIOR_SE
+        se = model['se']
+        if model['games']:
+            se *= math.sqrt(model['games'] / (model['games'] + model['picks'] * MATCHMAKING_VOTE_RATE))
+        return model['rating'], se
+
+    def pick(self, candidates, name_of, count=4):
+        """Choose up to `count` candidates, in random display order. O(candidates * count)"""
+        if len(candidates) <= count:
+            chosen = list(candidates)
+            random.shuffle(chosen)
+            return chosen
+
+        if self.refreshed_at is None or time.time() - self.refreshed_at > MATCHMAKING_REFRESH_SECONDS:
+            self.refreshed_at = time.time()
+            try:
+                self.refresh()
+            except sqlite3.Error as e:
+                print(f"Warning: could not refresh matchmaking ratings: {e}")
+
+        with self.lock:
+            views = [self.view(name_of(c)) for c in candidates]
+            remaining = list(range(len(candidates)))
+            chosen = []
+            while len(chosen) < count:
+                if random.random() < MATCHMAKING_EXPLORATION:
+                    index = random.choice(remaining)
+                else:
+                    # Weight by uncertainty, times closeness to the lineup so far
+                    lineup_rating = sum(views[i][0] for i in chosen) / len(chosen) if chosen else None
+                    weights = []
+                    for i in remaining:
+                        rating, se = views[i]
+                        weight = se
+                        if lineup_rating is not None:
+                            weight *= math.exp(-((rating - lineup_rating) / MATCHMAKING_BALANCE_WIDTH) ** 2 / 2)
+                        weights.append(weight)
+                    index = random.choices(remaining, weights=weights)[0] if sum(weights) > 0 else random.choice(remaining)
+                remaining.remove(index)
+                chosen.append(index)
+
+            for i in chosen:
+                model = self.models.get(name_of(candidates[i]))
+                if model is not None:
+                    model['picks'] += 1
+
+        # Display order stays random - selection order would otherwise leak into position bias
+        result = [candidates[i] for i in chosen]
+        random.shuffle(result)
+        return result
+
+    def snapshot(self):
+        with self.lock:
+            return {name: {'rating': round(rating, 1), 'se': round(se, 1)}
+                    for name, (rating, se) in ((name, self.view(name)) for name in self.models)}
+
+matchmaker = Matchmaker()
+
+@app.cli.command('maintenance')
+@click.option('--full-vacuum', is_flag=True,
+              help="Switch an existing database to incremental auto-vacuum (rewrites the whole file)")
+def maintenance_command(full_vacuum):
+    """Prune old unvoted games now"""
+    if full_vacuum:
+        conn = sqlite3.connect(DB_PATH)
+        conn.execute('PRAGMA auto_vacuum=INCREMENTAL')
+        conn.execute('VACUUM')
+        conn.close()
+    print(maintenance.run_once(force=True))
+
+@app.cli.command('rebuild-rollups')
+def rebuild_rollups_command():
+    """Recompute the leaderboard's vote_rollups from all voted games"""
+    db = get_db()
+    try:
+        rows = rebuild_vote_rollups(db)
+        db.commit()
+    finally:
+        db.close()
+    print(f"Rebuilt vote_rollups: {rows} rows")
+
+@app.cli.command('reload-models')
+def reload_models_command():
+    """Validate models.json and have every worker reload it"""
+    try:
+        roster = load_roster(MODELS_PATH)
+    except (OSError, ValueError) as e:
+        raise click.ClickException(f"{MODELS_PATH}: {e}")
+    # Workers watch the mtime, so touching the file is the broadcast
+    os.utime(MODELS_PATH)
+    print(f"{len(roster['enabled'])}/{len(roster['models'])} models enabled: {', '.join(roster['names'])}")
+
+# Output token budgets, learned per model from the responses table. Answers are short
+# punchlines, so a runaway generation is cut off at a few times the model's usual length.
+TOKEN_CAP_DEFAULT = 1024  # models with too little history
+TOKEN_CAP_MIN = 32
+TOKEN_CAP_MAX = 2000  # also used for the empty-response retry
+TOKEN_CAP_HEADROOM = 2.0  # multiple of p99 completion tokens
+TOKEN_CAP_MIN_SAMPLES = 20
+TOKEN_CAP_REFRESH_SECONDS = 600
+REASONING_TOKEN_THRESHOLD = 64  # median completion above this means the model is reasoning
+STOP_SEQUENCES = ["\n"]  # punchlines are one line
+
+def percentile(values, fraction):
+    """Nearest-rank percentile of a sorted list"""
+    return values[min(len(values) - 1, int(fraction * len(values)))]
+
+class TokenBudgets:
+    """Per-model max_tokens and reasoning budget hints derived from completion history"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.budgets = {}  # model_id -> {'max_tokens', 'reasoning_max_tokens', 'samples'}
+        self.refreshed_at = None
+
+    def refresh(self):
+        db = get_db()
+        rows = db.execute('''
+            SELECT model_id, completion_tokens, reasoning_tokens
+            FROM responses
+            WHERE status = 'completed' AND completion_tokens > 0
+            ORDER BY id DESC
+            LIMIT 20000
+        ''').fetchall()
+        db.close()
+
+        history = {}
+        for row in rows:
+            history.setdefault(row['model_id'], []).append((row['completion_tokens'], row['reasoning_tokens'] or 0))
+
+        budgets = {}
+        for model_id, samples in history.items():
+            if len(samples) < TOKEN_CAP_MIN_SAMPLES:
+                continue
+            completion = sorted(c for c, _ in samples)
+            reasoning = sorted(r for _, r in samples)
+            max_tokens = int(percentile(completion, 0.99) * TOKEN_CAP_HEADROOM)
+            max_tokens = max(TOKEN_CAP_MIN, min(TOKEN_CAP_MAX, max_tokens))
+
+            # Reasoning models: hint a thinking budget that leaves room for the punchline
+            reasoning_max_tokens = None
+            if percentile(reasoning, 0.5) > 0 or percentile(completion, 0.5) > REASONING_TOKEN_THRESHOLD:
+                reasoning_max_tokens = max(0, max_tokens - TOKEN_CAP_MIN)
+
+            budgets[model_id] = {
+                'max_tokens': max_tokens,
+                'reasoning_max_tokens': reasoning_max_tokens,
+                'samples': len(samples)
+            }
+
+        with self.lock:
+            self.budgets = budgets
+            self.refreshed_at = time.time()
+
+    def budget(self, model_id):
+        """Called from the LLM threads, so the occasional refresh stays off the request path"""
+        if self.refreshed_at is None or time.time() - self.refreshed_at > TOKEN_CAP_REFRESH_SECONDS:
+            # Claim the refresh so concurrent calls don't all run the query
+            self.refreshed_at = time.time()
+            try:
+                self.refresh()
+            except sqlite3.Error as e:
+                print(f"Warning: could not refresh token budgets: {e}")
+        with self.lock:
+            return self.budgets.get(model_id, {
+                'max_tokens': TOKEN_CAP_DEFAULT,
+                'reasoning_max_tokens': None,
+                'samples': 0
+            })
+
+    def snapshot(self):
+        with self.lock:
+            return dict(self.budgets)
+
+token_budgets = TokenBudgets()
+
 def call_llm(model_config, word, mode='women', retry_count=0):
     """Call a single LLM and return its response"""
     start_time = time.time()
@@ -322,31 +1781,32 @@ def call_llm(model_config, word, mode='women', retry_count=0):
             prompt = f'I like my women like I like my {word}...'
             system_prompt = SYSTEM_PROMPT_WOMEN
 
-        params = {
-            "model": model_config['model'],
+        # Learned output cap + newline stop. The empty-response retry drops both, in case they caused it.
+        budget = token_budgets.budget(model_config['model'])
+        first_try = retry_count == 0
+
+        # Model id and configured reasoning settings come prebuilt from the registry
+        params = model_registry.template(model_config)
+        params.update({
             "messages": [
                 {"role": "system", "content": system_prompt},
                 {"role": "user", "content": prompt}
             ],
             "temperature": 0.0,
-            "max_tokens": 2000,
-            "extra_body": {
-                "usage": {"include": True}
-            }
-        }
-
-        # Add reasoning effort for OpenAI models (GPT-5) - pass it directly as top-level param
-        if model_config.get("reasoning_effort"):
-            params["reasoning_effort"] = model_config["reasoning_effort"]
-        # Add reasoning max_tokens for Gemini models
-        elif model_config.get("reasoning_max_tokens") is not None:
-            params['extra_body'].update({'reasoning': {'max_tokens': model_config['reasoning_max_tokens']}})
-            params['max_tokens'] = model_config['reasoning_max_tokens']
+            "max_tokens": budget['max_tokens'] if first_try else TOKEN_CAP_MAX,
+        })
+        if first_try:
+            params["stop"] = STOP_SEQUENCES
+
+        # Models that reason on their own get a thinking budget hint from their history
+        configured = 'reasoning_effort' in params or 'reasoning' in params['extra_body']
+        if not configured and budget['reasoning_max_tokens'] is not None and first_try:
+            params['extra_body'].update({'reasoning': {'max_tokens': budget['reasoning_max_tokens']}})
         # Disable reasoning for GLM models - COMMENTED OUT, letting it use reasoning
         # elif model_config.get("reasoning_disabled"):
         #     params['extra_body'].update({'reasoning': {'enabled': False}})
 
-        response = client.chat.completions.create(**params)
+        response = get_client().chat.completions.create(**params)
 
         end_time = time.time()
         response_time = end_time - start_time
@@ -357,6 +1817,10 @@ def call_llm(model_config, word, mode='women', retry_count=0):
         usage = getattr(response, 'usage', None)
         completion_tokens = getattr(usage, 'completion_tokens', 0) if usage else 0
         reasoning_tokens = getattr(usage, 'reasoning_tokens', 0) if usage else 0
+        # OpenRouter reports reasoning under completion_tokens_details
+        details = getattr(usage, 'completion_tokens_details', None) if usage else None
+        if not reasoning_tokens and details:
+            reasoning_tokens = getattr(details, 'reasoning_tokens', 0) or 0
         prompt_tokens = getattr(usage, 'prompt_tokens', 0) if usage else 0
 
         # OpenRouter returns cost in usage.cost
@@ -377,6 +1841,7 @@ def call_llm(model_config, word, mode='women', retry_count=0):
             return call_llm(model_config, word, mode, retry_count=1)
 
         return {
+            'success': True,
             'model_name': model_config['name'],
             'model_id': model_config['model'],
             'response': content if content else "[No response]",
@@ -390,6 +1855,7 @@ def call_llm(model_config, word, mode='women', retry_count=0):
         end_time = time.time()
         response_time = end_time - start_time
         return {
+            'success': False,
             'model_name': model_config['name'],
             'model_id': model_config['model'],
             'response': f"[Error: {str(e)[:100]}]",
@@ -433,25 +1899,33 @@ def suggestion_route(suggestion):
     return render_template('index.html', initial_word=suggestion, random_words_json=json.dumps(RANDOM_WORDS))
 
 def call_llm_and_save(model_config, word, response_id, mode='women'):
-    """Call LLM and update response record in DB"""
+    """Call LLM and update response record in DB (runs on the LLM scheduler)"""
     result = call_llm(model_config, word, mode)
+    llm_health.record(result['success'], result['response_time'])
+    spend.record(result['cost_usd'])
 
     db = get_db()
-    db.execute(
-        '''UPDATE responses
-           SET status = 'completed',
-               response_text = ?,
-               response_time = ?,
-               completion_tokens = ?,
-               reasoning_tokens = ?,
-               prompt_tokens = ?,
-               cost_usd = ?
-           WHERE id = ?''',
-        (result['response'], result['response_time'], result['completion_tokens'],
-         result['reasoning_tokens'], result['prompt_tokens'], result['cost_usd'], response_id)
-    )
-    db.commit()
-    db.close()
+    try:
+        db.execute(
+            '''UPDATE responses
+               SET status = 'completed',
+                   response_text = ?,
+                   response_time = ?,
+                   completion_tokens = ?,
+                   reasoning_tokens = ?,
+                   prompt_tokens = ?,
+                   cost_usd = ?
+               WHERE id = ?''',
+            (result['response'], result['response_time'], result['completion_tokens'],
+             result['reasoning_tokens'], result['prompt_tokens'], result['cost_usd'], response_id)
+        )
+        db.commit()
+    except sqlite3.OperationalError as e:
+        note_db_error(e)
+        print(f"Error saving response {response_id}: {e}")
+        raise
+    finally:
+        db.close()
 
     response_data = {
         'id': response_id,
@@ -468,12 +1942,200 @@ def call_llm_and_save(model_config, word, response_id, mode='women'):
 
     return response_data
 
+def insert_cached_game(db, game_id, suggestion_id, mode, contestant_ids):
+    """Write a cached game's games/game_contestants rows (caller commits). Returns False if it already exists"""
+    created = db.execute(
+        'INSERT OR IGNORE INTO games (id, suggestion_id, mode) VALUES (?, ?, ?)',
+        (game_id, suggestion_id, mode)
+    ).rowcount
+    if not created:
+        return False
+    db.execute('UPDATE suggestions SET play_count = play_count + 1 WHERE id = ?', (suggestion_id,))
+    db.executemany(
+        'INSERT INTO game_contestants (game_id, response_id, display_position) VALUES (?, ?, ?)',
+        [(game_id, response_id, position) for position, response_id in enumerate(contestant_ids)]
+    )
+    return True
+
+def join_pending_game(db, suggestion, mode, word):
+    """Create a game on a suggestion that is still generating - the client polls /api/compete/status"""
+    responses = db.execute(
+        'SELECT id, model_name FROM responses WHERE suggestion_id = ?', (suggestion['id'],)
+    ).fetchall()
+    contestants = matchmaker.pick([dict(r) for r in responses], lambda r: r['model_name'])
+    game_id = str(uuid.uuid4())
+    insert_cached_game(db, game_id, suggestion['id'], mode, [r['id'] for r in contestants])
+    db.commit()
+    return {
+        'word': word,
+        'game_id': game_id,
+        'suggestion_id': suggestion['id'],
+        'cached': False,
+        'ready': False,
+        'all_models': model_registry.current()['names']
+    }
+
+def play_existing_suggestion(db, suggestion, mode, word):
+    """A cached game if all of the suggestion's responses are in, else a game that joins the generation"""
+    pending = db.execute(
+        "SELECT 1 FROM responses WHERE suggestion_id = ? AND status = 'pending' LIMIT 1", (suggestion['id'],)
+    ).fetchone()
+    if pending:
+        return join_pending_game(db, suggestion, mode, word)
+    return create_cached_game(db, suggestion, mode, word)
+
+def create_cached_game(db, suggestion, mode, word):
+    """Create a game from a suggestion's completed responses and build the cached payload"""
+    game_id = str(uuid.uuid4())
+    result = build_cached_game(db, suggestion, word, game_id)
+    insert_cached_game(db, game_id, suggestion['id'], mode, result['contestant_ids'])
+    db.commit()
+    return result
+
+def build_cached_game(db, suggestion, word, game_id):
+    """Pick contestants from a suggestion's completed responses and build the cached payload (no writes)"""
+    responses = db.execute(
+        'SELECT * FROM responses WHERE suggestion_id = ? AND status = "completed"',
+        (suggestion['id'],)
+    ).fetchall()
+
+    all_responses = [dict(r) for r in responses]
+
+    # Pick 4 contestants where a vote is most informative
+    contestant_responses = matchmaker.pick(all_responses, lambda r: r['model_name'])
+    contestant_ids = [r['id'] for r in contestant_responses]
+
+    # Group duplicates
+    grouped = {}
+    for r in contestant_responses:
+        text = r['response_text']
+        if text not in grouped:
+            grouped[text] = {
+                'response': text,
+                'models': [],
+                'response_ids': [],
+                'response_time': r['response_time'],
+                'completion_tokens': r['completion_tokens'],
+                'reasoning_tokens': r['reasoning_tokens'],
+                'is_contestant': True
+            }
+        else:
+            # If grouped, take the average timing
+            grouped[text]['response_time'] = (grouped[text]['response_time'] + r['response_time']) / 2
+            grouped[text]['completion_tokens'] = (grouped[text]['completion_tokens'] + r['completion_tokens']) / 2
+            grouped[text]['reasoning_tokens'] = (grouped[text]['reasoning_tokens'] + r['reasoning_tokens']) / 2
+        grouped[text]['models'].append(r['model_name'])
+        grouped[text]['response_ids'].append(r['id'])
+
+    # Get non-contestant responses
+    non_contestant_responses = []
+    contestant_id_set = set(contestant_ids)
+    for r in all_responses:
+        if r['id'] not in contestant_id_set:
+            non_contestant_responses.append({
+                'model_name': r['model_name'],
+                'response_text': r['response_text'],
+                'response_time': r['response_time'],
+                'completion_tokens': r['completion_tokens'],
+                'reasoning_tokens': r['reasoning_tokens'],
+                'status': 'completed',
+                'is_contestant': False
+            })
+
+    return {
+        'word': word,
+        'game_id': game_id,
+        'suggestion_id': suggestion['id'],
+        'responses': list(grouped.values()),
+        'contestant_ids': contestant_ids,
+        'other_responses': non_contestant_responses,
+        'cached': True,
+        'ready': True,
+        'all_models': model_registry.current()['names']
+    }
+
+def create_pending_suggestion(db, word, canonical_word, mode, models, play_count=1):
+    """Insert a new suggestion with one pending response per model. Returns (suggestion_id, model_name -> response_id)
+
+    Returns None if the word already has a row. UNIQUE is on the raw (word, mode), so a lookup by
+    canonical_word can miss it - after FOLD_PLURALS changed, or when another request just added it.
+    """
+    try:
+        cursor = db.execute(
+            'INSERT INTO suggestions (word, mode, canonical_word, play_count) VALUES (?, ?, ?, ?)',
+            (word, mode, canonical_word, play_count)
+        )
+    except sqlite3.IntegrityError:
+        db.rollback()
+        return None
+    suggestion_id = cursor.lastrowid
+
+    # Create pending response records (one per model)
+    response_map = {}  # model_name -> response_id
+    for model in models:
+        cursor = db.execute(
+            '''INSERT INTO responses (suggestion_id, model_name, model_id, mode, status)
+               VALUES (?, ?, ?, ?, 'pending')''',
+            (suggestion_id, model['name'], model['model'], mode)
+        )
+        response_map[model['name']] = cursor.lastrowid
+    db.commit()
+
+    return suggestion_id, response_map
+
+def launch_generation(models, word, response_map, mode, lane='interactive', client=None):
+    """Queue all LLM calls for a suggestion on the scheduler"""
+    for model in models:
+        llm_scheduler.submit(call_llm_and_save, model, word, response_map[model['name']], mode,
+                             lane=lane, client=client)
+
+def pick_models_for_budget():
+    """Models to run for a new word given current spend, or None if only cached play is allowed"""
+    budget_tier = spend.tier()
+    if budget_tier == 'cached_only':
+        return None
+    models = model_registry.current()['enabled']
+    if budget_tier == 'reduced':
+        return random.sample(models, min(BUDGET_REDUCED_MODEL_COUNT, len(models)))
+    return models
+
+def find_substitute_suggestion(db, canonical_word, mode):
+    """Find a fully generated suggestion to serve instead of a new word - related if possible, else a popular one"""
+    completed_only = '''NOT EXISTS (SELECT 1 FROM responses r
+                                     WHERE r.suggestion_id = s.id AND r.status = 'pending')'''
+
+    if FTS_ENABLED:
+        # Related: shares any word with the request, e.g. "iced coffee" -> "coffee"
+        tokens = canonical_word.split()
+        match = ' OR '.join(f'"{token}"' for token in tokens)
+        related = db.execute(
+            f'''SELECT s.* FROM suggestions_fts f
+                JOIN suggestions s ON s.id = f.rowid
+                WHERE suggestions_fts MATCH ? AND s.mode = ? AND {completed_only}
+                ORDER BY s.play_count DESC
+                LIMIT 1''',
+            (match, mode)
+        ).fetchone()
+        if related:
+            return related
+
+    # Random pick among the most played suggestions - known-good games
+    popular = db.execute(
+        f'''SELECT s.* FROM suggestions s
+            WHERE s.mode = ? AND {completed_only}
+            ORDER BY s.play_count DESC
+            LIMIT 50''',
+        (mode,)
+    ).fetchall()
+    return random.choice(popular) if popular else None
+
 @app.route('/api/compete', methods=['POST'])
 @limiter.limit("10/minute")
 def compete():
     """Get responses from all models for a given word"""
     data = request.json
-    word = data.get('word', '').strip().lower()
+    # Keep the user's text for display, but look it up by its canonical cache key
+    word = normalize_display_word(data.get('word', ''))
 
     if not word:
         return jsonify({'error': 'No word provided'}), 400
@@ -482,116 +2144,69 @@ def compete():
     if len(word) > 100:
         return jsonify({'error': 'Word too long (max 100 characters)'}), 400
 
+    canonical_word = canonicalize_word(word)
+    if not canonical_word:
+        return jsonify({'error': 'Word must contain letters or numbers'}), 400
+
     # Detect mode from subdomain
     mode = get_mode()
 
+    deferred_words.ensure_started()
+    maintenance.ensure_started()
+    ratings.ensure_started()
+
     db = get_db()
 
     # Check if we already have responses for this word + mode combination
-    suggestion = db.execute('SELECT * FROM suggestions WHERE word = ? AND mode = ?', (word, mode)).fetchone()
+    suggestion = db.execute(
+        'SELECT * FROM suggestions WHERE canonical_word = ? AND mode = ? ORDER BY id LIMIT 1',
+        (canonical_word, mode)
+    ).fetchone()
 
     if suggestion:
-        # CACHED WORD - create game from existing responses
-        responses = db.execute(
-            'SELECT * FROM responses WHERE suggestion_id = ? AND status = "completed"',
-            (suggestion['id'],)
-        ).fetchall()
-
-        all_responses = [dict(r) for r in responses]
-
-        # Randomly sample 4 contestants
-        contestant_responses = random.sample(all_responses, min(4, len(all_responses)))
-        contestant_ids = [r['id'] for r in contestant_responses]
-
-        # Create game record
-        game_id = str(uuid.uuid4())
-        db.execute(
-            'INSERT INTO games (id, suggestion_id, mode) VALUES (?, ?, ?)',
-            (game_id, suggestion['id'], mode)
-        )
-
-        # Create game_contestants records
-        for position, contestant in enumerate(contestant_responses):
-            db.execute(
-                'INSERT INTO game_contestants (game_id, response_id, display_position) VALUES (?, ?, ?)',
-                (game_id, contestant['id'], position)
-            )
-
-        db.commit()
-
-        # Group duplicates
-        grouped = {}
-        for r in contestant_responses:
-            text = r['response_text']
-            if text not in grouped:
-                grouped[text] = {
-                    'response': text,
-                    'models': [],
-                    'response_ids': [],
-                    'response_time': r['response_time'],
-                    'completion_tokens': r['completion_tokens'],
-                    'reasoning_tokens': r['reasoning_tokens'],
-                    'is_contestant': True
-                }
-            else:
-                # If grouped, take the average timing
-                grouped[text]['response_time'] = (grouped[text]['response_time'] + r['response_time']) / 2
-                grouped[text]['completion_tokens'] = (grouped[text]['completion_tokens'] + r['completion_tokens']) / 2
-                grouped[text]['reasoning_tokens'] = (grouped[text]['reasoning_tokens'] + r['reasoning_tokens']) / 2
-            grouped[text]['models'].append(r['model_name'])
-            grouped[text]['response_ids'].append(r['id'])
-
-        # Get non-contestant responses
-        non_contestant_responses = []
-        contestant_id_set = set(contestant_ids)
-        for r in all_responses:
-            if r['id'] not in contestant_id_set:
-                non_contestant_responses.append({
-                    'model_name': r['model_name'],
-                    'response_text': r['response_text'],
-                    'response_time': r['response_time'],
-                    'completion_tokens': r['completion_tokens'],
-                    'reasoning_tokens': r['reasoning_tokens'],
-                    'status': 'completed',
-                    'is_contestant': False
-                })
-
-        result = {
-            'word': word,
-            'game_id': game_id,
-            'suggestion_id': suggestion['id'],
-            'responses': list(grouped.values()),
-            'contestant_ids': contestant_ids,
-            'other_responses': non_contestant_responses,
-            'cached': True,
-            'ready': True,
-            'all_models': ALL_MODEL_NAMES
-        }
+        # CACHED WORD - create game from existing responses (or join them if still generating)
+        result = play_existing_suggestion(db, suggestion, mode, word)
+        db.close()
+        return jsonify(result)
 
+    # NEW WORD - when upstream is struggling or the budget is spent, serve a cached game
+    # right away and generate the requested word later
+    models = pick_models_for_budget()
+    degraded_reason = 'budget' if models is None else llm_health.overload_reason()
+    if degraded_reason:
+        deferred_words.enqueue(db, word, canonical_word, mode)
+        substitute = find_substitute_suggestion(db, canonical_word, mode)
+        if not substitute:
+            db.close()
+            return jsonify({
+                'error': "We're swamped right now - try again in a minute!",
+                'degraded': True,
+                'reason': degraded_reason
+            }), 503
+
+        result = create_cached_game(db, substitute, mode, substitute['word'])
+        result.update({
+            'degraded': True,
+            'reason': degraded_reason,
+            'requested_word': word,
+            'queued': True
+        })
         db.close()
         return jsonify(result)
 
-    # NEW WORD - create suggestion, pending responses, and game
-    cursor = db.execute('INSERT INTO suggestions (word, mode) VALUES (?, ?)', (word, mode))
-    suggestion_id = cursor.lastrowid
-    db.commit()
+    model_names = [m['name'] for m in models]
 
-    # Create 11 pending response records
-    response_ids = []
-    response_map = {}  # model_name -> response_id
-    for model in MODELS:
-        cursor = db.execute(
-            '''INSERT INTO responses (suggestion_id, model_name, model_id, mode, status)
-               VALUES (?, ?, ?, ?, 'pending')''',
-            (suggestion_id, model['name'], model['model'], mode)
-        )
-        response_id = cursor.lastrowid
-        response_ids.append(response_id)
-        response_map[model['name']] = response_id
-    db.commit()
+    # Create suggestion, pending responses, and game
+    created = create_pending_suggestion(db, word, canonical_word, mode, models)
+    if created is None:
+        suggestion = db.execute('SELECT * FROM suggestions WHERE word = ? AND mode = ?', (word, mode)).fetchone()
+        result = play_existing_suggestion(db, suggestion, mode, word)
+        db.close()
+        return jsonify(result)
+    suggestion_id, response_map = created
 
-    # Randomly select 4 contestants
-    contestants = random.sample(MODELS, min(4, len(MODELS)))
+    # Pick 4 contestants where a vote is most informative
+    contestants = matchmaker.pick(models, lambda m: m['name'])
     contestant_ids = [response_map[m['name']] for m in contestants]
 
     # Create game record
@@ -611,15 +2226,9 @@ def compete():
     db.commit()
     db.close()
 
-    # Launch all 11 LLM calls in background
-    def run_models_async():
-        """Run all models in background"""
-        with ThreadPoolExecutor(max_workers=len(MODELS)) as executor:
-            for model in MODELS:
-                response_id = response_map[model['name']]
-                executor.submit(call_llm_and_save, model, word, response_id, mode)
-
-    threading.Thread(target=run_models_async, daemon=True).start()
+    # Launch all LLM calls in background. Fair share is per IP as our proxy saw it - session ids
+    # and X-Forwarded-For entries are free to mint
+    launch_generation(models, word, response_map, mode, client=trusted_client_ip())
 
     return jsonify({
         'word': word,
@@ -627,8 +2236,82 @@ def compete():
         'suggestion_id': suggestion_id,
         'cached': False,
         'ready': False,
-        'all_models': ALL_MODEL_NAMES
+        'all_models': model_names
+    })
+
+# Prefetched games: the client fetches its next cached game while the player votes. The game
+# isn't written until it is voted on - its id and lineup travel in a signed token instead.
+PREFETCH_CANDIDATES = 20  # random words tried per request
+PREFETCH_TOKEN_MAX_AGE = 86400
+BATCH_MAX_GAMES = 20  # rapid-fire mode: games per /api/games/batch, votes per /api/vote/batch
+game_tokens = URLSafeTimedSerializer(app.config['SECRET_KEY'], salt='prefetched-game')
+
+def pick_cached_suggestions(db, mode, count, exclude=None):
+    """Up to `count` distinct fully generated suggestions for random RANDOM_WORDS in this mode"""
+    sample_size = min(len(RANDOM_WORDS), max(PREFETCH_CANDIDATES, 3 * count))
+    keys = {canonicalize_word(w) for w in random.sample(RANDOM_WORDS, sample_size)}
+    keys = [k for k in keys if k and k != exclude]
+    if not keys:
+        return []
+
+    suggestions = db.execute(f'''
+        SELECT * FROM suggestions s
+        WHERE canonical_word IN ({','.join('?' * len(keys))}) AND mode = ?
+          AND EXISTS (SELECT 1 FROM responses r WHERE r.suggestion_id = s.id AND r.status = 'completed')
+          AND NOT EXISTS (SELECT 1 FROM responses r WHERE r.suggestion_id = s.id AND r.status = 'pending')
+    ''', keys + [mode]).fetchall()
+    return random.sample(suggestions, min(count, len(suggestions)))
+
+@app.route('/api/games/next', methods=['GET'])
+@limiter.limit("30/minute")
+def next_game():
+    """A ready-to-play cached game for a random word, or 204 if none of the sampled words are cached"""
+    mode = get_mode()
+    db = get_db()
+    suggestions = pick_cached_suggestions(db, mode, 1, canonicalize_word(request.args.get('exclude', '')))
+    if not suggestions:
+        db.close()
+        return '', 204
+
+    suggestion = suggestions[0]
+    game_id = str(uuid.uuid4())
+    result = build_cached_game(db, suggestion, suggestion['word'], game_id)
+    db.close()
+
+    result['game_token'] = game_tokens.dumps({
+        'g': game_id,
+        's': suggestion['id'],
+        'm': mode,
+        'r': result['contestant_ids']
     })
+    return jsonify(result)
+
+def batch_game_count():
+    try:
+        return max(1, min(int(request.args.get('n', 10)), BATCH_MAX_GAMES))
+    except ValueError:
+        return 1
+
+@app.route('/api/games/batch', methods=['POST'])
+@limiter.limit("30/minute", cost=batch_game_count)
+def games_batch():
+    """Rapid-fire mode: up to n cached games in one response, all written in one transaction"""
+    mode = get_mode()
+    count = batch_game_count()
+
+    db = get_db()
+    games = []
+    for suggestion in pick_cached_suggestions(db, mode, count):
+        game_id = str(uuid.uuid4())
+        games.append((suggestion['id'], build_cached_game(db, suggestion, suggestion['word'], game_id)))
+
+    # Reads first, so the write lock is only held for the inserts
+    for suggestion_id, result in games:
+        insert_cached_game(db, result['game_id'], suggestion_id, mode, result['contestant_ids'])
+    db.commit()
+    db.close()
+
+    return jsonify({'games': [result for _, result in games]})
 
 @app.route('/api/compete/status', methods=['GET'])
 def compete_status():
@@ -671,7 +2354,7 @@ def compete_status():
         'completed': completed_count,
         'total': total_count,
         'ready': ready,
-        'all_models': ALL_MODEL_NAMES,
+        'all_models': model_registry.current()['names'],
         'contestant_models': contestant_models
     }
 
@@ -747,32 +2430,97 @@ def get_responses():
 
     return jsonify({
         'responses': all_responses,
-        'complete': len(all_responses) >= len(MODELS)
+        'complete': bool(all_responses) and all(r['status'] == 'completed' for r in all_responses)
     })
 
-@app.route('/api/vote', methods=['POST'])
-@limiter.limit("30/minute")
-def vote():
-    """Record a vote for a response"""
-    data = request.json
-    game_id = data.get('game_id')
-    response_ids = data.get('response_ids')  # Can be multiple if grouped, or None for "none of the above"
+@app.route('/api/suggestions/search', methods=['GET'])
+@limiter.limit("120/minute")
+def search_suggestions():
+    """Autocomplete over already-played suggestions, most played first"""
+    query = request.args.get('q', '')
+    mode = request.args.get('mode') or get_mode()
+    limit = max(1, min(request.args.get('limit', 8, type=int), 20))
 
-    if not game_id:
-        return jsonify({'error': 'Missing game_id'}), 400
+    # Same folding as the cache key, minus plurals so prefixes like "cats" still match "cats..."
+    tokens = canonicalize_word(query, fold_plurals=False).split()
+    if not tokens or len(''.join(tokens)) < 2:
+        return jsonify({'query': query, 'results': []})
+
+    db = get_db()
+    if FTS_ENABLED:
+        # Every token must prefix-match a word token: "cof mak" -> "coffee makers"
+        match = ' AND '.join(f'"{token}"*' for token in tokens)
+        rows = db.execute(
+            '''SELECT s.id, s.word, s.canonical_word, s.play_count
+               FROM suggestions_fts f
+               JOIN suggestions s ON s.id = f.rowid
+               WHERE suggestions_fts MATCH ? AND s.mode = ?
+               ORDER BY s.play_count DESC, s.id
+               LIMIT ?''',
+            (match, mode, limit * 2)
+        ).fetchall()
+    else:
+        prefix = ' '.join(tokens)
+        rows = db.execute(
+            '''SELECT id, word, canonical_word, play_count
+               FROM suggestions
+               WHERE canonical_word >= ? AND canonical_word < ? AND mode = ?
+               ORDER BY play_count DESC, id
+               LIMIT ?''',
+            (prefix, prefix + '\U0010ffff', mode, limit * 2)
+        ).fetchall()
+    db.close()
+
+    # Older rows can share a cache key - only offer each key once
+    results = []
+    seen = set()
+    for row in rows:
+        if row['canonical_word'] in seen:
+            continue
+        seen.add(row['canonical_word'])
+        results.append({'word': row['word'], 'suggestion_id': row['id'], 'play_count': row['play_count']})
+        if len(results) >= limit:
+            break
+
+    return jsonify({'query': query, 'mode': mode, 'results': results})
+
+def client_ip():
+    ip = request.headers.get('X-Forwarded-For', request.remote_addr)
+    return ip.split(',')[0].strip() if ',' in ip else ip
+
+def trusted_client_ip():
+    """The client's address as recorded by our own proxies - unlike client_ip(), not up to the client
+
+    Each trusted proxy appends the address it saw to X-Forwarded-For, so the client is the entry
+    TRUSTED_PROXY_HOPS from the right; anything further left was sent by the client itself.
+    """
+    if TRUSTED_PROXY_HOPS:
+        hops = [hop.strip() for hop in request.headers.get('X-Forwarded-For', '').split(',') if hop.strip()]
+        if len(hops) >= TRUSTED_PROXY_HOPS:
+            return hops[-TRUSTED_PROXY_HOPS]
+    return request.remote_addr
 
-    # Get voter identity
-    voter_ip = request.headers.get('X-Forwarded-For', request.remote_addr)
-    if ',' in voter_ip:
-        voter_ip = voter_ip.split(',')[0].strip()
+def voter_identity():
+    """(voter_ip, voter_session) for the current request, creating the session id if needed"""
+    voter_ip = client_ip()
 
     # Generate or retrieve session ID
     if 'voter_id' not in session:
         session['voter_id'] = str(uuid.uuid4())
         session.permanent = True
-    voter_session = session['voter_id']
-
-    db = get_db()
+    return voter_ip, session['voter_id']
+
+def record_vote(db, game_id, response_ids, voter_ip, voter_session, game_token=None):
+    """Apply one vote in the caller's transaction. Returns an error message (before any write), or None"""
+    # A prefetched game is saved now, in the same transaction as its vote
+    if game_token:
+        try:
+            claims = game_tokens.loads(game_token, max_age=PREFETCH_TOKEN_MAX_AGE)
+        except BadSignature:
+            return 'Invalid or expired game token'
+        if claims['g'] != game_id:
+            return 'Game token does not match game_id'
+        insert_cached_game(db, game_id, claims['s'], claims['m'], claims['r'])
 
     # Update game with winning response (use first response_id if multiple due to grouping)
     # If response_ids is None, set winning_response_id to None (none of the above)
@@ -781,24 +2529,94 @@ def vote():
     else:
         winning_response_id = response_ids[0] if isinstance(response_ids, list) else response_ids
 
-    db.execute(
+    # Ratings only count a game's first vote; later ones just overwrite the record
+    first_vote = db.execute(
         '''UPDATE games
            SET winning_response_id = ?,
                voter_ip = ?,
                voter_session = ?
-           WHERE id = ?''',
+           WHERE id = ? AND voter_session IS NULL''',
         (winning_response_id, voter_ip, voter_session, game_id)
-    )
+    ).rowcount
+    if first_vote:
+        update_vote_rollups(db, game_id, winning_response_id)
+        if winning_response_id is not None:
+            elo_update(db, game_id, winning_response_id)
+    else:
+        previous = db.execute('SELECT winning_response_id FROM games WHERE id = ?', (game_id,)).fetchone()
+        db.execute(
+            '''UPDATE games
+               SET winning_response_id = ?,
+                   voter_ip = ?,
+                   voter_session = ?
+               WHERE id = ?''',
+            (winning_response_id, voter_ip, voter_session, game_id)
+        )
+        if previous and previous['winning_response_id'] != winning_response_id:
+            update_vote_rollups(db, game_id, winning_response_id, previous['winning_response_id'], first_vote=False)
+    return None
+
+@app.route('/api/vote', methods=['POST'])
+@limiter.limit("30/minute")
+def vote():
+    """Record a vote for a response"""
+    data = request.json
+    game_id = data.get('game_id')
+    response_ids = data.get('response_ids')  # Can be multiple if grouped, or None for "none of the above"
+
+    if not game_id:
+        return jsonify({'error': 'Missing game_id'}), 400
+
+    voter_ip, voter_session = voter_identity()
+
+    db = get_db()
+    error = record_vote(db, game_id, response_ids, voter_ip, voter_session, data.get('game_token'))
+    if error:
+        db.close()
+        return jsonify({'error': error}), 400
 
     db.commit()
     db.close()
 
     return jsonify({'success': True})
 
+def batch_vote_count():
+    """Rate-limit cost of a batch vote - each vote counts against the per-vote limit"""
+    votes = (request.get_json(silent=True) or {}).get('votes')
+    return max(1, min(len(votes), BATCH_MAX_GAMES)) if isinstance(votes, list) else 1
+
+@app.route('/api/vote/batch', methods=['POST'])
+@limiter.limit("30/minute", cost=batch_vote_count)
+def vote_batch():
+    """Record several votes in one transaction: {"votes": [{"game_id", "response_ids", "game_token"?}, ...]}"""
+    votes = (request.get_json(silent=True) or {}).get('votes')
+    if not isinstance(votes, list) or not votes:
+        return jsonify({'error': 'Missing votes'}), 400
+    if len(votes) > BATCH_MAX_GAMES:
+        return jsonify({'error': f'At most {BATCH_MAX_GAMES} votes per batch'}), 400
+
+    voter_ip, voter_session = voter_identity()
+
+    db = get_db()
+    results = []
+    for entry in votes:
+        game_id = entry.get('game_id') if isinstance(entry, dict) else None
+        if not game_id:
+            results.append({'game_id': None, 'success': False, 'error': 'Missing game_id'})
+            continue
+        error = record_vote(db, game_id, entry.get('response_ids'), voter_ip, voter_session, entry.get('game_token'))
+        results.append({'game_id': game_id, 'success': not error, **({'error': error} if error else {})})
+
+    db.commit()
+    db.close()
+
+    return jsonify({'success': True, 'results': results})
+
 @app.route('/api/stats', methods=['GET'])
 def get_stats():
     """Get leaderboard stats"""
-    db = get_db()
+    freshness = analytics_snapshot.status()
+    db = get_analytics_db()
 
     # Get win counts and appearance counts per model using games table
     stats = db.execute('''
@@ -851,12 +2669,167 @@ def get_stats():
     result = [dict(s) for s in stats]
     db.close()
 
-    return jsonify(result)
+    # Ratings are a few rows, read live so Elo moves with each vote
+    db = get_db()
+    model_ratings = {row['model_name']: dict(row) for row in db.execute(
+        'SELECT model_name, elo, elo_games, rating, rating_ci_low, rating_ci_high, rated_games FROM model_ratings'
+    )}
+    db.close()
+    for row in result:
+        rating = model_ratings.get(row['model_name'], {})
+        for field in ('elo', 'rating', 'rating_ci_low', 'rating_ci_high'):
+            row[field] = round(rating[field], 1) if rating.get(field) is not None else None
+        row['rated_games'] = rating.get('rated_games', 0)
+
+    # The body stays a plain list for stats.html, so freshness goes in headers
+    response = jsonify(result)
+    response.headers['X-Data-Source'] = freshness['source']
+    response.headers['X-Data-Staleness-Seconds'] = str(freshness['staleness_seconds'])
+    return response
+
+LEADERBOARD_WINDOWS = {'24h': 1, '7d': 7, '30d': 30, 'all': None}  # days
+
+def win_rate_rows(rows):
+    return [dict(row, win_rate=round(row['wins'] / row['appearances'], 4) if row['appearances'] else 0.0)
+            for row in (dict(r) for r in rows)]
+
+# Admin-only endpoints need this token as "Authorization: Bearer <token>"; unset disables them
+ADMIN_TOKEN = os.getenv('ADMIN_TOKEN')
+
+def is_admin():
+    if not ADMIN_TOKEN:
+        return False
+    header = request.headers.get('Authorization', '')
+    token = header[len('Bearer '):] if header.startswith('Bearer ') else ''
+    return hmac.compare_digest(token.encode(), ADMIN_TOKEN.encode())
+
+@app.route('/api/export', methods=['GET'])
+def export_games_route():
+    """Stream every voted game as NDJSON (gzip unless ?compress=0), filtered by ?since=&until=&mode=,
+    resuming after ?after=<cursor of the last line received>"""
+    if not ADMIN_TOKEN:
+        return jsonify({'error': 'Not found'}), 404
+    if not is_admin():
+        return jsonify({'error': 'Admin token required'}), 403
+
+    mode = request.args.get('mode')
+    if mode not in (None, 'women', 'men'):
+        return jsonify({'error': 'mode must be women or men'}), 400
+    try:
+        after = request.args.get('after')
+        parse_cursor(after)
+        since = parse_bound(request.args['since']) if request.args.get('since') else None
+        until = parse_bound(request.args['until']) if request.args.get('until') else None
+    except ValueError:
+        return jsonify({'error': 'after must be a cursor, since/until ISO dates'}), 400
+    compress = request.args.get('compress', '1') != '0'
+
+    def generate():
+        # Its own connection, one short read per chunk - the export never pins a WAL snapshot
+        db = get_db()
+        try:
+            chunks = iter_export_chunks(db, since=since, until=until, mode=mode, after=after)
+            if compress:
+                yield from iter_gzip_ndjson(chunks)
+            else:
+                for chunk in chunks:
+                    yield ndjson(chunk)
+                    time.sleep(EXPORT_CHUNK_PAUSE)
+        finally:
+            db.close()
+
+    filename = 'games.ndjson.gz' if compress else 'games.ndjson'
+    return Response(generate(), mimetype='application/gzip' if compress else 'application/x-ndjson', headers={
+        'Content-Disposition': f'attachment; filename={filename}',
+        'Cache-Control': 'no-store',
+        'X-Accel-Buffering': 'no'  # don't let a proxy buffer the whole export
+    })
+
+@app.route('/api/leaderboard', methods=['GET'])
+def get_leaderboard():
+    """Win rates over a time window from vote_rollups - by model, display position and mode
+
+    Votes are bucketed by the hour their game was created (served), not the hour of the vote,
+    so the window covers games shown in it. Almost all votes follow within minutes.
+    """
+    window = request.args.get('window', '7d')
+    mode = request.args.get('mode', 'all')
+    if window not in LEADERBOARD_WINDOWS:
+        return jsonify({'error': f"window must be one of {', '.join(LEADERBOARD_WINDOWS)}"}), 400
+    if mode not in ('women', 'men', 'all'):
+        return jsonify({'error': 'mode must be women, men or all'}), 400
+
+    # Range scan on the (hour, ...) primary key
+    conditions, params = [], []
+    since = None
+    if LEADERBOARD_WINDOWS[window]:
+        since = time.strftime('%Y-%m-%d %H:00:00', time.gmtime(time.time() - LEADERBOARD_WINDOWS[window] * 86400))
+        conditions.append('hour >= ?')
+        params.append(since)
+    if mode != 'all':
+        conditions.append('mode = ?')
+        params.append(mode)
+    where = f"WHERE {' AND '.join(conditions)}" if conditions else ''
+
+    db = get_db()
+    by_model = db.execute(f'''
+        SELECT model_name, SUM(appearances) AS appearances, SUM(wins) AS wins
+        FROM vote_rollups {where}
+        GROUP BY model_name
+        ORDER BY CAST(SUM(wins) AS REAL) / MAX(SUM(appearances), 1) DESC
+    ''', params).fetchall()
+    by_position = db.execute(f'''
+        SELECT display_position, SUM(appearances) AS appearances, SUM(wins) AS wins
+        FROM vote_rollups {where}
+        GROUP BY display_position
+        ORDER BY display_position
+    ''', params).fetchall()
+    by_mode = db.execute(f'''
+        SELECT mode, SUM(appearances) AS appearances, SUM(wins) AS wins
+        FROM vote_rollups {where}
+        GROUP BY mode
+    ''', params).fetchall()
+    db.close()
+
+    return jsonify({
+        'window': window,
+        'mode': mode,
+        'since': since,
+        'bucketed_by': 'game_created_at',
+        'models': win_rate_rows(by_model),
+        'positions': win_rate_rows(by_position),
+        'modes': win_rate_rows(by_mode)
+    })
+
+@app.route('/api/health', methods=['GET'])
+def get_health():
+    """Upstream LLM health, overload state and deferred word backlog (for this worker)"""
+    db = get_db()
+    deferred = db.execute('SELECT COUNT(*) AS count FROM deferred_suggestions').fetchone()['count']
+    maintenance_run = maintenance.last_run(db)
+    db.close()
+
+    return jsonify({
+        'pid': os.getpid(),
+        'threads': threading.active_count(),
+        'db_lock_errors': db_lock_errors['count'],
+        'llm': llm_health.stats(),
+        'llm_lanes': llm_scheduler.stats(),
+        'overload_reason': llm_health.overload_reason(),
+        'budget_tier': spend.tier(),
+        'deferred_words': deferred,
+        'maintenance': maintenance_run,
+        'analytics_snapshot': analytics_snapshot.status(),
+        'token_budgets': token_budgets.snapshot(),
+        'matchmaking': matchmaker.snapshot(),
+        'models': model_registry.status()
+    })
 
 @app.route('/api/costs', methods=['GET'])
 def get_costs():
     """Get cost statistics"""
-    db = get_db()
+    freshness = analytics_snapshot.status()
+    db = get_analytics_db()
 
     # Total cost
     total_cost = db.execute('SELECT SUM(cost_usd) as total FROM responses').fetchone()
@@ -891,9 +2864,11 @@ def get_costs():
 
     return jsonify({
         'total_cost_usd': total_cost['total'] or 0.0,
-        'remaining_budget': 100.0 - (total_cost['total'] or 0.0),
+        'remaining_budget': TOTAL_BUDGET_USD - (total_cost['total'] or 0.0),
+        'budget': spend.snapshot(),
         'cost_by_model': [dict(row) for row in cost_by_model],
-        'cost_by_day': [dict(row) for row in cost_by_day]
+        'cost_by_day': [dict(row) for row in cost_by_day],
+        'data_freshness': freshness
     })
 
 if __name__ == '__main__':
@@ -901,4 +2876,5 @@ if __name__ == '__main__':
     debug_mode = os.getenv('FLASK_DEBUG', 'False').lower() == 'true'
     port = int(os.getenv('PORT', 5001))
     host = os.getenv('HOST', '0.0.0.0')
+    model_registry.install_signal_handler()
     app.run(debug=debug_mode, port=port, host=host)
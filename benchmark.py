@@ -1,49 +1,39 @@
 import os
 import json
 import time
+import heapq
+import random
+import shutil
+import sqlite3
+import tempfile
+import asyncio
+import argparse
 import threading
-from openai import OpenAI
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from openai import AsyncOpenAI
 from dotenv import load_dotenv
+from model_registry import ModelRegistry
 from statistics import mean, stdev
-from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 
 load_dotenv()
 
-# OpenRouter setup
-client = OpenAI(
-    base_url="https://openrouter.ai/api/v1",
+# OpenRouter setup (OPENROUTER_BASE_URL can point at mock_openrouter.py for load tests)
+client = AsyncOpenAI(
+    base_url=os.getenv("OPENROUTER_BASE_URL", "https://openrouter.ai/api/v1"),
     api_key=os.getenv("OPENROUTER_API_KEY")
 )
 
-# Models to benchmark
-MODELS = [
-    {"name": "Claude Sonnet 4.5", "model": "anthropic/claude-sonnet-4.5"},
-    {"name": "Claude Opus 4.1", "model": "anthropic/claude-opus-4.1"},
-    {"name": "Gemini 2.5 Flash", "model": "google/gemini-2.5-flash", "reasoning_max_tokens": 0},
-    {"name": "DeepSeek v3", "model": "deepseek/deepseek-chat-v3-0324"},
-    {"name": "GPT-5 Chat", "model": "openai/gpt-5-chat", "reasoning_effort": "low"},
-    {"name": "GPT-5 Mini", "model": "openai/gpt-5-mini", "reasoning_effort": "low"},
-    {"name": "GPT-5 Nano", "model": "openai/gpt-5-nano", "reasoning_effort": "low"},
-    {"name": "Qwen3 235B", "model": "qwen/qwen3-235b-a22b-2507"},
-    {"name": "Llama 4 Maverick", "model": "meta-llama/llama-4-maverick"},
-    {"name": "Kimi K2", "model": "moonshotai/kimi-k2-0905"},
-    {"name": "Llama 4 Scout", "model": "meta-llama/llama-4-scout"},
-    {"name": "GLM-4.5-Air", "model": "z-ai/glm-4.5-air"},
-    # New models
-    {"name": "GPT-4.1", "model": "openai/gpt-4.1"},  # non-reasoning model
-    {"name": "Grok Code Fast 1", "model": "x-ai/grok-code-fast-1"},  # forces reasoning
-    {"name": "Grok 4 Fast", "model": "x-ai/grok-4-fast"},  # forces reasoning
-    {"name": "GPT-4o", "model": "openai/gpt-4o", "reasoning_effort": "low"},
-    {"name": "Qwen 2.5 VL 32B", "model": "qwen/qwen2.5-vl-32b-instruct"},
-    {"name": "DeepSeek R1 Qwen3 8B", "model": "deepseek/deepseek-r1-0528-qwen3-8b"},
-    {"name": "Qwen 2.5 72B", "model": "qwen/qwen-2.5-72b-instruct"},
-    {"name": "Rocinante 12B", "model": "thedrummer/rocinante-12b"},
-    {"name": "DeepSeek Chat v3.0324", "model": "deepseek/deepseek-chat-v3-0324"},
-    {"name": "DeepSeek R1T2 Chimera", "model": "tngtech/deepseek-r1t2-chimera"},
-    {"name": "DeepSeek Chat v3.1", "model": "deepseek/deepseek-chat-v3.1"},
-    {"name": "DeepSeek R1", "model": "deepseek/deepseek-r1-0528"},
-]
+# Defaults - override on the command line
+DEFAULT_TRIALS = 3  # calls per (model, noun)
+DEFAULT_WARMUP = 1  # unrecorded calls per model before timing starts
+DEFAULT_CONCURRENCY = 16  # calls in flight overall
+DEFAULT_PROVIDER_CONCURRENCY = 4  # calls in flight per provider (the "anthropic" in "anthropic/claude-...")
+
+# Models to benchmark: every model in models.json, enabled in the app or not
+MODELS_PATH = os.getenv('MODELS_PATH', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'models.json'))
+model_registry = ModelRegistry(MODELS_PATH)
 
 # Test nouns
 TEST_NOUNS = [
@@ -85,56 +75,87 @@ You: "ground up and in the freezer"
 Just give the punchline. Nothing else.
 """
 
-def call_llm(model_config, word):
-    """Call a single LLM and return metrics"""
+def provider_of(model_config):
+    """Provider prefix of an OpenRouter model id"""
+    return model_config['model'].split('/')[0]
+
+def percentile(values, p):
+    """Linear-interpolated percentile (p in 0-100)"""
+    values = sorted(values)
+    if not values:
+        return 0
+    k = (len(values) - 1) * p / 100
+    lo = int(k)
+    hi = min(lo + 1, len(values) - 1)
+    return values[lo] + (values[hi] - values[lo]) * (k - lo)
+
+async def call_llm(model_config, word, temperature=0.0, verbose=True):
+    """Call a single LLM (streaming, so we can time the first token) and return metrics"""
     start_time = time.time()
     timestamp = datetime.now().strftime("%H:%M:%S")
 
     try:
         prompt = f'I like my women like I like my {word}...'
-        print(f"[{timestamp}] [{model_config['name']}] Testing '{word}'...")
+        if verbose:
+            print(f"[{timestamp}] [{model_config['name']}] Testing '{word}'...")
 
-        params = {
-            "model": model_config['model'],
+        # Same model id and reasoning settings as the app sends - the thinking budget rides in
+        # extra_body.reasoning, it doesn't cap the output
+        params = model_registry.template(model_config)
+        params.update({
             "messages": [
                 {"role": "system", "content": SYSTEM_PROMPT},
                 {"role": "user", "content": prompt}
             ],
-            "temperature": 0.0,
+            "temperature": temperature,
             "max_tokens": 2000,
-            "extra_body": {
-                "usage": {"include": True}
-            }
-        }
-
-        # Add reasoning effort for OpenAI models (GPT-5)
-        if model_config.get("reasoning_effort"):
-            params["reasoning_effort"] = model_config["reasoning_effort"]
-        # Add reasoning max_tokens for Gemini models
-        elif model_config.get("reasoning_max_tokens") is not None:
-            params['extra_body'].update({'reasoning': {'max_tokens': model_config['reasoning_max_tokens']}})
-            params['max_tokens'] = model_config['reasoning_max_tokens']
-
-        response = client.chat.completions.create(**params)
+            "stream": True,
+        })
+
+        stream = await client.chat.completions.create(**params)
+
+        first_token_time = None
+        parts = []
+        usage = None
+        async for chunk in stream:
+            if chunk.choices:
+                delta = chunk.choices[0].delta
+                # Reasoning models stream their thinking first - that still counts as the first token
+                if first_token_time is None and (delta.content or getattr(delta, 'reasoning', None)):
+                    first_token_time = time.time()
+                if delta.content:
+                    parts.append(delta.content)
+            if getattr(chunk, 'usage', None):
+                usage = chunk.usage
 
         end_time = time.time()
         response_time = end_time - start_time
+        ttft = (first_token_time or end_time) - start_time
 
-        content = response.choices[0].message.content
+        content = ''.join(parts)
         if content:
             content = content.strip().strip('"').strip("'")
 
         # Extract token usage
-        usage = getattr(response, 'usage', None)
         completion_tokens = getattr(usage, 'completion_tokens', 0) if usage else 0
         reasoning_tokens = getattr(usage, 'reasoning_tokens', 0) if usage else 0
+        details = getattr(usage, 'completion_tokens_details', None) if usage else None
+        if not reasoning_tokens and details:
+            reasoning_tokens = getattr(details, 'reasoning_tokens', 0) or 0
+
+        # Decode speed - time after the first token
+        generation_time = response_time - ttft
+        tokens_per_sec = completion_tokens / generation_time if completion_tokens and generation_time > 0 else 0
 
-        print(f"[{model_config['name']}] → \"{content}\" ({response_time:.2f}s)")
+        if verbose:
+            print(f"[{model_config['name']}] → \"{content}\" ({response_time:.2f}s, TTFT {ttft:.2f}s)")
 
         return {
             'success': True,
             'response': content,
             'response_time': response_time,
+            'ttft': ttft,
+            'tokens_per_sec': tokens_per_sec,
             'completion_tokens': completion_tokens,
             'reasoning_tokens': reasoning_tokens,
             'error': None
@@ -147,127 +168,473 @@ def call_llm(model_config, word):
             'success': False,
             'response': None,
             'response_time': response_time,
+            'ttft': None,
+            'tokens_per_sec': 0,
             'completion_tokens': 0,
             'reasoning_tokens': 0,
             'error': str(e)[:200]
         }
 
-def benchmark_model(model_config, existing_results=None):
-    """Benchmark a single model across all test nouns"""
-    # Check if this model already has complete results
-    if existing_results and model_config['name'] in existing_results:
-        existing = existing_results[model_config['name']]
-        if existing.get('total_tests') == len(TEST_NOUNS) and existing.get('successful_tests') == len(TEST_NOUNS):
-            print(f"[{model_config['name']}] SKIPPED - already complete in benchmark_results.json")
-            return existing
-
-    results = []
-
-    for noun in TEST_NOUNS:
-        result = call_llm(model_config, noun)
-        results.append(result)
-
-    # Calculate stats
+def summarize_model(model_config, results):
+    """Aggregate one model's call results into its stats entry"""
     successful_results = [r for r in results if r['success']]
-    success_rate = len(successful_results) / len(results) * 100
+    success_rate = len(successful_results) / len(results) * 100 if results else 0
+
+    stats = {
+        'model_name': model_config['name'],
+        'model_id': model_config['model'],
+        'success_rate': success_rate,
+        'avg_response_time': 0,
+        'min_response_time': 0,
+        'max_response_time': 0,
+        'std_response_time': 0,
+        'p50_response_time': 0,
+        'p90_response_time': 0,
+        'p99_response_time': 0,
+        'avg_ttft': 0,
+        'p50_ttft': 0,
+        'avg_tokens_per_sec': 0,
+        'avg_completion_tokens': 0,
+        'avg_reasoning_tokens': 0,
+        'total_tests': len(results),
+        'successful_tests': len(successful_results),
+        'sample_responses': [],
+        'all_results': results
+    }
 
     if successful_results:
         response_times = [r['response_time'] for r in successful_results]
+        # Calls logged before streaming was added have no TTFT / speed
+        ttfts = [r['ttft'] for r in successful_results if r.get('ttft') is not None]
+        speeds = [r['tokens_per_sec'] for r in successful_results if r.get('tokens_per_sec')]
         completion_tokens = [r['completion_tokens'] for r in successful_results]
         reasoning_tokens = [r['reasoning_tokens'] for r in successful_results]
 
-        stats = {
-            'model_name': model_config['name'],
-            'model_id': model_config['model'],
-            'success_rate': success_rate,
+        stats.update({
             'avg_response_time': mean(response_times),
             'min_response_time': min(response_times),
             'max_response_time': max(response_times),
             'std_response_time': stdev(response_times) if len(response_times) > 1 else 0,
-            'avg_completion_tokens': mean(completion_tokens) if completion_tokens else 0,
-            'avg_reasoning_tokens': mean(reasoning_tokens) if reasoning_tokens else 0,
-            'total_tests': len(results),
-            'successful_tests': len(successful_results),
-            'sample_responses': [r['response'] for r in successful_results[:3]],
-            'all_results': results
-        }
-    else:
-        stats = {
-            'model_name': model_config['name'],
-            'model_id': model_config['model'],
-            'success_rate': 0,
-            'avg_response_time': 0,
-            'min_response_time': 0,
-            'max_response_time': 0,
-            'std_response_time': 0,
-            'avg_completion_tokens': 0,
-            'avg_reasoning_tokens': 0,
-            'total_tests': len(results),
-            'successful_tests': 0,
-            'sample_responses': [],
-            'all_results': results
-        }
+            'p50_response_time': percentile(response_times, 50),
+            'p90_response_time': percentile(response_times, 90),
+            'p99_response_time': percentile(response_times, 99),
+            'avg_ttft': mean(ttfts) if ttfts else 0,
+            'p50_ttft': percentile(ttfts, 50),
+            'avg_tokens_per_sec': mean(speeds) if speeds else 0,
+            'avg_completion_tokens': mean(completion_tokens),
+            'avg_reasoning_tokens': mean(reasoning_tokens),
+            'sample_responses': [r['response'] for r in successful_results[:3]]
+        })
 
-    print(f"[{model_config['name']}] DONE! {len(successful_results)}/{len(results)} successful")
     return stats
 
+def call_key(result):
+    """Resume granularity - one logged call per (model, noun, trial)"""
+    return (result['model_name'], result['noun'], result['trial'])
+
+def read_log(log_file):
+    """Read every logged call. A line cut off by a crash mid-write is skipped."""
+    entries = []
+    if not os.path.exists(log_file):
+        return entries
+    with open(log_file, 'r') as f:
+        for line in f:
+            try:
+                entries.append(json.loads(line))
+            except json.JSONDecodeError:
+                print(f"Skipping truncated line in {log_file}")
+    return entries
+
+def seed_log_from_summary(summary_file, log_file):
+    """Turn an old summary JSON (no call log yet) into log entries so those calls aren't re-run"""
+    with open(summary_file, 'r') as f:
+        existing_list = json.load(f)
+
+    with open(log_file, 'w') as f:
+        for stat in existing_list:
+            for i, result in enumerate(stat.get('all_results', [])):
+                entry = dict(result)
+                entry.setdefault('noun', TEST_NOUNS[i % len(TEST_NOUNS)])
+                entry.setdefault('trial', i // len(TEST_NOUNS))
+                entry['model_name'] = stat['model_name']
+                entry['model_id'] = stat['model_id']
+                f.write(json.dumps(entry) + '\n')
+    print(f"Seeded {log_file} from {summary_file}")
+
+def latest_results(entries):
+    """Latest logged result per (model, noun, trial) - a re-run replaces an earlier failure"""
+    latest = {}
+    for entry in entries:
+        latest[call_key(entry)] = entry
+    return latest
+
+def compact(log_file, output_file):
+    """Build the summary JSON (one stats entry per model) from the call log"""
+    by_model = {}
+    model_ids = {}
+    for entry in latest_results(read_log(log_file)).values():
+        by_model.setdefault(entry['model_name'], []).append(entry)
+        model_ids[entry['model_name']] = entry['model_id']
+
+    # Keep models.json order, then anything logged for models since removed from it
+    order = [m['name'] for m in model_registry.current()['models'] if m['name'] in by_model]
+    order += [name for name in by_model if name not in order]
+
+    all_stats = []
+    for name in order:
+        results = sorted(by_model[name], key=lambda r: (r['trial'], TEST_NOUNS.index(r['noun']) if r['noun'] in TEST_NOUNS else len(TEST_NOUNS)))
+        all_stats.append(summarize_model({'name': name, 'model': model_ids[name]}, results))
+
+    # Write-then-rename so a crash here can't leave a half-written summary
+    tmp_file = output_file + '.tmp'
+    with open(tmp_file, 'w') as f:
+        json.dump(all_stats, f, indent=2)
+    os.replace(tmp_file, output_file)
+    return all_stats
+
+async def benchmark_models(pending, warmup, concurrency, provider_concurrency, temperature, log, verbose=True):
+    """Run each model's pending (noun, trial) calls under global and per-provider limits.
+
+    `pending` is a list of (model_config, [(noun, trial), ...]).
+
+    Every finished call is appended to the log and fsynced before moving on, so a crash or
+    Ctrl-C loses at most the calls that were in flight.
+    """
+    global_limit = asyncio.Semaphore(concurrency)
+    provider_limits = {provider_of(m): asyncio.Semaphore(provider_concurrency) for m, _ in pending}
+
+    async def limited_call(model_config, noun):
+        async with global_limit, provider_limits[provider_of(model_config)]:
+            return await call_llm(model_config, noun, temperature, verbose)
+
+    async def logged_call(model_config, noun, trial):
+        result = await limited_call(model_config, noun)
+        result.update({'model_name': model_config['name'], 'model_id': model_config['model'],
+                       'noun': noun, 'trial': trial})
+        log.write(json.dumps(result) + '\n')
+        log.flush()
+        os.fsync(log.fileno())
+        return result
+
+    async def run_model(model_config, calls):
+        # Warm-up calls absorb connection setup and provider cold starts, and aren't recorded
+        for i in range(warmup):
+            await limited_call(model_config, TEST_NOUNS[i % len(TEST_NOUNS)])
+
+        results = await asyncio.gather(*(logged_call(model_config, noun, trial)
+                                         for noun, trial in calls))
+        successful = sum(1 for r in results if r['success'])
+        print(f"[{model_config['name']}] DONE! {successful}/{len(results)} successful")
+
+    await asyncio.gather(*(run_model(m, calls) for m, calls in pending))
+
 def print_results_table(all_stats):
     """Print formatted results table"""
-    print(f"\n\n{'='*120}")
+    print(f"\n\n{'='*130}")
     print("BENCHMARK RESULTS")
-    print(f"{'='*120}\n")
+    print(f"{'='*130}\n")
 
-    # Sort by avg response time
-    sorted_stats = sorted(all_stats, key=lambda x: x['avg_response_time'])
+    # Sort by median response time - means get dragged around by one slow call
+    sorted_stats = sorted(all_stats, key=lambda x: x.get('p50_response_time') or x['avg_response_time'])
 
     # Print header
-    print(f"{'Model':<25} {'Success':<8} {'Avg Time':<10} {'Min':<8} {'Max':<8} {'Std':<8} {'Comp Tokens':<12} {'Reasoning':<10}")
-    print(f"{'-'*25} {'-'*8} {'-'*10} {'-'*8} {'-'*8} {'-'*8} {'-'*12} {'-'*10}")
+    print(f"{'Model':<25} {'Success':<8} {'p50':<8} {'p90':<8} {'p99':<8} {'Avg':<8} {'TTFT':<8} {'Tok/s':<8} {'Comp Tokens':<12} {'Reasoning':<10}")
+    print(f"{'-'*25} {'-'*8} {'-'*8} {'-'*8} {'-'*8} {'-'*8} {'-'*8} {'-'*8} {'-'*12} {'-'*10}")
 
-    # Print rows
+    # Print rows (older saved entries may not have the percentile fields)
     for s in sorted_stats:
         print(f"{s['model_name']:<25} "
               f"{s['success_rate']:>6.0f}%  "
-              f"{s['avg_response_time']:>8.2f}s  "
-              f"{s['min_response_time']:>6.2f}s  "
-              f"{s['max_response_time']:>6.2f}s  "
-              f"{s['std_response_time']:>6.2f}s  "
+              f"{s.get('p50_response_time', 0):>6.2f}s  "
+              f"{s.get('p90_response_time', 0):>6.2f}s  "
+              f"{s.get('p99_response_time', 0):>6.2f}s  "
+              f"{s['avg_response_time']:>6.2f}s  "
+              f"{s.get('avg_ttft', 0):>6.2f}s  "
+              f"{s.get('avg_tokens_per_sec', 0):>7.1f}  "
               f"{s['avg_completion_tokens']:>10.1f}  "
               f"{s['avg_reasoning_tokens']:>10.1f}")
 
+    print(f"\n{'='*130}\n")
+
+def sample_suggestions(db_path, samples, mode=None, seed=0):
+    """Real suggestions drawn in proportion to play_count, without replacement.
+
+    The draw is split across modes by each mode's share of plays (or only `mode`). Streams the
+    table with weighted reservoir keys (u ** (1/w)), so memory is the sample size.
+    Returns [(suggestion_id, word, mode)].
+    """
+    rng = random.Random(seed)
+    db = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+    try:
+        plays = dict(db.execute(
+            "SELECT COALESCE(mode, 'women'), SUM(play_count) FROM suggestions WHERE play_count > 0 GROUP BY 1"
+        ).fetchall())
+        if mode:
+            plays = {mode: plays.get(mode, 0)}
+        total_plays = sum(plays.values())
+        if not total_plays:
+            raise SystemExit(f"No played suggestions in {db_path}")
+
+        sampled = []
+        for mode_name, mode_plays in sorted(plays.items()):
+            quota = round(samples * mode_plays / total_plays)
+            heap = []
+            rows = db.execute(
+                "SELECT id, word, play_count FROM suggestions WHERE play_count > 0 AND COALESCE(mode, 'women') = ?",
+                (mode_name,)
+            )
+            for suggestion_id, word, play_count in rows:
+                key = rng.random() ** (1.0 / play_count)
+                if len(heap) < quota:
+                    heapq.heappush(heap, (key, suggestion_id, word))
+                elif heap and key > heap[0][0]:
+                    heapq.heapreplace(heap, (key, suggestion_id, word))
+            sampled += [(suggestion_id, word, mode_name) for _, suggestion_id, word in heap]
+        return sampled
+    finally:
+        db.close()
+
+def incumbent_results(db_path, suggestion_ids, model_names):
+    """The production roster's recorded responses to the sampled suggestions, as replay results"""
+    db = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+    results = {}
+    try:
+        for start in range(0, len(suggestion_ids), 500):
+            ids = suggestion_ids[start:start + 500]
+            rows = db.execute(f'''
+                SELECT model_name, model_id, response_text, response_time, completion_tokens,
+                       reasoning_tokens, prompt_tokens, cost_usd
+                FROM responses
+                WHERE status = 'completed' AND suggestion_id IN ({','.join('?' * len(ids))})
+            ''', ids)
+            for name, model_id, text, response_time, completion, reasoning, prompt, cost in rows:
+                if name not in model_names:
+                    continue
+                results.setdefault(name, []).append({
+                    'model_name': name,
+                    'model_id': model_id,
+                    'success': bool(text) and not text.startswith('[Error'),
+                    'response': text,
+                    'response_time': response_time or 0.0,
+                    'completion_tokens': completion or 0,
+                    'reasoning_tokens': reasoning or 0,
+                    'prompt_tokens': prompt or 0,
+                    'cost_usd': cost or 0.0,
+                })
+    finally:
+        db.close()
+    return results
+
+def replay_candidates(app, models, sampled, concurrency, provider_concurrency, log, verbose=True):
+    """Run each model on every sampled suggestion through the app's own call_llm"""
+    provider_limits = {provider_of(m): threading.Semaphore(provider_concurrency) for m in models}
+    log_lock = threading.Lock()
+
+    def replay_call(model_config, suggestion_id, word, mode):
+        with provider_limits[provider_of(model_config)]:
+            result = app.call_llm(model_config, word, mode)
+        result.update({'suggestion_id': suggestion_id, 'word': word, 'mode': mode})
+        with log_lock:
+            log.write(json.dumps(result) + '\n')
+            log.flush()
+        if verbose:
+            print(f"[{model_config['name']}] {mode}/{word} → \"{result['response']}\" ({result['response_time']:.2f}s)")
+        return result
+
+    results = {}
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        futures = [executor.submit(replay_call, model, *suggestion) for model in models for suggestion in sampled]
+        for future in futures:
+            result = future.result()
+            results.setdefault(result['model_name'], []).append(result)
+    return results
+
+def summarize_replay(name, role, results):
+    """Latency percentiles, tokens and cost for one model's replay results"""
+    successful = [r for r in results if r['success']]
+    times = [r['response_time'] for r in successful]
+    costs = [r['cost_usd'] for r in successful]
+    return {
+        'model_name': name,
+        'role': role,
+        'calls': len(results),
+        'success_rate': len(successful) / len(results) * 100 if results else 0,
+        'p50_response_time': percentile(times, 50),
+        'p90_response_time': percentile(times, 90),
+        'p99_response_time': percentile(times, 99),
+        'avg_completion_tokens': mean(r['completion_tokens'] for r in successful) if successful else 0,
+        'avg_reasoning_tokens': mean(r['reasoning_tokens'] for r in successful) if successful else 0,
+        'avg_cost_usd': mean(costs) if costs else 0,
+    }
+
+def print_replay_table(summaries):
+    print(f"\n\n{'='*120}")
+    print("REPLAY RESULTS (production suggestions)")
+    print(f"{'='*120}\n")
+    print(f"{'Model':<25} {'Role':<10} {'Calls':<6} {'Success':<8} {'p50':<8} {'p90':<8} {'p99':<8} "
+          f"{'Comp Tokens':<12} {'Reasoning':<10} {'$/1k calls':<10}")
+    print(f"{'-'*25} {'-'*10} {'-'*6} {'-'*8} {'-'*8} {'-'*8} {'-'*8} {'-'*12} {'-'*10} {'-'*10}")
+    for s in sorted(summaries, key=lambda s: (s['role'] != 'incumbent', s['p50_response_time'])):
+        print(f"{s['model_name']:<25} {s['role']:<10} {s['calls']:>5}  "
+              f"{s['success_rate']:>6.0f}%  "
+              f"{s['p50_response_time']:>6.2f}s  "
+              f"{s['p90_response_time']:>6.2f}s  "
+              f"{s['p99_response_time']:>6.2f}s  "
+              f"{s['avg_completion_tokens']:>10.1f}  "
+              f"{s['avg_reasoning_tokens']:>10.1f}  "
+              f"{s['avg_cost_usd'] * 1000:>9.3f}")
     print(f"\n{'='*120}\n")
 
+def snapshot_db(db_path, workdir):
+    """Copy db_path into workdir with SQLite's online backup API (consistent while the app writes)"""
+    copy_path = os.path.join(workdir, 'comedy.db')
+    src = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+    dst = sqlite3.connect(copy_path)
+    try:
+        src.backup(dst)
+    finally:
+        dst.close()
+        src.close()
+    return copy_path
+
+def run_replay(args):
+    """Shadow replay: candidates vs the enabled roster on suggestions sampled from production"""
+    # Importing app migrates and writes to its DATABASE_PATH, so everything runs on a copy -
+    # --db itself is only ever opened read-only
+    workdir = tempfile.mkdtemp(prefix='replay-')
+    try:
+        print(f"Copying {args.db} to {workdir}...")
+        db_path = snapshot_db(args.db, workdir)
+        run_replay_on(args, db_path, workdir)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+def run_replay_on(args, db_path, workdir):
+    roster = model_registry.current()
+    if args.models:
+        candidates = [m for m in roster['models'] if m['name'] in args.models]
+    else:
+        candidates = [m for m in roster['models'] if not m['enabled']]
+    incumbents = set(roster['names'])
+
+    sampled = sample_suggestions(db_path, args.samples, args.mode, args.seed)
+    by_mode = Counter(mode for _, _, mode in sampled)
+    print(f"Sampled {len(sampled)} suggestions from {args.db} "
+          f"({', '.join(f'{n} {mode}' for mode, n in sorted(by_mode.items()))}), weighted by play count")
+    print(f"Candidates: {', '.join(m['name'] for m in candidates) or 'none'}\n")
+
+    # The app's call_llm, prompts and learned token caps - exactly what production would send
+    from db_benchmark import load_app
+    os.environ['ANALYTICS_DB_PATH'] = os.path.join(workdir, 'comedy.analytics.db')
+    os.environ['RATE_LIMIT_DB_PATH'] = os.path.join(workdir, 'ratelimits.db')
+    app = load_app(db_path)
+
+    with open(args.replay_log, 'a') as log:
+        candidate_results = replay_candidates(app, candidates, sampled, args.concurrency,
+                                              args.provider_concurrency, log, verbose=not args.quiet)
+    recorded = incumbent_results(db_path, [suggestion_id for suggestion_id, _, _ in sampled], incumbents)
+
+    summaries = [summarize_replay(name, 'incumbent', results) for name, results in recorded.items()]
+    summaries += [summarize_replay(name, 'candidate', results) for name, results in candidate_results.items()]
+    print_replay_table(summaries)
+
+    with open(args.replay_output, 'w') as f:
+        json.dump({'db': args.db, 'samples': len(sampled), 'by_mode': by_mode, 'seed': args.seed,
+                   'ran_at': datetime.now().isoformat(), 'models': summaries}, f, indent=2)
+    print(f"Replay results saved to {args.replay_output}, every call in {args.replay_log}")
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Benchmark candidate models on the I-like-my-women prompt")
+    parser.add_argument('--trials', type=int, default=DEFAULT_TRIALS, help="calls per (model, noun)")
+    parser.add_argument('--warmup', type=int, default=DEFAULT_WARMUP, help="unrecorded warm-up calls per model")
+    parser.add_argument('--concurrency', type=int, default=DEFAULT_CONCURRENCY, help="max calls in flight overall")
+    parser.add_argument('--provider-concurrency', type=int, default=DEFAULT_PROVIDER_CONCURRENCY,
+                        help="max calls in flight per provider")
+    parser.add_argument('--temperature', type=float, default=0.0)
+    parser.add_argument('--models', nargs='+', help="only benchmark these model names")
+    parser.add_argument('--enabled-only', action='store_true', help="only models enabled in the app")
+    parser.add_argument('--force', action='store_true', help="re-run calls that already succeeded")
+    parser.add_argument('--compact', action='store_true', help="only rebuild the summary JSON from the call log")
+    parser.add_argument('--quiet', action='store_true', help="don't print every call")
+    parser.add_argument('--log', default='benchmark_results.jsonl', help="append-only log of every call")
+    parser.add_argument('--output', default='benchmark_results.json', help="summary built from the log")
+
+    replay = parser.add_argument_group('replay', "run candidates on real suggestions and compare with the roster")
+    replay.add_argument('--replay', action='store_true',
+                        help="sample suggestions from --db instead of TEST_NOUNS (default models: the disabled ones)")
+    replay.add_argument('--db', default=os.getenv('DATABASE_PATH', 'comedy.db'),
+                        help="database to sample (only read - the replay runs on a temporary copy)")
+    replay.add_argument('--samples', type=int, default=200, help="suggestions to draw, weighted by play count")
+    replay.add_argument('--mode', choices=['women', 'men'], help="only this mode (default: both, by share of plays)")
+    replay.add_argument('--seed', type=int, default=0)
+    replay.add_argument('--replay-log', default='replay_results.jsonl', help="every replayed call")
+    replay.add_argument('--replay-output', default='replay_results.json')
+    return parser.parse_args()
+
 def main():
+    args = parse_args()
+    if args.replay:
+        run_replay(args)
+        return
+    roster = model_registry.current()
+    models = [m for m in roster['enabled' if args.enabled_only else 'models']
+              if not args.models or m['name'] in args.models]
+
+    # First run with a call log - carry over the calls in an existing summary
+    if not os.path.exists(args.log) and os.path.exists(args.output):
+        try:
+            seed_log_from_summary(args.output, args.log)
+        except (json.JSONDecodeError, KeyError):
+            print(f"Could not load existing results from {args.output}\n")
+
+    if args.compact:
+        all_stats = compact(args.log, args.output)
+        print_results_table(all_stats)
+        print(f"Results saved to {args.output}")
+        return
+
+    # Resume: only calls without a successful logged result still need running
+    done = set()
+    if not args.force:
+        done = {key for key, entry in latest_results(read_log(args.log)).items() if entry['success']}
+        print(f"Loaded {len(done)} successful calls from {args.log}\n")
+
+    pending = []
+    for model in models:
+        calls = [(noun, trial) for trial in range(args.trials) for noun in TEST_NOUNS
+                 if (model['name'], noun, trial) not in done]
+        if calls:
+            pending.append((model, calls))
+        else:
+            print(f"[{model['name']}] SKIPPED - already complete in {args.log}")
+
+    total_calls = sum(len(calls) for _, calls in pending)
     print("Starting benchmark...")
-    print(f"Testing {len(MODELS)} models against {len(TEST_NOUNS)} nouns IN PARALLEL")
+    print(f"Running {total_calls} calls for {len(pending)} models ({len(TEST_NOUNS)} nouns x {args.trials} trials, "
+          f"concurrency {args.concurrency}, {args.provider_concurrency} per provider)")
     print(f"Test nouns: {', '.join(TEST_NOUNS)}\n")
 
-    # Load existing results if available
-    existing_results = {}
-    output_file = 'benchmark_results.json'
-    if os.path.exists(output_file):
-        try:
-            with open(output_file, 'r') as f:
-                existing_list = json.load(f)
-                # Convert list to dict keyed by model name
-                existing_results = {stat['model_name']: stat for stat in existing_list}
-                print(f"Loaded {len(existing_results)} existing results from {output_file}\n")
-        except:
-            print(f"Could not load existing results from {output_file}\n")
-
-    # Run all models in parallel
-    with ThreadPoolExecutor(max_workers=len(MODELS)) as executor:
-        futures = [executor.submit(benchmark_model, model, existing_results) for model in MODELS]
-        all_stats = [future.result() for future in futures]
-
-    # Print results table
-    print_results_table(all_stats)
-
-    # Save to JSON
-    with open(output_file, 'w') as f:
-        json.dump(all_stats, f, indent=2)
-
-    print(f"Results saved to {output_file}")
+    start = time.time()
+    try:
+        with open(args.log, 'a+') as log:
+            # A crash mid-write leaves a partial last line - start ours on a fresh one
+            if log.tell() > 0:
+                log.seek(log.tell() - 1)
+                if log.read(1) != '\n':
+                    log.write('\n')
+            asyncio.run(benchmark_models(
+                pending, args.warmup, args.concurrency, args.provider_concurrency,
+                args.temperature, log, verbose=not args.quiet
+            ))
+        print(f"\nRan {total_calls} calls in {time.time() - start:.1f}s")
+    except KeyboardInterrupt:
+        print(f"\nInterrupted - finished calls are saved in {args.log}, re-run to resume")
+
+    # Compact whatever we have, even after an interrupt
+    all_stats = compact(args.log, args.output)
+    model_names = {m['name'] for m in models}
+    print_results_table([s for s in all_stats if s['model_name'] in model_names])
+    print(f"Results saved to {args.output}")
 
 if __name__ == '__main__':
     main()
@@ -0,0 +1,308 @@
+"""
+Synthetic-data benchmark for the hot SQL paths.
+
+`generate` builds a comedy.db at scale with realistic distributions: Zipf-popular suggestions,
+one response per model each, and games whose votes follow per-model strength plus a small
+position bias. `run` times the hot endpoint handlers (stats, costs, cached compete, status,
+search, leaderboard) and every SELECT they issue, and saves the results so versions can be compared.
+
+    python db_benchmark.py generate --scale full --db /tmp/bench.db
+    python db_benchmark.py run --db /tmp/bench.db --output before.json
+    python db_benchmark.py compare before.json after.json
+
+`run` plays cached games against the DB, so it adds a few hundred games - use a generated copy,
+never the production comedy.db.
+"""
+import os
+import sys
+import json
+import math
+import time
+import uuid
+import random
+import sqlite3
+import argparse
+import subprocess
+from datetime import datetime, timedelta, timezone
+from statistics import mean
+
+# Sizes per scale preset. "full" is 100k suggestions, 1.2M responses and 10M games + contestants.
+SCALES = {
+    'small': {'suggestions': 1000, 'games': 20000},
+    'medium': {'suggestions': 10000, 'games': 200000},
+    'full': {'suggestions': 100000, 'games': 2000000},
+}
+MEN_SHARE = 0.2  # share of suggestions on the men. subdomain
+VOTED_SHARE = 0.35  # share of games that get a vote
+NONE_SHARE = 0.1  # share of votes that are "none of the above"
+POSITION_BIAS = [1.15, 1.0, 0.95, 0.9]  # people pick the top card a bit more
+HISTORY_DAYS = 90
+CHUNK = 50000
+
+def zipf_weights(n, s=1.1):
+    return [1 / (rank ** s) for rank in range(1, n + 1)]
+
+def timestamp(days_ago):
+    return (datetime.now(timezone.utc) - timedelta(days=days_ago)).strftime('%Y-%m-%d %H:%M:%S')
+
+def load_app(db_path):
+    """Import app.py against the given DB (creates the schema if needed)"""
+    os.environ['DATABASE_PATH'] = db_path
+    # No background jobs writing to the DB while it is measured (pruning would delete its games)
+    os.environ['MAINTENANCE_INTERVAL'] = '0'
+    os.environ['RATINGS_REFIT_INTERVAL'] = '0'
+    # Stats and costs read the live DB, so QueryRecorder traces their queries and no snapshot
+    # backup runs during the timed requests
+    os.environ['ANALYTICS_SNAPSHOT_INTERVAL'] = '0'
+    os.environ.setdefault('OPENROUTER_API_KEY', 'db-benchmark')
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    import app
+    return app
+
+def generate(db_path, suggestions, games, seed):
+    """Build a synthetic comedy.db"""
+    if os.path.exists(db_path):
+        raise SystemExit(f"{db_path} already exists - refusing to overwrite it")
+
+    random.seed(seed)
+    app = load_app(db_path)  # creates the schema
+    models = app.model_registry.current()['enabled']
+    strengths = [random.lognormvariate(0, 0.4) for _ in models]
+    latencies = [random.uniform(0.6, 2.5) for _ in models]
+
+    conn = sqlite3.connect(db_path)
+    conn.execute('PRAGMA synchronous=OFF')
+    start = time.time()
+
+    print(f"Generating {suggestions} suggestions x {len(models)} responses...")
+    suggestion_rows = []
+    for i in range(suggestions):
+        mode = 'men' if random.random() < MEN_SHARE else 'women'
+        word = f"word {i}"
+        suggestion_rows.append((i + 1, word, mode, app.canonicalize_word(word), timestamp(random.uniform(0, HISTORY_DAYS))))
+    conn.executemany('INSERT INTO suggestions (id, word, mode, canonical_word, created_at) VALUES (?, ?, ?, ?, ?)',
+                     suggestion_rows)
+
+    def response_rows():
+        for sid, _, mode, _, created_at in suggestion_rows:
+            for m, model in enumerate(models):
+                completion = random.randint(3, 14)
+                yield (sid, model['name'], model['model'], mode, 'completed', f"answer {sid}-{m}",
+                       random.lognormvariate(math.log(latencies[m]), 0.35), completion, 0, 330,
+                       (330 * 0.3 + completion * 1.2) * 1e-6, created_at)
+
+    conn.executemany(
+        '''INSERT INTO responses (suggestion_id, model_name, model_id, mode, status, response_text, response_time,
+                                  completion_tokens, reasoning_tokens, prompt_tokens, cost_usd, created_at)
+           VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)''',
+        response_rows()
+    )
+    conn.commit()
+    print(f"  done in {time.time() - start:.0f}s")
+
+    # Responses were inserted in order, so suggestion s / model m has id (s - 1) * len(models) + m + 1
+    print(f"Generating {games} games x 4 contestants...")
+    popularity = zipf_weights(suggestions)
+    random.shuffle(popularity)
+    play_counts = [0] * (suggestions + 1)
+
+    for chunk_start in range(0, games, CHUNK):
+        n = min(CHUNK, games - chunk_start)
+        picks = random.choices(range(1, suggestions + 1), weights=popularity, k=n)
+        game_rows, contestant_rows = [], []
+        for sid in picks:
+            play_counts[sid] += 1
+            game_id = str(uuid.uuid4())
+            lineup = random.sample(range(len(models)), 4)
+            winner, voter = None, None
+            if random.random() < VOTED_SHARE:
+                voter = f"session-{random.randint(1, suggestions // 2 + 1)}"
+                if random.random() >= NONE_SHARE:
+                    weights = [strengths[m] * POSITION_BIAS[pos] for pos, m in enumerate(lineup)]
+                    winner = (sid - 1) * len(models) + random.choices(lineup, weights=weights)[0] + 1
+            game_rows.append((game_id, sid, suggestion_rows[sid - 1][2], winner,
+                              '127.0.0.1' if voter else None, voter, timestamp(random.uniform(0, HISTORY_DAYS))))
+            for pos, m in enumerate(lineup):
+                contestant_rows.append((game_id, (sid - 1) * len(models) + m + 1, pos))
+
+        conn.executemany('''INSERT INTO games (id, suggestion_id, mode, winning_response_id, voter_ip, voter_session, created_at)
+                            VALUES (?, ?, ?, ?, ?, ?, ?)''', game_rows)
+        conn.executemany('INSERT INTO game_contestants (game_id, response_id, display_position) VALUES (?, ?, ?)',
+                         contestant_rows)
+        conn.commit()
+        print(f"  {chunk_start + n}/{games} games ({time.time() - start:.0f}s)")
+
+    conn.executemany('UPDATE suggestions SET play_count = ? WHERE id = ?',
+                     [(count, sid) for sid, count in enumerate(play_counts) if sid])
+    # The games bypassed vote(), so fill the leaderboard's rollups the way init_db backfills them
+    rollups = app.rebuild_vote_rollups(conn)
+    conn.commit()
+    print(f"  {rollups} vote_rollups rows")
+    conn.execute('ANALYZE')
+    conn.close()
+    print(f"Built {db_path} ({os.path.getsize(db_path) / 1e6:.0f} MB) in {time.time() - start:.0f}s")
+
+class QueryRecorder:
+    """Collects the SELECTs a handler runs, with parameters bound, via SQLite's trace callback"""
+
+    def __init__(self, app):
+        self.statements = []
+        self.original_get_db = app.get_db
+
+        def traced_get_db():
+            conn = self.original_get_db()
+            conn.set_trace_callback(self.trace)
+            return conn
+        self.traced_get_db = traced_get_db
+
+    def trace(self, statement):
+        # Skip FTS5's own shadow-table lookups
+        if statement.lstrip().upper().startswith(('SELECT', 'WITH')) and "'main'." not in statement:
+            self.statements.append(statement)
+
+def timings(samples):
+    samples = sorted(samples)
+    return {
+        'runs': len(samples),
+        'min_ms': samples[0] * 1000,
+        'p50_ms': samples[len(samples) // 2] * 1000,
+        'p90_ms': samples[min(len(samples) - 1, int(len(samples) * 0.9))] * 1000,
+        'mean_ms': mean(samples) * 1000
+    }
+
+def run(db_path, repeats):
+    """Time each hot handler, then each distinct SELECT it ran"""
+    app = load_app(db_path)
+    client = app.app.test_client()
+    conn = sqlite3.connect(db_path)
+
+    # Inputs for the handlers: a cached word and game ids spread across the table
+    popular_word = conn.execute(
+        "SELECT word FROM suggestions WHERE mode = 'women' ORDER BY play_count DESC LIMIT 1"
+    ).fetchone()[0]
+    max_rowid = conn.execute('SELECT MAX(rowid) FROM games').fetchone()[0] or 1
+    game_ids = [row[0] for row in conn.execute(
+        'SELECT id FROM games WHERE rowid IN ({})'.format(','.join('?' * 50)),
+        [random.randint(1, max_rowid) for _ in range(50)]
+    )]
+
+    handlers = {
+        'stats': lambda: client.get('/api/stats'),
+        'costs': lambda: client.get('/api/costs'),
+        'compete_cached': lambda: client.post('/api/compete', json={'word': popular_word}),
+        'compete_status': lambda: client.get(f"/api/compete/status?game_id={random.choice(game_ids)}"),
+        'suggestion_search': lambda: client.get('/api/suggestions/search?q=wo'),
+        'leaderboard_7d': lambda: client.get('/api/leaderboard?window=7d'),
+    }
+
+    recorder = QueryRecorder(app)
+    results = {'handlers': {}, 'queries': {}}
+    for name, handler in handlers.items():
+        handler()  # warm caches and lazy state (spend accountant, token budgets)
+
+        samples = []
+        for _ in range(repeats):
+            start = time.perf_counter()
+            response = handler()
+            samples.append(time.perf_counter() - start)
+            if response.status_code != 200:
+                raise SystemExit(f"{name} returned {response.status_code}: {response.get_data(as_text=True)[:200]}")
+        results['handlers'][name] = timings(samples)
+        print(f"{name:<20} p50 {results['handlers'][name]['p50_ms']:>9.2f}ms  p90 {results['handlers'][name]['p90_ms']:>9.2f}ms")
+
+        # Re-run each SELECT on its own to attribute the handler's time
+        recorder.statements = []
+        app.get_db = recorder.traced_get_db
+        try:
+            handler()
+        finally:
+            app.get_db = recorder.original_get_db
+        for i, statement in enumerate(dict.fromkeys(recorder.statements)):
+            samples = []
+            for _ in range(repeats):
+                start = time.perf_counter()
+                conn.execute(statement).fetchall()
+                samples.append(time.perf_counter() - start)
+            key = f"{name}#{i}"
+            results['queries'][key] = dict(timings(samples), sql=' '.join(statement.split())[:300])
+            print(f"  {key:<18} p50 {results['queries'][key]['p50_ms']:>9.2f}ms  {results['queries'][key]['sql'][:70]}")
+
+    results['meta'] = {
+        'db': db_path,
+        'git_rev': git_rev(),
+        'ran_at': datetime.now(timezone.utc).isoformat(),
+        'sqlite_version': sqlite3.sqlite_version,
+        'repeats': repeats,
+        'rows': {table: conn.execute(f'SELECT COUNT(*) FROM {table}').fetchone()[0]
+                 for table in ('suggestions', 'responses', 'games', 'game_contestants')}
+    }
+    conn.close()
+    return results
+
+def git_rev():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], text=True,
+                                       stderr=subprocess.DEVNULL).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def compare(before_file, after_file, threshold):
+    """Print p50 changes per handler/query and flag regressions"""
+    with open(before_file) as f:
+        before = json.load(f)
+    with open(after_file) as f:
+        after = json.load(f)
+
+    print(f"{before['meta']['git_rev']} -> {after['meta']['git_rev']}\n")
+    regressions = 0
+    for section in ('handlers', 'queries'):
+        for name in sorted(set(before[section]) | set(after[section])):
+            if name not in before[section] or name not in after[section]:
+                print(f"{name:<22} only in {'after' if name in after[section] else 'before'}")
+                continue
+            old, new = before[section][name]['p50_ms'], after[section][name]['p50_ms']
+            ratio = new / old if old else float('inf')
+            flag = ''
+            if ratio > 1 + threshold:
+                flag = '  <-- REGRESSION'
+                regressions += 1
+            print(f"{name:<22} {old:>9.2f}ms -> {new:>9.2f}ms  ({ratio:>5.2f}x){flag}")
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description="Synthetic-data benchmark for the hot SQL paths")
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    gen = sub.add_parser('generate', help="build a synthetic comedy.db")
+    gen.add_argument('--db', required=True)
+    gen.add_argument('--scale', choices=SCALES, default='small')
+    gen.add_argument('--suggestions', type=int, help="override the preset")
+    gen.add_argument('--games', type=int, help="override the preset")
+    gen.add_argument('--seed', type=int, default=42)
+
+    bench = sub.add_parser('run', help="time hot handlers and queries")
+    bench.add_argument('--db', required=True)
+    bench.add_argument('--repeats', type=int, default=20)
+    bench.add_argument('--output', help="save results as JSON (default db_benchmark_<rev>.json)")
+
+    cmp = sub.add_parser('compare', help="compare two saved runs")
+    cmp.add_argument('before')
+    cmp.add_argument('after')
+    cmp.add_argument('--threshold', type=float, default=0.2, help="flag p50 slowdowns above this fraction")
+
+    args = parser.parse_args()
+
+    if args.command == 'generate':
+        scale = SCALES[args.scale]
+        generate(args.db, args.suggestions or scale['suggestions'], args.games or scale['games'], args.seed)
+    elif args.command == 'run':
+        results = run(args.db, args.repeats)
+        output = args.output or f"db_benchmark_{results['meta']['git_rev'] or 'local'}.json"
+        with open(output, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"\nResults saved to {output}")
+    elif args.command == 'compare':
+        sys.exit(1 if compare(args.before, args.after, args.threshold) else 0)
+
+if __name__ == '__main__':
+    main()
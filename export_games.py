@@ -0,0 +1,204 @@
+"""
+Export every voted game as gzip-compressed NDJSON, for offline research.
+
+One line per game: id, time, mode, suggestion, the contestants in display order (model, response
+text, whether it won) and the winning response (null for "none of the above"). Voter IPs and
+sessions are left out. Games are read in keyset-paginated chunks ordered by (created_at, id), each
+chunk its own short read, so memory stays flat and the exporter never holds a snapshot open against
+the live app's writes. Every line carries a `cursor`; pass the last one back as --after to resume.
+Cursors are built from the game itself, not its rowid, so they still hold after a full VACUUM.
+
+Also served by the app at GET /api/export (needs ADMIN_TOKEN). From the command line:
+
+    python export_games.py --db comedy.db --output games.ndjson.gz --since 2025-10-01 --mode women
+    python export_games.py --db comedy.db --output games.ndjson.gz --resume   # continue an interrupted run
+"""
+import os
+import sys
+import json
+import time
+import zlib
+import sqlite3
+import argparse
+from datetime import datetime, timezone
+
+EXPORT_CHUNK_SIZE = 1000  # games per read
+EXPORT_CHUNK_PAUSE = 0.01  # seconds between chunks, so a long export yields to the live app
+
+def parse_bound(value):
+    """A date or ISO timestamp as created_at's 'YYYY-MM-DD HH:MM:SS' (UTC). Raises ValueError"""
+    dt = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    if dt.tzinfo:
+        dt = dt.astimezone(timezone.utc).replace(tzinfo=None)
+    return dt.strftime('%Y-%m-%d %H:%M:%S')
+
+def make_cursor(created_at, game_id):
+    return f"{created_at}|{game_id}"
+
+def parse_cursor(value):
+    """(created_at, game_id) from a cursor, or None for an empty one. Raises ValueError"""
+    if not value:
+        return None
+    created_at, sep, game_id = str(value).rpartition('|')
+    if not sep or not created_at or not game_id:
+        raise ValueError(f"not an export cursor: {value!r}")
+    return created_at, game_id
+
+def iter_export_chunks(db, since=None, until=None, mode=None, after=None, chunk_size=EXPORT_CHUNK_SIZE):
+    """Yield lists of exported games (dicts) in (created_at, id) order, chunk_size games at a time.
+
+    since/until (from parse_bound) filter on the game's created_at, until exclusive; after is a previous cursor.
+    """
+    filters = ['g.voter_session IS NOT NULL']
+    params = []
+    if since:
+        filters.append('g.created_at >= ?')
+        params.append(since)
+    if until:
+        filters.append('g.created_at < ?')
+        params.append(until)
+    if mode:
+        filters.append('g.mode = ?')
+        params.append(mode)
+    where = ' AND '.join(filters)
+
+    cursor = parse_cursor(after)
+    while True:
+        keyset = '(g.created_at, g.id) > (?, ?) AND ' if cursor else ''
+        games = db.execute(f'''
+            SELECT g.id, g.created_at, g.mode, g.winning_response_id, s.word
+            FROM games g
+            JOIN suggestions s ON s.id = g.suggestion_id
+            WHERE {keyset}{where}
+            ORDER BY g.created_at, g.id
+            LIMIT ?
+        ''', list(cursor or ()) + params + [chunk_size]).fetchall()
+        if not games:
+            return
+
+        contestants = {}
+        placeholders = ','.join('?' * len(games))
+        rows = db.execute(f'''
+            SELECT gc.game_id, gc.display_position, r.id, r.model_name, r.model_id, r.response_text
+            FROM game_contestants gc
+            JOIN responses r ON r.id = gc.response_id
+            WHERE gc.game_id IN ({placeholders})
+            ORDER BY gc.game_id, gc.display_position
+        ''', [game[0] for game in games])
+        for game_id, position, response_id, model_name, model_id, text in rows:
+            contestants.setdefault(game_id, []).append({
+                'position': position,
+                'response_id': response_id,
+                'model_name': model_name,
+                'model_id': model_id,
+                'response': text,
+            })
+
+        chunk = []
+        for game_id, created_at, game_mode, winner, word in games:
+            lineup = contestants.get(game_id, [])
+            for contestant in lineup:
+                contestant['won'] = contestant['response_id'] == winner
+            chunk.append({
+                'cursor': make_cursor(created_at, game_id),
+                'game_id': game_id,
+                'created_at': created_at,
+                'mode': game_mode,
+                'suggestion': word,
+                'winning_response_id': winner,
+                'contestants': lineup,
+            })
+        yield chunk
+        cursor = (games[-1][1], games[-1][0])
+
+def ndjson(chunk):
+    return ''.join(json.dumps(game, ensure_ascii=False) + '\n' for game in chunk).encode('utf-8')
+
+def iter_gzip_ndjson(chunks, pause=EXPORT_CHUNK_PAUSE):
+    """One gzip stream over the chunks, flushed after each so a client sees progress"""
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)  # wbits 31 = gzip container
+    for chunk in chunks:
+        yield compressor.compress(ndjson(chunk)) + compressor.flush(zlib.Z_SYNC_FLUSH)
+        if pause:
+            time.sleep(pause)
+    yield compressor.flush()
+
+def cursor_path(output):
+    return output + '.cursor'
+
+def save_cursor(output, state):
+    """Replace the cursor file atomically - a crash leaves the old one or the new one, never half of each"""
+    tmp = cursor_path(output) + '.tmp'
+    with open(tmp, 'w') as f:
+        json.dump(state, f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, cursor_path(output))
+
+def export_to_file(db, output, resume=False, after=None, chunk_size=EXPORT_CHUNK_SIZE, **filters):
+    """Append complete gzip members to `output`, one per chunk, recording the cursor after each.
+
+    Concatenated members are still one valid .gz file. The cursor records the output's length
+    after the last finished chunk, and resume truncates back to it first, so a chunk (or half a
+    gzip member) written before a crash but after the last cursor is dropped and written again.
+    Returns (games written, last cursor).
+    """
+    if resume:
+        if not os.path.exists(cursor_path(output)):
+            raise SystemExit(f"No saved cursor for {output} - nothing to resume")
+        with open(cursor_path(output), 'r') as f:
+            saved = json.load(f)
+        after, offset, filters = saved['after'], saved['offset'], saved['filters']
+        if os.path.getsize(output) < offset:
+            raise SystemExit(f"{output} is shorter than its saved cursor - start a new export")
+        os.truncate(output, offset)
+    elif os.path.exists(output):
+        raise SystemExit(f"{output} already exists - use --resume to continue it")
+    else:
+        offset = 0
+        save_cursor(output, {'after': after, 'offset': offset, 'filters': filters})
+
+    written = 0
+    with open(output, 'ab') as out:
+        for chunk in iter_export_chunks(db, after=after, chunk_size=chunk_size, **filters):
+            compressor = zlib.compressobj(6, zlib.DEFLATED, 31)
+            out.write(compressor.compress(ndjson(chunk)) + compressor.flush())
+            out.flush()
+            os.fsync(out.fileno())
+            after, offset = chunk[-1]['cursor'], out.tell()
+            save_cursor(output, {'after': after, 'offset': offset, 'filters': filters})
+            written += len(chunk)
+            print(f"\r{written} games exported (cursor {after})", end='', file=sys.stderr)
+            time.sleep(EXPORT_CHUNK_PAUSE)
+    print(file=sys.stderr)
+    return written, after
+
+def main():
+    parser = argparse.ArgumentParser(description="Export voted games as gzip-compressed NDJSON")
+    parser.add_argument('--db', default=os.getenv('DATABASE_PATH', 'comedy.db'))
+    parser.add_argument('--output', required=True, help="file to write, e.g. games.ndjson.gz")
+    parser.add_argument('--since', type=parse_bound, help="only games created at or after this date/time (UTC)")
+    parser.add_argument('--until', type=parse_bound, help="only games created before this")
+    parser.add_argument('--mode', choices=['women', 'men'])
+    parser.add_argument('--after', help="start after this cursor")
+    parser.add_argument('--resume', action='store_true',
+                        help="continue from the cursor saved next to --output (with the original filters)")
+    parser.add_argument('--chunk-size', type=int, default=EXPORT_CHUNK_SIZE)
+    args = parser.parse_args()
+    try:
+        parse_cursor(args.after)
+    except ValueError as e:
+        parser.error(str(e))
+
+    # Read-only, so a mistyped --db can't create an empty database
+    db = sqlite3.connect(f"file:{args.db}?mode=ro", uri=True, timeout=10.0)
+    try:
+        written, cursor = export_to_file(db, args.output, resume=args.resume, after=args.after,
+                                         since=args.since, until=args.until, mode=args.mode,
+                                         chunk_size=args.chunk_size)
+    finally:
+        db.close()
+    print(f"Exported {written} games to {args.output}, last cursor {cursor}")
+
+if __name__ == '__main__':
+    main()
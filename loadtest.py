@@ -0,0 +1,333 @@
+"""
+Load test for the compete -> status -> vote flow.
+
+Each virtual player replays what app.js does: POST /api/compete with a cached or brand new
+word, poll /api/compete/status every 500ms until the contestants are ready, think for a bit,
+then POST /api/vote. Reports throughput, per-endpoint latency percentiles, SQLite lock errors
+and worker thread counts.
+
+With --spawn it starts mock_openrouter.py and the Procfile's gunicorn command against a
+throwaway database, so nothing touches real credits or comedy.db. Requests carry X-Bypass-Secret
+so rate limits don't cut the test short: --spawn makes up a secret, against a running app pass
+the one it was started with (--bypass-secret, or RATE_LIMIT_BYPASS_SECRET in the environment):
+
+    python loadtest.py --spawn --users 50 --duration 120
+    python loadtest.py --url http://localhost:5001 --users 10   # an already running app
+"""
+import os
+import re
+import sys
+import json
+import time
+import uuid
+import random
+import shutil
+import argparse
+import tempfile
+import threading
+import subprocess
+import urllib.request
+import urllib.error
+import http.cookiejar
+from collections import defaultdict, Counter
+
+# Words every session may pick - after the first play they hit the cached path
+CACHED_WORDS = [
+    "coffee", "pizza", "tacos", "wine", "cats", "dogs", "hippos", "books", "storms",
+    "toasters", "fireworks", "dice", "secrets", "lawyers", "anime", "beaches"
+]
+
+POLL_INTERVAL = 0.5  # same as app.js
+POLL_TIMEOUT = 120
+
+def percentile(values, p):
+    """Nearest-rank percentile (p in 0-100)"""
+    values = sorted(values)
+    if not values:
+        return None
+    return values[min(len(values) - 1, int(len(values) * p / 100))]
+
+class Metrics:
+    """Thread-safe latency and outcome counters, keyed by endpoint"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.latencies = defaultdict(list)
+        self.statuses = defaultdict(Counter)
+        self.db_locked = Counter()
+        self.sessions = Counter()
+        self.health = {}  # pid -> latest /api/health sample
+        self.max_threads = {}  # pid -> max threads seen
+
+    def record(self, endpoint, latency, status, db_locked=False):
+        with self.lock:
+            self.latencies[endpoint].append(latency)
+            self.statuses[endpoint][status] += 1
+            if db_locked:
+                self.db_locked[endpoint] += 1
+
+    def session_done(self, outcome):
+        with self.lock:
+            self.sessions[outcome] += 1
+
+    def record_health(self, sample):
+        with self.lock:
+            pid = sample['pid']
+            self.health[pid] = sample
+            self.max_threads[pid] = max(self.max_threads.get(pid, 0), sample['threads'])
+
+class Player:
+    """One browser session - keeps its own cookie jar so votes carry a voter session"""
+
+    def __init__(self, base_url, metrics, cached_ratio, think_time, bypass_secret=None):
+        self.base_url = base_url
+        self.headers = {'Content-Type': 'application/json'}
+        if bypass_secret:
+            self.headers['X-Bypass-Secret'] = bypass_secret
+        self.metrics = metrics
+        self.cached_ratio = cached_ratio
+        self.think_time = think_time
+        self.opener = urllib.request.build_opener(
+            urllib.request.HTTPCookieProcessor(http.cookiejar.CookieJar())
+        )
+
+    def request(self, endpoint, path, payload=None):
+        """Timed request. Returns (status, parsed JSON or None)"""
+        data = json.dumps(payload).encode() if payload is not None else None
+        req = urllib.request.Request(self.base_url + path, data=data, headers=self.headers)
+        start = time.time()
+        try:
+            with self.opener.open(req, timeout=60) as resp:
+                status, body = resp.status, resp.read()
+        except urllib.error.HTTPError as e:
+            status, body = e.code, e.read()
+        except (urllib.error.URLError, OSError) as e:
+            self.metrics.record(endpoint, time.time() - start, f"conn:{type(e).__name__}")
+            return None, None
+
+        try:
+            parsed = json.loads(body)
+        except ValueError:
+            parsed = None
+        db_locked = isinstance(parsed, dict) and parsed.get('db_locked', False)
+        self.metrics.record(endpoint, time.time() - start, status, db_locked)
+        return status, parsed
+
+    def play_round(self):
+        if random.random() < self.cached_ratio:
+            word = random.choice(CACHED_WORDS)
+        else:
+            word = f"loadtest {uuid.uuid4().hex[:10]}"
+
+        status, game = self.request('compete', '/api/compete', {'word': word})
+        if status != 200 or not game:
+            self.metrics.session_done('compete_failed')
+            time.sleep(1.0)  # don't spin on a failing server
+            return
+
+        # New words: poll like the frontend until the 4 contestants are in
+        contestant_ids = game.get('contestant_ids')
+        if not game.get('ready'):
+            deadline = time.time() + POLL_TIMEOUT
+            while time.time() < deadline:
+                time.sleep(POLL_INTERVAL)
+                status, state = self.request('status', f"/api/compete/status?game_id={game['game_id']}")
+                if status == 200 and state.get('ready'):
+                    contestant_ids = state['contestant_ids']
+                    break
+            else:
+                self.metrics.session_done('poll_timeout')
+                return
+
+        time.sleep(random.uniform(*self.think_time))
+
+        # Mostly pick a card, sometimes "none of the above"
+        choice = [random.choice(contestant_ids)] if contestant_ids and random.random() < 0.9 else None
+        status, _ = self.request('vote', '/api/vote', {'game_id': game['game_id'], 'response_ids': choice})
+        self.metrics.session_done('voted' if status == 200 else 'vote_failed')
+
+def run_player(base_url, metrics, stop_at, cached_ratio, think_time, bypass_secret=None):
+    player = Player(base_url, metrics, cached_ratio, think_time, bypass_secret)
+    while time.time() < stop_at:
+        player.play_round()
+
+def sample_health(base_url, metrics, stop_event):
+    """Poll /api/health - each sample comes from whichever gunicorn worker answers"""
+    while not stop_event.is_set():
+        try:
+            with urllib.request.urlopen(base_url + '/api/health', timeout=5) as resp:
+                metrics.record_health(json.loads(resp.read()))
+        except (urllib.error.URLError, OSError, ValueError):
+            pass
+        stop_event.wait(1.0)
+
+def procfile_command(port):
+    """The Procfile's web command with $PORT filled in"""
+    with open('Procfile', 'r') as f:
+        for line in f:
+            if line.startswith('web:'):
+                return line[len('web:'):].strip().replace('$PORT', str(port)).split()
+    raise RuntimeError("No web: line in Procfile")
+
+def wait_for(url, timeout=30):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            urllib.request.urlopen(url, timeout=2)
+            return
+        except urllib.error.HTTPError:
+            return
+        except (urllib.error.URLError, OSError):
+            time.sleep(0.2)
+    raise RuntimeError(f"{url} did not come up within {timeout}s")
+
+def spawn_stack(port, mock_port, latency_scale, error_rate, bypass_secret):
+    """Start the mock LLM backend and the Procfile's gunicorn on a throwaway DB"""
+    workdir = tempfile.mkdtemp(prefix='loadtest-')
+    mock_cmd = [sys.executable, 'mock_openrouter.py', '--port', str(mock_port),
+                '--latency-scale', str(latency_scale)]
+    if error_rate is not None:
+        mock_cmd += ['--error-rate', str(error_rate)]
+    mock = subprocess.Popen(mock_cmd, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+    env = dict(os.environ,
+               OPENROUTER_BASE_URL=f"http://127.0.0.1:{mock_port}/api/v1",
+               OPENROUTER_API_KEY='loadtest',
+               RATE_LIMIT_BYPASS_SECRET=bypass_secret,
+               DATABASE_PATH=os.path.join(workdir, 'comedy.db'))
+    server = subprocess.Popen(procfile_command(port), env=env,
+                              stdout=open(os.path.join(workdir, 'server.log'), 'w'), stderr=subprocess.STDOUT)
+
+    wait_for(f"http://127.0.0.1:{mock_port}/mock/stats")
+    wait_for(f"http://127.0.0.1:{port}/api/health")
+    print(f"Spawned gunicorn (Procfile) on :{port} and mock OpenRouter on :{mock_port}, logs in {workdir}")
+    return [server, mock], workdir
+
+def count_lock_messages(workdir):
+    """Lock errors the server logged from background threads (they never reach a client)"""
+    path = os.path.join(workdir, 'server.log')
+    if not os.path.exists(path):
+        return 0
+    with open(path, 'r', errors='replace') as f:
+        return sum(1 for line in f if re.search(r'database is locked', line))
+
+def report(metrics, elapsed, users):
+    print(f"\n{'='*100}")
+    print(f"LOAD TEST RESULTS - {users} users for {elapsed:.0f}s")
+    print(f"{'='*100}\n")
+
+    total_requests = sum(len(v) for v in metrics.latencies.values())
+    total_sessions = sum(metrics.sessions.values())
+    print(f"Rounds: {total_sessions} ({total_sessions / elapsed:.2f}/s)   Requests: {total_requests} ({total_requests / elapsed:.1f}/s)")
+    print(f"Round outcomes: {dict(metrics.sessions)}\n")
+
+    print(f"{'Endpoint':<10} {'Count':<8} {'p50':<9} {'p90':<9} {'p99':<9} {'Max':<9} {'DB locked':<10} Statuses")
+    print(f"{'-'*10} {'-'*8} {'-'*9} {'-'*9} {'-'*9} {'-'*9} {'-'*10} {'-'*20}")
+    summary = {}
+    for endpoint in ('compete', 'status', 'vote'):
+        latencies = metrics.latencies.get(endpoint, [])
+        if not latencies:
+            continue
+        row = {
+            'count': len(latencies),
+            'p50': percentile(latencies, 50),
+            'p90': percentile(latencies, 90),
+            'p99': percentile(latencies, 99),
+            'max': max(latencies),
+            'db_locked': metrics.db_locked[endpoint],
+            'statuses': {str(k): v for k, v in metrics.statuses[endpoint].items()}
+        }
+        summary[endpoint] = row
+        print(f"{endpoint:<10} {row['count']:<8} {row['p50']*1000:>6.0f}ms  {row['p90']*1000:>6.0f}ms  "
+              f"{row['p99']*1000:>6.0f}ms  {row['max']*1000:>6.0f}ms  {row['db_locked']:<10} {row['statuses']}")
+
+    print("\nWorkers (from /api/health):")
+    for pid, sample in sorted(metrics.health.items()):
+        print(f"  pid {pid}: max threads {metrics.max_threads[pid]}, "
+              f"db lock errors {sample.get('db_lock_errors', 0)}, llm in flight {sample['llm']['in_flight']}")
+    print(f"\n{'='*100}\n")
+
+    return {
+        'users': users,
+        'elapsed': elapsed,
+        'rounds': total_sessions,
+        'rounds_per_sec': total_sessions / elapsed,
+        'requests_per_sec': total_requests / elapsed,
+        'outcomes': dict(metrics.sessions),
+        'endpoints': summary,
+        'workers': {str(pid): {'max_threads': metrics.max_threads[pid], 'db_lock_errors': s.get('db_lock_errors', 0)}
+                    for pid, s in metrics.health.items()}
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay player sessions against the app")
+    parser.add_argument('--url', default='http://127.0.0.1:5001', help="app to test (ignored with --spawn)")
+    parser.add_argument('--spawn', action='store_true', help="start the Procfile gunicorn + mock LLM backend")
+    parser.add_argument('--port', type=int, default=5055, help="gunicorn port with --spawn")
+    parser.add_argument('--mock-port', type=int, default=8055, help="mock OpenRouter port with --spawn")
+    parser.add_argument('--latency-scale', type=float, default=1.0, help="mock LLM latency multiplier")
+    parser.add_argument('--error-rate', type=float, help="force a mock LLM error rate")
+    parser.add_argument('--users', type=int, default=20, help="concurrent players")
+    parser.add_argument('--duration', type=float, default=60, help="seconds to run")
+    parser.add_argument('--ramp', type=float, default=5, help="seconds to start all players over")
+    parser.add_argument('--cached-ratio', type=float, default=0.8, help="share of rounds that use a cached word")
+    parser.add_argument('--think-time', type=float, nargs=2, default=[1.0, 4.0], metavar=('MIN', 'MAX'),
+                        help="seconds a player reads the cards before voting")
+    parser.add_argument('--bypass-secret', default=os.getenv('RATE_LIMIT_BYPASS_SECRET'),
+                        help="the app's RATE_LIMIT_BYPASS_SECRET, sent as X-Bypass-Secret")
+    parser.add_argument('--output', help="save the summary as JSON")
+    args = parser.parse_args()
+
+    processes, workdir = [], None
+    base_url = args.url.rstrip('/')
+    if args.spawn:
+        args.bypass_secret = args.bypass_secret or uuid.uuid4().hex
+        processes, workdir = spawn_stack(args.port, args.mock_port, args.latency_scale, args.error_rate,
+                                         args.bypass_secret)
+        base_url = f"http://127.0.0.1:{args.port}"
+
+    metrics = Metrics()
+    stop_event = threading.Event()
+    sampler = threading.Thread(target=sample_health, args=(base_url, metrics, stop_event), daemon=True)
+    sampler.start()
+
+    try:
+        start = time.time()
+        stop_at = start + args.duration
+        players = []
+        for i in range(args.users):
+            t = threading.Thread(target=run_player, daemon=True,
+                                 args=(base_url, metrics, stop_at, args.cached_ratio, tuple(args.think_time),
+                                       args.bypass_secret))
+            t.start()
+            players.append(t)
+            time.sleep(args.ramp / max(args.users, 1))
+
+        # Let in-progress rounds finish (they can run past stop_at by one poll timeout at most)
+        for t in players:
+            t.join(timeout=max(0, stop_at - time.time()) + POLL_TIMEOUT)
+        elapsed = time.time() - start
+    except KeyboardInterrupt:
+        elapsed = time.time() - start
+        print("\nInterrupted - reporting what we have")
+    finally:
+        stop_event.set()
+
+    summary = report(metrics, elapsed, args.users)
+
+    if workdir:
+        summary['server_log_lock_errors'] = count_lock_messages(workdir)
+        print(f"'database is locked' lines in server log: {summary['server_log_lock_errors']}")
+        for p in processes:
+            p.terminate()
+        for p in processes:
+            p.wait(timeout=10)
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(summary, f, indent=2)
+        print(f"Results saved to {args.output}")
+
+if __name__ == '__main__':
+    main()
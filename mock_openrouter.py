@@ -0,0 +1,240 @@
+"""
+Local stand-in for the OpenRouter chat-completions API, for load testing without spending credits.
+
+Each model gets a latency distribution, error rate, empty-response rate and token usage fitted
+from benchmark_results.json, so the app sees production-shaped behavior. Point the app or the
+benchmark at it through the base URL:
+
+    python mock_openrouter.py --port 8001
+    OPENROUTER_BASE_URL=http://localhost:8001/api/v1 python app.py
+"""
+import os
+import json
+import math
+import time
+import uuid
+import random
+import argparse
+import threading
+from statistics import mean, median
+from flask import Flask, request, jsonify, Response
+
+# Used for models with no benchmark data and anything a profile doesn't set
+DEFAULT_PROFILE = {
+    'latency_mean': 1.5,  # seconds, whole call
+    'latency_std': 0.5,
+    'ttft_fraction': 0.6,  # share of the latency spent before the first token
+    'error_rate': 0.0,
+    'empty_rate': 0.0,
+    'completion_tokens': [6],  # sampled per call
+    'reasoning_tokens': [0],
+    'responses': ["hot", "black", "with a few pumps of cream", "ground up and in the freezer"],
+    'prompt_price': 0.3e-6,  # USD per token
+    'completion_price': 1.2e-6
+}
+
+app = Flask(__name__)
+profiles = {}  # model_id -> profile
+settings = {'latency_scale': 1.0, 'error_rate': None}
+counters = {'requests': 0, 'errors': 0, 'in_flight': 0}
+counters_lock = threading.Lock()
+
+def profile_from_benchmark(stats):
+    """Fit a profile from one model's entry in benchmark_results.json"""
+    results = stats.get('all_results', [])
+    successful = [r for r in results if r.get('success')]
+    profile = dict(DEFAULT_PROFILE)
+    profile['error_rate'] = 1 - stats.get('success_rate', 100) / 100
+
+    if successful:
+        times = [r['response_time'] for r in successful]
+        profile['latency_mean'] = mean(times)
+        profile['latency_std'] = stats.get('std_response_time') or profile['latency_mean'] * 0.3
+        profile['empty_rate'] = sum(1 for r in successful if not r.get('response')) / len(successful)
+        profile['completion_tokens'] = [r['completion_tokens'] or 1 for r in successful]
+        profile['reasoning_tokens'] = [r.get('reasoning_tokens') or 0 for r in successful]
+        texts = [r['response'] for r in successful if r.get('response')]
+        if texts:
+            profile['responses'] = texts
+
+        ttfts = [r['ttft'] for r in successful if r.get('ttft') is not None]
+        if ttfts:
+            profile['ttft_fraction'] = min(0.95, mean(ttfts) / profile['latency_mean'])
+
+    return profile
+
+def load_profiles(benchmark_file, config_file=None):
+    """Profiles from benchmark results, then per-model overrides from an optional JSON config.
+
+    The config maps model ids (or "default") to any DEFAULT_PROFILE keys, e.g.
+    {"default": {"error_rate": 0.05}, "openai/gpt-4.1": {"latency_mean": 4.0}}
+    """
+    loaded = {}
+    if os.path.exists(benchmark_file):
+        with open(benchmark_file, 'r') as f:
+            for stats in json.load(f):
+                loaded[stats['model_id']] = profile_from_benchmark(stats)
+        print(f"Loaded {len(loaded)} model profiles from {benchmark_file}")
+
+    # Unknown models behave like a typical benchmarked one
+    if loaded:
+        DEFAULT_PROFILE['latency_mean'] = median(p['latency_mean'] for p in loaded.values())
+        DEFAULT_PROFILE['latency_std'] = median(p['latency_std'] for p in loaded.values())
+
+    if config_file:
+        with open(config_file, 'r') as f:
+            overrides = json.load(f)
+        DEFAULT_PROFILE.update(overrides.pop('default', {}))
+        for model_id, override in overrides.items():
+            loaded.setdefault(model_id, dict(DEFAULT_PROFILE)).update(override)
+
+    return loaded
+
+def sample_latency(profile):
+    """Lognormal with the profile's mean and std"""
+    m = profile['latency_mean'] * settings['latency_scale']
+    sd = profile['latency_std'] * settings['latency_scale']
+    if m <= 0:
+        return 0.0
+    sigma2 = math.log(1 + (sd / m) ** 2)
+    return random.lognormvariate(math.log(m) - sigma2 / 2, math.sqrt(sigma2))
+
+def error_response(status, message):
+    return jsonify({'error': {'code': status, 'message': message}}), status
+
+@app.route('/api/v1/chat/completions', methods=['POST'])
+def chat_completions():
+    body = request.get_json(force=True)
+    model_id = body.get('model', '')
+    profile = profiles.get(model_id, DEFAULT_PROFILE)
+
+    with counters_lock:
+        counters['requests'] += 1
+
+    latency = sample_latency(profile)
+    error_rate = settings['error_rate'] if settings['error_rate'] is not None else profile['error_rate']
+
+    # Failures still take a while on the real API
+    if random.random() < error_rate:
+        time.sleep(latency * random.uniform(0.1, 1.0))
+        with counters_lock:
+            counters['errors'] += 1
+        return error_response(random.choice([429, 502, 503]), f"Mock upstream error for {model_id}")
+
+    content = '' if random.random() < profile['empty_rate'] else random.choice(profile['responses'])
+    completion_tokens = random.choice(profile['completion_tokens'])
+    reasoning_tokens = random.choice(profile['reasoning_tokens'])
+    finish_reason = 'stop'
+
+    # Honor the caller's output cap like the real API does
+    max_tokens = body.get('max_tokens')
+    if max_tokens and completion_tokens > max_tokens:
+        completion_tokens = max_tokens
+        finish_reason = 'length'
+        if reasoning_tokens >= max_tokens:
+            content = ''
+
+    prompt_text = ''.join(m.get('content') or '' for m in body.get('messages', []))
+    prompt_tokens = max(1, len(prompt_text) // 4)
+    usage = {
+        'prompt_tokens': prompt_tokens,
+        'completion_tokens': completion_tokens,
+        'total_tokens': prompt_tokens + completion_tokens,
+        'completion_tokens_details': {'reasoning_tokens': reasoning_tokens},
+        'cost': prompt_tokens * profile['prompt_price'] + completion_tokens * profile['completion_price']
+    }
+    completion_id = f"gen-mock-{uuid.uuid4().hex[:12]}"
+    created = int(time.time())
+
+    if body.get('stream'):
+        return Response(stream_completion(completion_id, created, model_id, content, usage, finish_reason, latency, profile),
+                        mimetype='text/event-stream')
+
+    with counters_lock:
+        counters['in_flight'] += 1
+    try:
+        time.sleep(latency)
+    finally:
+        with counters_lock:
+            counters['in_flight'] -= 1
+
+    return jsonify({
+        'id': completion_id,
+        'object': 'chat.completion',
+        'created': created,
+        'model': model_id,
+        'provider': 'Mock',
+        'choices': [{
+            'index': 0,
+            'message': {'role': 'assistant', 'content': content},
+            'finish_reason': finish_reason
+        }],
+        'usage': usage
+    })
+
+def stream_completion(completion_id, created, model_id, content, usage, finish_reason, latency, profile):
+    """SSE chunks: wait out the TTFT, spread the words over the rest, then usage and [DONE]"""
+    def chunk(delta, finish=None, chunk_usage=None):
+        payload = {
+            'id': completion_id,
+            'object': 'chat.completion.chunk',
+            'created': created,
+            'model': model_id,
+            'choices': [{'index': 0, 'delta': delta, 'finish_reason': finish}]
+        }
+        if chunk_usage:
+            payload['usage'] = chunk_usage
+        return f"data: {json.dumps(payload)}\n\n"
+
+    with counters_lock:
+        counters['in_flight'] += 1
+    try:
+        ttft = latency * profile['ttft_fraction']
+        time.sleep(ttft)
+
+        words = content.split(' ') if content else ['']
+        per_word = (latency - ttft) / len(words)
+        yield chunk({'role': 'assistant', 'content': words[0]})
+        for word in words[1:]:
+            time.sleep(per_word)
+            yield chunk({'content': ' ' + word})
+
+        yield chunk({}, finish=finish_reason)
+        yield chunk({}, chunk_usage=usage)
+        yield "data: [DONE]\n\n"
+    finally:
+        with counters_lock:
+            counters['in_flight'] -= 1
+
+@app.route('/api/v1/models', methods=['GET'])
+def list_models():
+    return jsonify({'data': [{'id': model_id} for model_id in profiles]})
+
+@app.route('/mock/stats', methods=['GET'])
+def mock_stats():
+    """Request/error counters, so a load test can check what actually reached 'upstream'"""
+    with counters_lock:
+        return jsonify(dict(counters))
+
+def main():
+    parser = argparse.ArgumentParser(description="Mock OpenRouter chat-completions server")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8001)
+    parser.add_argument('--benchmark', default='benchmark_results.json', help="fit model profiles from this file")
+    parser.add_argument('--config', help="JSON file of per-model profile overrides")
+    parser.add_argument('--latency-scale', type=float, default=1.0, help="multiply every latency, e.g. 0 for no delay")
+    parser.add_argument('--error-rate', type=float, help="force this error rate for every model")
+    parser.add_argument('--seed', type=int, help="random seed for reproducible runs")
+    args = parser.parse_args()
+
+    if args.seed is not None:
+        random.seed(args.seed)
+    settings['latency_scale'] = args.latency_scale
+    settings['error_rate'] = args.error_rate
+    profiles.update(load_profiles(args.benchmark, args.config))
+
+    print(f"Mock OpenRouter listening on http://{args.host}:{args.port}/api/v1")
+    app.run(host=args.host, port=args.port, threaded=True)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,148 @@
+"""
+Model roster shared by app.py and benchmark.py, loaded from models.json.
+
+Each entry has a display name, an OpenRouter model id and optional reasoning settings;
+"enabled": false keeps a model in the benchmark but out of new games. The file is validated
+as a whole, and a bad edit never replaces a good roster - the previous one stays in use.
+
+The registry re-checks the file's mtime every few seconds, so every gunicorn worker picks up
+an edit on its own without a restart. SIGHUP forces an immediate reload where we own the signal
+(the dev server, benchmark.py); under gunicorn the master uses SIGHUP to restart workers, so edit
+the file instead, or run `flask reload-models` to validate it and nudge the workers.
+"""
+import os
+import json
+import time
+import signal
+import threading
+
+REASONING_EFFORTS = ('minimal', 'low', 'medium', 'high')
+MODEL_FIELDS = {'name', 'model', 'enabled', 'reasoning_effort', 'reasoning_max_tokens', 'note'}
+
+def validate_models(entries):
+    """Check a parsed models.json list. Returns the models with defaults filled in, raises ValueError"""
+    if not isinstance(entries, list) or not entries:
+        raise ValueError("'models' must be a non-empty list")
+
+    models = []
+    names = set()
+    for i, entry in enumerate(entries):
+        where = f"models[{i}]"
+        if not isinstance(entry, dict):
+            raise ValueError(f"{where}: expected an object")
+        unknown = set(entry) - MODEL_FIELDS
+        if unknown:
+            raise ValueError(f"{where}: unknown field(s) {', '.join(sorted(unknown))}")
+        for field in ('name', 'model'):
+            if not isinstance(entry.get(field), str) or not entry[field].strip():
+                raise ValueError(f"{where}: '{field}' must be a non-empty string")
+        if '/' not in entry['model']:
+            raise ValueError(f"{where}: model id '{entry['model']}' should look like provider/model")
+        if entry['name'] in names:
+            raise ValueError(f"{where}: duplicate name '{entry['name']}'")
+        names.add(entry['name'])
+
+        if not isinstance(entry.get('enabled', True), bool):
+            raise ValueError(f"{where}: 'enabled' must be true or false")
+        effort = entry.get('reasoning_effort')
+        if effort is not None and effort not in REASONING_EFFORTS:
+            raise ValueError(f"{where}: 'reasoning_effort' must be one of {', '.join(REASONING_EFFORTS)}")
+        max_tokens = entry.get('reasoning_max_tokens')
+        if max_tokens is not None and (isinstance(max_tokens, bool) or not isinstance(max_tokens, int) or max_tokens < 0):
+            raise ValueError(f"{where}: 'reasoning_max_tokens' must be a non-negative integer")
+        if effort is not None and max_tokens is not None:
+            raise ValueError(f"{where}: set reasoning_effort or reasoning_max_tokens, not both")
+
+        models.append(dict(entry, enabled=entry.get('enabled', True)))
+
+    if not any(m['enabled'] for m in models):
+        raise ValueError("at least one model must be enabled")
+    return models
+
+def request_template(model):
+    """The per-model part of a chat.completions request: model id and reasoning settings"""
+    params = {'model': model['model'], 'extra_body': {'usage': {'include': True}}}
+    # OpenAI models (GPT-5) take the effort as a top-level param
+    if model.get('reasoning_effort'):
+        params['reasoning_effort'] = model['reasoning_effort']
+    # Gemini takes a thinking budget
+    elif model.get('reasoning_max_tokens') is not None:
+        params['extra_body']['reasoning'] = {'max_tokens': model['reasoning_max_tokens']}
+    return params
+
+def load_roster(path):
+    """Read and validate models.json into a roster dict (treat it as read-only)"""
+    with open(path, 'r') as f:
+        try:
+            data = json.load(f)
+        except json.JSONDecodeError as e:
+            raise ValueError(f"invalid JSON: {e}")
+    if not isinstance(data, dict):
+        raise ValueError("expected an object with a 'models' list")
+    models = validate_models(data.get('models'))
+    enabled = [m for m in models if m['enabled']]
+    return {
+        'models': models,
+        'enabled': enabled,
+        'names': [m['name'] for m in enabled],
+        'templates': {m['name']: request_template(m) for m in models},
+        'loaded_at': time.time(),
+    }
+
+class ModelRegistry:
+    """The current roster, swapped in whole on reload so readers never see half an update"""
+
+    def __init__(self, path, check_interval=5.0):
+        self.path = path
+        self.check_interval = check_interval
+        self.lock = threading.Lock()
+        self.mtime = os.stat(path).st_mtime_ns
+        self.roster = load_roster(path)  # a broken file at startup is fatal
+        self.checked_at = time.time()
+        self.reload_error = None
+
+    def reload(self, force=False):
+        """Load the file again if it changed. Returns True if a new roster was swapped in"""
+        with self.lock:
+            self.checked_at = time.time()
+            try:
+                mtime = os.stat(self.path).st_mtime_ns
+                if mtime == self.mtime and not force:
+                    return False
+                self.mtime = mtime  # a broken version is reported once, not on every check
+                roster = load_roster(self.path)
+            except (OSError, ValueError) as e:
+                self.reload_error = str(e)
+                print(f"Warning: keeping the current model roster, {self.path} is invalid: {e}")
+                return False
+            self.roster = roster
+            self.reload_error = None
+            print(f"Loaded {len(roster['enabled'])}/{len(roster['models'])} enabled models from {self.path}")
+            return True
+
+    def current(self):
+        """The roster, re-checking the file at most every check_interval seconds"""
+        if time.time() - self.checked_at > self.check_interval:
+            self.reload()
+        return self.roster
+
+    def template(self, model):
+        """A fresh copy of a model's request params, safe to add to"""
+        template = self.current()['templates'].get(model['name']) or request_template(model)
+        return dict(template, extra_body={**template['extra_body']})
+
+    def install_signal_handler(self, signum=signal.SIGHUP):
+        """Reload on a signal (main thread only - signal.signal refuses anywhere else)"""
+        # Off the signal handler, which could otherwise interrupt a reload holding the lock
+        signal.signal(signum, lambda *_: threading.Thread(target=self.reload, kwargs={'force': True},
+                                                          daemon=True).start())
+
+    def status(self):
+        roster = self.roster
+        return {
+            'path': self.path,
+            'enabled': roster['names'],
+            'models': len(roster['models']),
+            'loaded_at': roster['loaded_at'],
+            'reload_error': self.reload_error
+        }
@@ -0,0 +1,102 @@
+"""
+Cold-start benchmark: how long a fresh process takes before it can serve.
+
+Measures `import app` in a fresh interpreter (median of --repeats), then time-to-first-response
+of the Procfile's gunicorn command: once against a brand new database (full migration) and
+once against the same, already migrated database. Each run appends one JSON line to
+startup_results.jsonl with the git revision, so a regression shows up as a jump in that file:
+
+    python startup_benchmark.py
+    python startup_benchmark.py --repeats 10 --db /tmp/bench.db   # warm start against a big DB
+"""
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import tempfile
+import subprocess
+from datetime import datetime, timezone
+from statistics import median
+
+from loadtest import procfile_command, wait_for
+from db_benchmark import git_rev
+
+def time_import(repeats, env):
+    """Median wall time of `python -c 'import app'` in a fresh interpreter"""
+    samples = []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        subprocess.run([sys.executable, '-c', 'import app'], env=env, check=True,
+                       stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        samples.append(time.perf_counter() - started)
+    return median(samples)
+
+def time_first_response(port, env, log_path, timeout):
+    """Seconds from spawning gunicorn until /api/health answers"""
+    with open(log_path, 'a') as log:
+        started = time.perf_counter()
+        server = subprocess.Popen(procfile_command(port), env=env, stdout=log, stderr=subprocess.STDOUT)
+        try:
+            wait_for(f"http://127.0.0.1:{port}/api/health", timeout=timeout)
+            return time.perf_counter() - started
+        finally:
+            server.terminate()
+            server.wait(timeout=30)
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure import time and time-to-first-response")
+    parser.add_argument('--repeats', type=int, default=5, help="runs per measurement (median is kept)")
+    parser.add_argument('--port', type=int, default=5066)
+    parser.add_argument('--db', help="existing database to copy for the warm start (default: the cold one)")
+    parser.add_argument('--timeout', type=float, default=60)
+    parser.add_argument('--output', default='startup_results.jsonl')
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix='startup-')
+    db_path = os.path.join(workdir, 'comedy.db')
+    log_path = os.path.join(workdir, 'server.log')
+    env = dict(os.environ, OPENROUTER_API_KEY=os.getenv('OPENROUTER_API_KEY', 'startup-benchmark'),
+               DATABASE_PATH=db_path, ANALYTICS_DB_PATH=os.path.join(workdir, 'comedy.analytics.db'))
+
+    try:
+        cold, warm = [], []
+        for _ in range(args.repeats):
+            for path in (db_path, db_path + '-wal', db_path + '-shm'):
+                if os.path.exists(path):
+                    os.remove(path)
+            cold.append(time_first_response(args.port, env, log_path, args.timeout))
+
+        if args.db:
+            shutil.copy(args.db, db_path)
+        for _ in range(args.repeats):
+            warm.append(time_first_response(args.port, env, log_path, args.timeout))
+
+        # After the warm runs, so the import sees a migrated DB like a real restart would
+        import_seconds = time_import(args.repeats, env)
+    except Exception:
+        print(f"Server log: {log_path}")
+        raise
+
+    result = {
+        'git_rev': git_rev(),
+        'ran_at': datetime.now(timezone.utc).isoformat(),
+        'python': sys.version.split()[0],
+        'repeats': args.repeats,
+        'warm_db': args.db,
+        'import_ms': round(import_seconds * 1000, 1),
+        'first_response_cold_ms': round(median(cold) * 1000, 1),
+        'first_response_warm_ms': round(median(warm) * 1000, 1),
+    }
+    shutil.rmtree(workdir, ignore_errors=True)
+
+    print(f"import app:                   {result['import_ms']:8.1f} ms")
+    print(f"first response (new DB):      {result['first_response_cold_ms']:8.1f} ms")
+    print(f"first response (migrated DB): {result['first_response_warm_ms']:8.1f} ms")
+    with open(args.output, 'a') as f:
+        f.write(json.dumps(result) + '\n')
+    print(f"\nAppended to {args.output}")
+
+if __name__ == '__main__':
+    main()
@@ -2,6 +2,7 @@ let currentData = null;
 let selectedCard = null;
 let otherResponses = [];  // Store other (non-contestant) responses
 let pollInterval = null;  // Store polling interval so we can clear it on reset
+let nextGame = null;  // Prepared game fetched while the player votes - played instantly if they pick its word
 
 // Retry helper for transient network errors
 async function fetchWithRetry(url, options = {}, maxRetries = 3) {
@@ -185,11 +186,73 @@ document.fonts.ready.then(() => {
 
 input.addEventListener('input', updateWiggleDisplay);
 
+// Autocomplete - offer already-played (cached, instant) words first
+const wordSuggestions = document.getElementById('word-suggestions');
+const suggestionCache = new Map();  // query -> list of words
+let suggestionTimer = null;
+
+async function updateWordSuggestions() {
+    const query = input.value.trim();
+    if (query.length < 2) {
+        wordSuggestions.innerHTML = '';
+        return;
+    }
+
+    let words = suggestionCache.get(query);
+    if (!words) {
+        try {
+            const response = await fetch(`/api/suggestions/search?q=${encodeURIComponent(query)}`);
+            if (!response.ok) return;
+            const data = await response.json();
+            words = data.results.map(r => r.word);
+            suggestionCache.set(query, words);
+        } catch (error) {
+            return;  // Autocomplete is best-effort
+        }
+    }
+
+    // Input may have changed while we were waiting
+    if (input.value.trim() !== query) return;
+
+    wordSuggestions.innerHTML = '';
+    words.forEach(word => {
+        const option = document.createElement('option');
+        option.value = word;
+        wordSuggestions.appendChild(option);
+    });
+}
+
+input.addEventListener('input', () => {
+    clearTimeout(suggestionTimer);
+    suggestionTimer = setTimeout(updateWordSuggestions, 150);
+});
+
 // Allow clicking on wiggle display to focus input
 wiggleDisplay.addEventListener('click', () => {
     input.focus();
 });
 
+// Fetch a ready-to-play cached game in the background (during the vote animation)
+async function prefetchNextGame() {
+    nextGame = null;
+    try {
+        const exclude = currentData ? currentData.word : '';
+        const response = await fetch(`/api/games/next?exclude=${encodeURIComponent(exclude)}`);
+        if (response.status === 200) {
+            nextGame = await response.json();
+        }
+    } catch (error) {
+        console.warn('Could not prefetch next game:', error);
+    }
+}
+
+function takePrefetchedGame(word) {
+    if (!nextGame || nextGame.word.toLowerCase() !== word.toLowerCase()) return null;
+    const game = nextGame;
+    nextGame = null;
+    return game;
+}
+
 // Reset functionality
 function resetGame() {
     // Clear cards
@@ -221,8 +284,11 @@ function resetGame() {
     // Navigate back to home page
     window.history.pushState({}, '', '/');
 
-    // Set new random word
-    input.value = randomWords[Math.floor(Math.random() * randomWords.length)];
+    // Set new random word - the prefetched one if there is one, so submitting it is instant
+    // (clicking random again moves on to a random word)
+    input.value = nextGame && nextGame.word !== input.value
+        ? nextGame.word
+        : randomWords[Math.floor(Math.random() * randomWords.length)];
     updateWiggleDisplay();
 
     // Focus input
@@ -343,24 +409,38 @@ async function showAnswers() {
     selectedCard = null;
 
     try {
-        const response = await fetchWithRetry('/api/compete', {
-            method: 'POST',
-            headers: { 'Content-Type': 'application/json' },
-            body: JSON.stringify({ word })
-        });
+        const prefetched = takePrefetchedGame(word);
+        if (prefetched) {
+            currentData = prefetched;
+        } else {
+            const response = await fetchWithRetry('/api/compete', {
+                method: 'POST',
+                headers: { 'Content-Type': 'application/json' },
+                body: JSON.stringify({ word })
+            });
 
-        // Check if response is ok
-        if (!response.ok) {
-            throw new Error(`Server returned ${response.status}: ${response.statusText}`);
-        }
+            // Check if response is ok (prefer the server's own error message)
+            if (!response.ok) {
+                const errorData = await response.json().catch(() => null);
+                throw new Error((errorData && errorData.error) || `Server returned ${response.status}: ${response.statusText}`);
+            }
 
-        currentData = await response.json();
+            currentData = await response.json();
+        }
 
         // Null safety check
         if (!currentData || !currentData.game_id) {
             throw new Error('Invalid response from server');
         }
 
+        // Server is overloaded (or out of budget) - it sent a cached game for a related word instead
+        if (currentData.degraded) {
+            console.log(`Server busy (${currentData.reason}) - showing "${currentData.word}" instead of "${currentData.requested_word}"`);
+            input.value = currentData.word;
+            updateWiggleDisplay();
+            window.history.replaceState({}, '', `/${encodeURIComponent(currentData.word)}`);
+        }
+
         // If cached, display immediately (but wait for parchment to load)
         if (currentData.cached) {
             loadingContainer.classList.add('hidden');
@@ -507,14 +587,17 @@ async function selectCard(card, cardData) {
             contestant_positions[responseId] = position;
         });
 
-        await fetch('/api/vote', {
+        const vote = fetch('/api/vote', {
             method: 'POST',
             headers: { 'Content-Type': 'application/json' },
             body: JSON.stringify({
                 game_id: currentData.game_id,
+                game_token: currentData.game_token,  // prefetched games are only saved on vote
                 response_ids: [cardData.response_id]
             })
         });
+        prefetchNextGame();
+        await vote;
     } catch (error) {
         console.error('Error recording vote:', error);
     }
@@ -556,14 +639,17 @@ async function selectNoneOfTheAbove() {
 
     // Record vote with null response_ids (none of the above)
     try {
-        await fetch('/api/vote', {
+        const vote = fetch('/api/vote', {
             method: 'POST',
             headers: { 'Content-Type': 'application/json' },
             body: JSON.stringify({
                 game_id: currentData.game_id,
+                game_token: currentData.game_token,
                 response_ids: null
             })
         });
+        prefetchNextGame();
+        await vote;
     } catch (error) {
         console.error('Error recording vote:', error);
     }
@@ -0,0 +1,12 @@
+import os
+import sys
+import tempfile
+
+# app.py migrates DATABASE_PATH on import, so point it (and the files kept next to it) at a
+# throwaway directory before any test imports it
+_workdir = tempfile.mkdtemp(prefix='comedy-tests-')
+os.environ['DATABASE_PATH'] = os.path.join(_workdir, 'comedy.db')
+os.environ['ANALYTICS_DB_PATH'] = os.path.join(_workdir, 'comedy.analytics.db')
+os.environ.setdefault('OPENROUTER_API_KEY', 'tests')
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
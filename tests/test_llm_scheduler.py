@@ -0,0 +1,113 @@
+import threading
+
+import app
+from app import LLMScheduler
+
+
+def make_scheduler(workers=4, interactive_reserve=2):
+    """A scheduler with lanes but no pool threads, so jobs only start when a test pops them"""
+    scheduler = LLMScheduler(workers=0, interactive_reserve=0)
+    scheduler.ensure_started()
+    scheduler.workers = workers
+    scheduler.limits = {'interactive': workers, 'background': max(1, workers - interactive_reserve)}
+    return scheduler
+
+
+def pop_clients(scheduler, count):
+    """Start `count` jobs and return (lane, client) for each, in the order they ran"""
+    started = []
+    with scheduler.cond:
+        for _ in range(count):
+            lane, fn, args = scheduler.next_job()
+            started.append((lane, args[0]))
+    return started
+
+
+def test_heavy_client_does_not_starve_a_later_one():
+    scheduler = make_scheduler(workers=100)
+    for _ in range(40):
+        scheduler.submit(lambda client: None, 'heavy', client='heavy')
+    assert [client for _, client in pop_clients(scheduler, 2)] == ['heavy', 'heavy']
+
+    # Arriving late, the light client starts at the current virtual time, not behind 38 queued calls
+    for _ in range(3):
+        scheduler.submit(lambda client: None, 'light', client='light')
+    order = [client for _, client in pop_clients(scheduler, 8)]
+    assert order[:6].count('light') == 3
+    assert order[6:] == ['heavy', 'heavy']
+
+
+def test_weight_gives_a_bigger_share():
+    scheduler = make_scheduler(workers=100)
+    for _ in range(6):
+        scheduler.submit(lambda client: None, 'double', client='double', weight=2.0)
+        scheduler.submit(lambda client: None, 'single', client='single')
+    order = [client for _, client in pop_clients(scheduler, 6)]
+    assert order.count('double') == 4
+
+
+def test_interactive_lane_runs_first():
+    scheduler = make_scheduler()
+    scheduler.submit(lambda client: None, 'deferred', lane='background', client='deferred')
+    scheduler.submit(lambda client: None, 'player', lane='interactive', client='player')
+    assert pop_clients(scheduler, 2) == [('interactive', 'player'), ('background', 'deferred')]
+
+
+def test_background_lane_leaves_the_reserve_free():
+    scheduler = make_scheduler(workers=4, interactive_reserve=2)
+    for _ in range(5):
+        scheduler.submit(lambda client: None, 'deferred', lane='background', client='deferred')
+    assert len(pop_clients(scheduler, 2)) == 2
+    with scheduler.cond:
+        assert scheduler.next_job() is None  # background is at its limit of 2 threads
+
+    scheduler.submit(lambda client: None, 'player', lane='interactive', client='player')
+    scheduler.submit(lambda client: None, 'player', lane='interactive', client='player')
+    assert pop_clients(scheduler, 2) == [('interactive', 'player'), ('interactive', 'player')]
+
+
+def test_idle_clients_are_forgotten():
+    scheduler = make_scheduler()
+    scheduler.submit(lambda client: None, 'player', client='player')
+    scheduler.submit(lambda client: None, 'player', client='player')
+    state = scheduler.lanes['interactive']
+    assert state['finish_tags'] == {'player': 2.0}
+    assert state['queued_by_client'] == {'player': 2}
+
+    pop_clients(scheduler, 2)
+    assert state['finish_tags'] == {}
+    assert state['queued_by_client'] == {}
+    assert scheduler.stats()['interactive']['waiting_clients'] == 0
+
+
+def test_pool_runs_interactive_work_while_background_is_saturated():
+    scheduler = LLMScheduler(workers=3, interactive_reserve=1)
+    release = threading.Event()
+    background_started = threading.Semaphore(0)
+    interactive_done = threading.Event()
+
+    def background_job():
+        background_started.release()
+        release.wait(5)
+
+    for _ in range(4):
+        scheduler.submit(background_job, lane='background', client='deferred')
+    for _ in range(2):
+        assert background_started.acquire(timeout=5)
+
+    scheduler.submit(interactive_done.set, client='player')
+    try:
+        assert interactive_done.wait(5)
+        stats = scheduler.stats()['background']
+        assert stats['running'] == 2 and stats['queued'] == 2
+    finally:
+        release.set()
+
+
+def test_fair_share_key_ignores_client_supplied_forwarded_for(monkeypatch):
+    headers = {'X-Forwarded-For': '6.6.6.6, 10.0.0.7'}
+    with app.app.test_request_context('/', headers=headers, environ_base={'REMOTE_ADDR': '10.0.0.1'}):
+        monkeypatch.setattr(app, 'TRUSTED_PROXY_HOPS', 0)
+        assert app.trusted_client_ip() == '10.0.0.1'
+        monkeypatch.setattr(app, 'TRUSTED_PROXY_HOPS', 1)
+        assert app.trusted_client_ip() == '10.0.0.7'
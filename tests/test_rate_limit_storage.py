@@ -0,0 +1,104 @@
+import threading
+
+import pytest
+
+import app
+from app import SQLiteLimiterStorage
+
+WINDOW_START = 100000 * 60.0  # a minute boundary
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Frozen time.time() for the storage, moved by assigning clock.now"""
+    class Clock:
+        now = WINDOW_START
+    monkeypatch.setattr(app.time, 'time', lambda: Clock.now)
+    return Clock
+
+
+@pytest.fixture
+def storage(tmp_path):
+    return SQLiteLimiterStorage(f"sqlite:///{tmp_path}/ratelimits.db")
+
+
+def test_uri_paths(tmp_path):
+    assert SQLiteLimiterStorage('sqlite:///ratelimits.db').path == 'ratelimits.db'
+    assert SQLiteLimiterStorage(f"sqlite:///{tmp_path}/rl.db").path == f"{tmp_path}/rl.db"
+
+
+def test_fixed_window_counts_and_expires(storage, clock):
+    assert storage.incr('k', 60) == 1
+    assert storage.incr('k', 60, amount=2) == 3
+    assert storage.get('k') == 3
+    assert storage.get_expiry('k') == WINDOW_START + 60
+
+    # An expired counter restarts at the next hit, with a new expiry
+    clock.now = WINDOW_START + 61
+    assert storage.get('k') == 0
+    assert storage.incr('k', 60) == 1
+    assert storage.get_expiry('k') == WINDOW_START + 121
+
+
+def test_sliding_window_weights_the_previous_window(storage, clock):
+    clock.now = WINDOW_START + 10
+    assert all(storage.acquire_sliding_window_entry('k', 10, 60) for _ in range(10))
+    assert not storage.acquire_sliding_window_entry('k', 10, 60)
+
+    # Halfway through the next window the previous 10 count as 5, leaving room for 5
+    clock.now = WINDOW_START + 90
+    previous_count, previous_ttl, current_count, current_ttl = storage.get_sliding_window('k', 60)
+    assert (previous_count, previous_ttl, current_count) == (10, 30.0, 0)
+    assert current_ttl == 90.0
+    assert all(storage.acquire_sliding_window_entry('k', 10, 60) for _ in range(5))
+    assert not storage.acquire_sliding_window_entry('k', 10, 60)
+
+    # Two windows on, nothing is left
+    clock.now = WINDOW_START + 180
+    assert storage.get_sliding_window('k', 60)[0::2] == (0, 0)
+
+
+def test_sliding_window_rejects_more_than_the_limit_at_once(storage, clock):
+    assert not storage.acquire_sliding_window_entry('k', 3, 60, amount=4)
+    assert storage.acquire_sliding_window_entry('k', 3, 60, amount=3)
+    assert not storage.acquire_sliding_window_entry('k', 3, 60)
+
+
+def test_clear_and_reset(storage, clock):
+    storage.acquire_sliding_window_entry('a', 5, 60)
+    storage.incr('b', 60)
+    storage.clear_sliding_window('a', 60)
+    assert storage.get_sliding_window('a', 60)[2] == 0
+    assert storage.reset() == 1
+    assert storage.check()
+
+
+def test_expired_counters_are_evicted(storage, clock, monkeypatch):
+    monkeypatch.setattr(app, 'RATE_LIMIT_EVICT_INTERVAL', 0)
+    storage.incr('old', 60)
+    clock.now = WINDOW_START + 120
+    storage.incr('new', 60)
+    keys = [row[0] for row in storage.connection().execute('SELECT key FROM rate_limits')]
+    assert keys == ['new']
+
+
+def test_concurrent_acquires_never_exceed_the_limit(storage, clock):
+    """Each thread has its own connection; BEGIN IMMEDIATE makes check-and-increment atomic"""
+    clock.now = WINDOW_START + 30
+    granted = []
+    lock = threading.Lock()
+    barrier = threading.Barrier(8)
+
+    def hammer():
+        barrier.wait()
+        mine = sum(storage.acquire_sliding_window_entry('shared', 50, 60) for _ in range(25))
+        with lock:
+            granted.append(mine)
+
+    threads = [threading.Thread(target=hammer) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert sum(granted) == 50
+    assert storage.get_sliding_window('shared', 60)[2] == 50
@@ -0,0 +1,101 @@
+import sqlite3
+import uuid
+
+import numpy as np
+import pytest
+
+import app
+from app import fit_luce, replay_elo
+
+
+def test_even_record_gives_equal_strengths_and_closed_form_errors():
+    # A and B beat each other 10 times each. With the prior (a win and a loss against w = 1),
+    # w = 1 is the fixed point and the Fisher information is [[5.5, -5], [-5, 5.5]]
+    lineups = np.array([[0, 1]] * 20)
+    winners = np.array([0] * 10 + [1] * 10)
+    log_strengths, standard_errors = fit_luce(lineups, winners, 2)
+    assert log_strengths == pytest.approx([0.0, 0.0], abs=1e-9)
+    # Centered covariance: 0.25 * u'inv(I)u with u = (1, -1), i.e. 0.25 / 5.25 per model
+    assert standard_errors == pytest.approx([np.sqrt(0.25 / 5.25)] * 2, rel=1e-9)
+
+
+def test_without_the_prior_strengths_are_proportional_to_wins(monkeypatch):
+    # Every game has the same 3-way lineup, so the Luce MLE is w_i proportional to i's wins
+    monkeypatch.setattr(app, 'RATINGS_PRIOR_GAMES', 1e-9)
+    lineups = np.array([[0, 1, 2]] * 10)
+    winners = np.array([0] * 6 + [1] * 3 + [2])
+    log_strengths, standard_errors = fit_luce(lineups, winners, 3)
+
+    expected = np.log([6, 3, 1])
+    assert log_strengths == pytest.approx(expected - expected.mean(), abs=1e-5)
+
+    # Standard errors from the pseudo-inverse of 10 * (diag(p) - p p')
+    p = np.array([0.6, 0.3, 0.1])
+    information = 10 * (np.diag(p) - np.outer(p, p))
+    assert standard_errors == pytest.approx(np.sqrt(np.diag(np.linalg.pinv(information))), rel=1e-3)
+
+
+def test_padded_lineups_match_unpadded_ones():
+    lineups = np.array([[0, 1]] * 8 + [[1, 2]] * 6 + [[0, 2]] * 4)
+    winners = np.array([0] * 5 + [1] * 3 + [1] * 2 + [2] * 4 + [0] * 3 + [2])
+    padded = np.hstack([lineups, np.full((len(lineups), 1), 3)])
+
+    plain = fit_luce(lineups, winners, 3)
+    with_padding = fit_luce(padded, winners, 3)
+    assert with_padding[0] == pytest.approx(plain[0], abs=1e-9)
+    assert with_padding[1] == pytest.approx(plain[1], abs=1e-9)
+    # A won 8 of 12, C 5 of 10 and B 5 of 14
+    assert plain[0][0] > plain[0][2] > plain[0][1]
+
+
+@pytest.fixture
+def voting_db():
+    """The test DB emptied of games, with one suggestion answered by three models"""
+    db = app.get_db()
+    for table in ('game_contestants', 'games', 'responses', 'suggestions', 'model_ratings', 'vote_rollups'):
+        db.execute(f'DELETE FROM {table}')
+    suggestion_id = db.execute(
+        "INSERT INTO suggestions (word, canonical_word, mode) VALUES ('rating test', 'rating test', 'women')"
+    ).lastrowid
+    response_ids = [db.execute(
+        '''INSERT INTO responses (suggestion_id, model_name, model_id, mode, status, response_text)
+           VALUES (?, ?, ?, 'women', 'completed', 'punchline')''',
+        (suggestion_id, name, f"test/{name}")
+    ).lastrowid for name in ('A', 'B', 'C')]
+    db.commit()
+    yield db, suggestion_id, response_ids
+    db.close()
+
+
+def cast_votes(db, suggestion_id, response_ids, winners):
+    for winner in winners:
+        game_id = str(uuid.uuid4())
+        app.insert_cached_game(db, game_id, suggestion_id, 'women', response_ids)
+        app.record_vote(db, game_id, [response_ids[winner]], '127.0.0.1', 'session')
+    db.commit()
+
+
+def test_first_refit_keeps_votes_cast_after_the_snapshot(voting_db, tmp_path, monkeypatch):
+    db, suggestion_id, response_ids = voting_db
+    cast_votes(db, suggestion_id, response_ids, [0, 0, 1, 0, 2])
+
+    # An analytics snapshot taken now, then more votes before the refit reads it
+    snapshot_path = str(tmp_path / 'snapshot.db')
+    snapshot = sqlite3.connect(snapshot_path)
+    db.backup(snapshot)
+    snapshot.close()
+    cast_votes(db, suggestion_id, response_ids, [1, 1, 2, 0, 1])
+
+    def stale_snapshot():
+        conn = sqlite3.connect(snapshot_path)
+        conn.row_factory = sqlite3.Row
+        return conn
+    monkeypatch.setattr(app, 'get_analytics_db', stale_snapshot)
+    assert app.ratings.refit() == 5  # the Luce fit uses the snapshot
+
+    rows = {row['model_name']: row for row in db.execute('SELECT * FROM model_ratings')}
+    assert {name: row['elo_games'] for name, row in rows.items()} == {'A': 10, 'B': 10, 'C': 10}
+    _, lineups, winners = app.load_voted_games(db)
+    expected = replay_elo(lineups, winners, 3)
+    assert [rows[name]['elo'] for name in ('A', 'B', 'C')] == pytest.approx(expected)
+    assert all(row['rated_games'] == 5 and row['refit_at'] for row in rows.values())